@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from google.api_core.exceptions import InvalidArgument
+
+from Benchmarks.FakeFirestore import FakeFirestore
+from FirebaseSingleton import FirebaseSingleton
+
+POST_ID = "post-0"
+AUTHOR_ID = "author"
+
+
+def _seed(store: FakeFirestore, comments: int, votes_per_comment: int, ratings: int, commenters: int):
+    store.seed(f"users/{AUTHOR_ID}", {"name": AUTHOR_ID, "likes": 0})
+    for i in range(commenters):
+        store.seed(f"users/commenter-{i}", {"name": f"commenter-{i}", "likes": 0})
+    store.seed(f"posts/{POST_ID}", {"userId": AUTHOR_ID, "rating": 3.0, "ratingSum": 3.0 * ratings, "ratingCount": ratings, "views": 0})
+
+    for c in range(comments):
+        comment_id = f"comment-{c}"
+        author = f"commenter-{random.randrange(commenters)}"
+        likes = 0
+        for v in range(votes_per_comment):
+            vote = random.random() < 0.7
+            likes += 1 if vote else -1
+            store.seed(f"votes/{comment_id}_voter-{v}", {"userId": f"voter-{v}", "commId": comment_id, "vote": vote})
+        store.seed(f"comments/{comment_id}", {"postId": POST_ID, "userId": author, "text": "benchmark", "likes": likes, "parentId": None})
+        store.docs[f"users/{author}"]["likes"] += likes
+    for r in range(ratings):
+        store.seed(f"ratings/{POST_ID}_rater-{r}", {"postId": POST_ID, "userId": f"rater-{r}", "rating": 3.0})
+
+
+# The request path of PostsService.delete_post before the cascade engine, replayed
+# call for call against the store as the baseline: four independent cascades.
+async def legacy_delete_post(db, post_id: str, user_id: str):
+    ratings, comments, votes, posts = (db.collection(name) for name in ("ratings", "comments", "votes", "posts"))
+    run = asyncio.to_thread
+
+    async def delete_all_ratings():
+        found = await run(lambda: list(ratings.where("postId", "==", post_id).stream()))
+        await asyncio.gather(*(run(r.reference.delete) for r in found))
+
+    async def delete_post_and_comments():
+        found = await run(lambda: list(comments.where("postId", "==", post_id).stream()))
+        await asyncio.gather(*(run(c.reference.delete) for c in found))
+
+    async def delete_all_votes():
+        found = await run(lambda: list(votes.where("commId", "==", post_id).stream()))
+        batch = db.batch()
+        for v in found:
+            batch.delete(v.reference)
+        await run(batch.commit)
+
+    async def delete_post():
+        post_ref = posts.document(post_id)
+        await run(post_ref.get)
+        found_ratings = await run(lambda: list(ratings.where("postId", "==", post_id).stream()))
+        found_comments = await run(lambda: list(comments.where("postId", "==", post_id).stream()))
+        batch = db.batch()
+        for doc in found_ratings + found_comments:
+            batch.delete(doc.reference)
+        batch.delete(post_ref)
+        await run(batch.commit)
+
+    results = await asyncio.gather(
+        delete_all_ratings(), delete_post_and_comments(), delete_all_votes(), delete_post(), return_exceptions=True
+    )
+    return [r for r in results if isinstance(r, Exception)]
+
+
+def _use_store(store: FakeFirestore):
+    singleton = object.__new__(FirebaseSingleton)
+    singleton.db = store
+    FirebaseSingleton._instance = singleton
+
+
+def _left(store: FakeFirestore, collection: str):
+    return sum(1 for path in store.docs if path.startswith(f"{collection}/"))
+
+
+def _drift(store: FakeFirestore):
+    # Likes still credited to commenters for comments that no longer exist.
+    live = {}
+    for path, data in store.docs.items():
+        if path.startswith("comments/"):
+            live[data["userId"]] = live.get(data["userId"], 0) + data.get("likes", 0)
+    return sum(abs(data.get("likes", 0) - live.get(path.split("/", 1)[1], 0))
+               for path, data in store.docs.items() if path.startswith("users/commenter-"))
+
+
+async def run(latency_ms: float, comments: int, votes_per_comment: int, ratings: int, commenters: int, concurrency: int):
+    results = {}
+    for name in ("before", "after"):
+        random.seed(3)
+        store = FakeFirestore(latency=latency_ms / 1000)
+        _seed(store, comments, votes_per_comment, ratings, commenters)
+        documents = len(store.docs) - commenters - 1
+        _use_store(store)
+        rpcs_before = store.rpcs
+
+        start = time.perf_counter()
+        if name == "before":
+            errors = await legacy_delete_post(store, POST_ID, AUTHOR_ID)
+        else:
+            from Repository.PostsRepository import PostsRepository
+
+            repo = PostsRepository(None)
+            repo.cascade.max_concurrency = concurrency
+            errors = []
+            try:
+                await repo.delete_post(AUTHOR_ID, POST_ID)
+            except InvalidArgument as e:
+                errors.append(e)
+        elapsed = time.perf_counter() - start
+        left = {c: _left(store, c) for c in ("posts", "comments", "votes", "ratings")}
+
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "deleted": documents - sum(left.values()),
+            "docs_per_second": round((documents - sum(left.values())) / elapsed, 1),
+            "round_trips": store.rpcs - rpcs_before,
+            "errors": [str(e) for e in errors],
+            "left": left,
+            "commenter_likes_drift": _drift(store),
+        }
+
+    return {
+        "simulated_rpc_latency_ms": latency_ms,
+        "comments": comments,
+        "votes": comments * votes_per_comment,
+        "ratings": ratings,
+        "concurrency": concurrency,
+        **results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare deleting a large post before and after the cascade engine.")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated latency of one Firestore round trip")
+    parser.add_argument("--comments", type=int, default=1000)
+    parser.add_argument("--votes-per-comment", type=int, default=5)
+    parser.add_argument("--ratings", type=int, default=200)
+    parser.add_argument("--commenters", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(
+        args.latency_ms, args.comments, args.votes_per_comment, args.ratings, args.commenters, args.concurrency
+    )), indent=2))
+# RUN WITH python -m Benchmarks.CascadeThroughput from the Server folder
@@ -0,0 +1,236 @@
+import itertools
+import random
+import threading
+import time
+
+from google.api_core.exceptions import InvalidArgument, NotFound
+from google.cloud.firestore import Increment
+
+# In-memory stand-in for the parts of the Firestore client the repositories use.
+# Every call that would be a network round trip sleeps for a simulated latency
+# and is counted, so request paths can be compared without a real project.
+# Transactions are applied atomically but concurrent conflicts are not detected.
+
+MAX_WRITES = 500
+
+
+def _apply(existing, updates):
+    data = dict(existing or {})
+    for field, value in updates.items():
+        if isinstance(value, Increment):
+            current = data.get(field, 0)
+            data[field] = (current if isinstance(current, (int, float)) else 0) + value.value
+        else:
+            data[field] = value
+    return data
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeQuery:
+    # A group query matches every collection named `path`, wherever it is nested.
+    def __init__(self, store, path, filters=(), group=False):
+        self.store = store
+        self.path = path
+        self.filters = filters
+        self.group = group
+
+    def where(self, field, op, value):
+        if op not in ("==", "in"):
+            raise NotImplementedError(f"Operator {op} is not supported by the fake store")
+        return FakeQuery(self.store, self.path, self.filters + ((field, op, value),), self.group)
+
+    def _in_scope(self, collection_path):
+        if self.group:
+            return collection_path.rsplit("/", 1)[-1] == self.path
+        return collection_path == self.path
+
+    def _matches(self, data):
+        for field, op, value in self.filters:
+            if op == "==" and data.get(field) != value:
+                return False
+            if op == "in" and data.get(field) not in value:
+                return False
+        return True
+
+    def _snapshots(self):
+        with self.store.lock:
+            return [
+                FakeSnapshot(FakeDocument(self.store, *path.rsplit("/", 1)), data)
+                for path, data in self.store.docs.items()
+                if self._in_scope(path.rsplit("/", 1)[0]) and self._matches(data)
+            ]
+
+    def stream(self):
+        snapshots = self._snapshots()
+        self.store.rpc(len(snapshots))
+        return iter(snapshots)
+
+
+class FakeCollection(FakeQuery):
+    @property
+    def parent(self):
+        if "/" not in self.path:
+            return None
+        return FakeDocument(self.store, *self.path.rsplit("/", 1)[0].rsplit("/", 1))
+
+    def document(self, doc_id):
+        return FakeDocument(self.store, self.path, doc_id)
+
+    def list_documents(self):
+        self.store.rpc()
+        return [snapshot.reference for snapshot in self._snapshots()]
+
+
+class FakeDocument:
+    def __init__(self, store, collection_path, doc_id):
+        self.store = store
+        self.id = doc_id
+        self.path = f"{collection_path}/{doc_id}"
+
+    @property
+    def parent(self):
+        return FakeCollection(self.store, self.path.rsplit("/", 1)[0])
+
+    def collection(self, name):
+        return FakeCollection(self.store, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        self.store.rpc()
+        return self.store.snapshot(self)
+
+    def set(self, data, merge=False):
+        self.store.rpc()
+        self.store.write([("set", self, data, merge)])
+
+    def update(self, data):
+        self.store.rpc()
+        self.store.write([("update", self, data, False)])
+
+    def delete(self):
+        self.store.rpc()
+        self.store.write([("delete", self, None, False)])
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append(("set", ref, data, merge))
+
+    def update(self, ref, data):
+        self.ops.append(("update", ref, data, False))
+
+    def delete(self, ref):
+        self.ops.append(("delete", ref, None, False))
+
+    def commit(self):
+        self.store.rpc(len(self.ops))
+        if len(self.ops) > MAX_WRITES:
+            raise InvalidArgument(f"maximum {MAX_WRITES} writes allowed per request")
+        self.store.write(self.ops)
+
+
+class FakeTransaction(FakeBatch):
+    _ids = itertools.count(1)
+
+    def __init__(self, store):
+        super().__init__(store)
+        self._id = None
+        self._read_only = False
+        self._max_attempts = 5
+
+    def _clean_up(self):
+        self.ops = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self.store.rpc()
+        self._id = next(self._ids)
+
+    def _commit(self):
+        self.store.rpc()
+        self.store.write(self.ops)
+        self._clean_up()
+
+    def _rollback(self):
+        self._clean_up()
+
+    def get_all(self, references):
+        self.store.rpc()
+        return [self.store.snapshot(ref) for ref in references]
+
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, FakeQuery):
+            return ref_or_query.stream()
+        return ref_or_query.get()
+
+
+class FakeFirestore:
+    def __init__(self, latency: float = 0.005, jitter: float = 0.2, per_document: float = 0.00002):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_document = per_document
+        self.docs = {}
+        self.lock = threading.RLock()
+        self.rpcs = 0
+
+    def rpc(self, documents: int = 0):
+        with self.lock:
+            self.rpcs += 1
+        delay = self.latency * random.uniform(1 - self.jitter, 1 + self.jitter) + documents * self.per_document
+        if delay > 0:
+            time.sleep(delay)
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def collection_group(self, name):
+        return FakeQuery(self, name, group=True)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, references):
+        references = list(references)
+        self.rpc(len(references))
+        return [self.snapshot(ref) for ref in references]
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def snapshot(self, ref):
+        with self.lock:
+            data = self.docs.get(ref.path)
+            return FakeSnapshot(ref, dict(data) if data is not None else None)
+
+    def seed(self, path: str, data: dict):
+        with self.lock:
+            self.docs[path] = dict(data)
+
+    def write(self, ops):
+        with self.lock:
+            for op, ref, _, _ in ops:
+                if op == "update" and ref.path not in self.docs:
+                    raise NotFound(f"No document to update: {ref.path}")
+            for op, ref, data, merge in ops:
+                if op == "delete":
+                    self.docs.pop(ref.path, None)
+                elif op == "set" and not merge:
+                    self.docs[ref.path] = _apply({}, data)
+                else:
+                    self.docs[ref.path] = _apply(self.docs.get(ref.path), data)
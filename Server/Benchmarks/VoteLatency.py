@@ -0,0 +1,137 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from Benchmarks.FakeFirestore import FakeFirestore
+from FirebaseSingleton import FirebaseSingleton
+
+COMMENT_ID = "comment-0"
+AUTHOR_ID = "author"
+
+
+def _seed(store: FakeFirestore, voters: int, existing_votes: int, author_comments: int, author_posts: int):
+    store.seed(f"users/{AUTHOR_ID}", {"name": AUTHOR_ID, "likes": 0})
+    for i in range(voters):
+        store.seed(f"users/voter-{i}", {"name": f"voter-{i}"})
+
+    upvotes = 0
+    for i in range(existing_votes):
+        vote = random.random() < 0.7
+        upvotes += vote
+        store.seed(f"votes/{COMMENT_ID}_crowd-{i}", {"userId": f"crowd-{i}", "commId": COMMENT_ID, "vote": vote})
+    downvotes = existing_votes - upvotes
+    store.seed(f"comments/{COMMENT_ID}", {
+        "userId": AUTHOR_ID, "postId": "post-0", "text": "benchmark", "likes": upvotes - downvotes,
+        "upvotes": upvotes, "downvotes": downvotes,
+    })
+    for i in range(1, author_comments):
+        store.seed(f"comments/comment-{i}", {"userId": AUTHOR_ID, "postId": "post-0", "likes": 1})
+    for i in range(author_posts):
+        store.seed(f"posts/post-{i}", {"userId": AUTHOR_ID, "rating": 0.0, "views": 0})
+
+
+# The request path of vote_on_comment before votes were applied in a single
+# transaction, replayed call for call against the store as the baseline.
+async def legacy_vote_on_comment(db, comment_id: str, user_id: str, vote: bool):
+    comments, users, votes, posts = (db.collection(name) for name in ("comments", "users", "votes", "posts"))
+    run = asyncio.to_thread
+
+    await asyncio.gather(run(comments.document(comment_id).get), run(users.document(user_id).get))
+
+    vote_ref = votes.document(f"{comment_id}_{user_id}")
+    if (await run(vote_ref.get)).exists:
+        await run(vote_ref.update, {"vote": vote})
+    else:
+        await run(vote_ref.set, {"userId": user_id, "commId": comment_id, "vote": vote})
+
+    comment_ref = comments.document(comment_id)
+    likes = (await run(comment_ref.get)).to_dict().get("likes", 0)
+    await run(comment_ref.update, {"likes": likes + (1 if vote else -1)})
+
+    all_votes, comment = await asyncio.gather(
+        run(lambda: list(votes.where("commId", "==", comment_id).stream())),
+        run(comment_ref.get),
+    )
+    total_votes = sum(1 if v.to_dict().get("vote") else -1 for v in all_votes)
+
+    author_id = comment.to_dict()["userId"]
+    author_comments = await run(lambda: list(comments.where("userId", "==", author_id).stream()))
+    author_posts = await run(lambda: list(posts.where("userId", "==", author_id).stream()))
+    total_likes = sum(c.to_dict().get("likes", 0) for c in author_comments)
+    total_likes += sum(p.to_dict().get("likes", 0) for p in author_posts)
+    author_ref = users.document(author_id)
+    await run(author_ref.get)
+    await run(author_ref.update, {"likes": total_likes})
+    return {"message": "Vote processed", "totalLikes": {"commId": comment_id, "totalVotes": total_votes}}
+
+
+def _use_store(store: FakeFirestore):
+    singleton = object.__new__(FirebaseSingleton)
+    singleton.db = store
+    FirebaseSingleton._instance = singleton
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {"p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99), "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2)}
+
+
+async def _measure(store: FakeFirestore, vote_once, iterations: int, voters: int):
+    rng = random.Random(7)
+    samples = []
+    rpcs_before = store.rpcs
+    for _ in range(iterations):
+        user_id = f"voter-{rng.randrange(voters)}"
+        vote = rng.random() < 0.7
+        start = time.perf_counter()
+        await vote_once(COMMENT_ID, user_id, vote)
+        samples.append(time.perf_counter() - start)
+    return {**_percentiles(samples), "round_trips_per_vote": round((store.rpcs - rpcs_before) / iterations, 2)}
+
+
+async def run(iterations: int, latency_ms: float, voters: int, existing_votes: int, author_comments: int, author_posts: int):
+    results = {}
+    for name in ("before", "after"):
+        random.seed(11)
+        store = FakeFirestore(latency=latency_ms / 1000)
+        _seed(store, voters, existing_votes, author_comments, author_posts)
+        _use_store(store)
+        if name == "before":
+            async def vote_once(comment_id, user_id, vote):
+                return await legacy_vote_on_comment(store, comment_id, user_id, vote)
+        else:
+            from Service.VotesService import VotesService
+
+            vote_once = VotesService(None).vote_on_comment
+        results[name] = await _measure(store, vote_once, iterations, voters)
+
+    return {
+        "iterations": iterations,
+        "simulated_rpc_latency_ms": latency_ms,
+        "existing_votes": existing_votes,
+        "author_comments": author_comments,
+        "author_posts": author_posts,
+        **results,
+        "p50_speedup": round(results["before"]["p50_ms"] / results["after"]["p50_ms"], 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare vote latency before and after the single-transaction vote path.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated latency of one Firestore round trip")
+    parser.add_argument("--voters", type=int, default=50)
+    parser.add_argument("--existing-votes", type=int, default=500)
+    parser.add_argument("--author-comments", type=int, default=50)
+    parser.add_argument("--author-posts", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(
+        args.iterations, args.latency_ms, args.voters, args.existing_votes, args.author_comments, args.author_posts
+    )), indent=2))
+# RUN WITH python -m Benchmarks.VoteLatency from the Server folder
@@ -0,0 +1,166 @@
+import copy
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import Metrics
+
+logger = logging.getLogger("AnalysisCache")
+
+
+def image_digest(image) -> str:
+    digest = image.info.get("content_hash") if hasattr(image, "info") else None
+    if digest:
+        return digest
+    hasher = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    hasher.update(image.tobytes())
+    return hasher.hexdigest()
+
+
+class AnalysisCache:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, db_path: str = None, db_ttl: float = 7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_ttl = db_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # SQLite reads and writes take their own lock, so memory hits never wait on the disk tier.
+        self._db_lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    @classmethod
+    def get_instance(cls) -> "AnalysisCache":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "1024")),
+                        ttl=float(os.getenv("ANALYSIS_CACHE_TTL", "3600")),
+                        db_path=os.getenv("ANALYSIS_CACHE_DB") or None,
+                        db_ttl=float(os.getenv("ANALYSIS_CACHE_DB_TTL", str(7 * 24 * 3600))),
+                    )
+        return cls._instance
+
+    def _open_db(self, db_path: str):
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis (key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Disabling on-disk analysis cache at {db_path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(model_name: str, model_version: str, digest: str) -> str:
+        return f"{model_name}:{model_version}:{digest}"
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+
+        value = self._db_get(key, now)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, value, now)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value):
+        now = time.time()
+        stored = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, stored, now)
+        self._db_put(key, stored, now)
+
+    def get_or_compute(self, model_name: str, model_version: str, digest: str, compute):
+        key = self.make_key(model_name, model_version, digest)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        result = compute()
+        if not (isinstance(result, dict) and "error" in result):
+            self.put(key, result)
+        return result
+
+    def _remember(self, key: str, value, now: float):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _db_get(self, key: str, now: float):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT value, created FROM analysis WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.db_ttl:
+                    self._db.execute("DELETE FROM analysis WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            logger.warning(f"On-disk analysis cache read failed: {e}")
+            return None
+
+    def _db_put(self, key: str, value, now: float):
+        if self._db is None:
+            return
+        try:
+            data = pickle.dumps(value)
+            with self._db_lock:
+                self._db.execute("INSERT OR REPLACE INTO analysis (key, value, created) VALUES (?, ?, ?)", (key, data, now))
+                self._db.commit()
+        except (sqlite3.Error, pickle.PicklingError) as e:
+            logger.warning(f"On-disk analysis cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM analysis")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_enabled": self._db is not None,
+            }
+
+
+Metrics.register("analysis_cache", lambda: AnalysisCache.get_instance().stats())
@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import requests
+
+logger = logging.getLogger("AssetStore")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "model_cache")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", DEFAULT_CACHE_DIR)
+CLIP_MODEL = "openai/clip-vit-base-patch32"
+DEEPFACE_WEIGHTS = ("age_model_weights.h5", "gender_model_weights.h5", "facial_expression_model_weights.h5")
+
+
+class AssetUnavailable(Exception):
+    pass
+
+
+class AssetChecksumError(Exception):
+    pass
+
+
+class Asset:
+    def __init__(self, name: str, url: str, filename: str, sha256: str = None, sha256_prefix: str = None):
+        self.name = name
+        self.url = url
+        self.filename = filename
+        self.sha256 = sha256
+        self.sha256_prefix = sha256_prefix
+
+
+# A pinned asset must match its full sha256. Until a pin is set through ASSET_SHA256_<NAME> (see
+# python -m Factory.AssetStore hash <name>), the digest of the first download is recorded in the
+# manifest and every later copy must match it.
+ASSETS = {
+    asset.name: asset
+    for asset in (
+        Asset(
+            "imagenet_class_index",
+            "https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json",
+            "imagenet_class_index.json",
+            sha256=os.getenv("ASSET_SHA256_IMAGENET_CLASS_INDEX"),
+        ),
+        Asset(
+            "resnet50_imagenet1k_v1",
+            "https://download.pytorch.org/models/resnet50-0676ba61.pth",
+            "resnet50-0676ba61.pth",
+            sha256=os.getenv("ASSET_SHA256_RESNET50_IMAGENET1K_V1"),
+            # torchvision names its checkpoints after the first hex digits of their sha256.
+            sha256_prefix="0676ba61",
+        ),
+        Asset(
+            "resnet18_places365",
+            "https://places2.csail.mit.edu/models_places365/resnet18_places365.pth.tar",
+            "resnet18_places365.pth.tar",
+            sha256=os.getenv("ASSET_SHA256_RESNET18_PLACES365"),
+        ),
+        Asset(
+            "categories_places365",
+            "https://raw.githubusercontent.com/csailvision/places365/master/categories_places365.txt",
+            "categories_places365.txt",
+            sha256=os.getenv(
+                "ASSET_SHA256_CATEGORIES_PLACES365", "2affba635eb657e7ca95f4e6cc69bd9fac29ef4c32aeb83cafdfcd06ec6a1ea6"
+            ),
+        ),
+    )
+}
+
+MODEL_ASSETS = {
+    "object": ["imagenet_class_index", "resnet50_imagenet1k_v1"],
+    "scene": ["resnet18_places365", "categories_places365"],
+    "genre": [],
+}
+
+
+def _sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class AssetStore:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, offline: bool = False, timeout: float = 60.0):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.offline = offline
+        self.timeout = timeout
+        self.assets_dir = os.path.join(self.cache_dir, "assets")
+        self.hf_cache_dir = os.path.join(self.cache_dir, "huggingface")
+        self.deepface_home = os.path.join(self.cache_dir, "deepface")
+        self.manifest_path = os.path.join(self.assets_dir, "manifest.json")
+        self._lock = threading.Lock()
+        self._manifest = self._read_manifest()
+
+    @classmethod
+    def get_instance(cls) -> "AssetStore":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        MODEL_CACHE_DIR,
+                        offline=os.getenv("MODEL_OFFLINE", "false").strip().lower() in ("1", "true", "yes"),
+                        timeout=float(os.getenv("ASSET_DOWNLOAD_TIMEOUT", "60")),
+                    )
+        return cls._instance
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable asset manifest {self.manifest_path}: {e}")
+            return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.assets_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def path(self, name: str) -> str:
+        if name not in ASSETS:
+            raise ValueError(f"Unknown asset: {name}")
+        asset = ASSETS[name]
+        local_path = os.path.join(self.assets_dir, asset.filename)
+
+        with self._lock:
+            if os.path.exists(local_path):
+                try:
+                    self._verify(asset, local_path)
+                    return local_path
+                except AssetChecksumError as e:
+                    if self.offline:
+                        raise
+                    logger.warning(f"{e}; downloading it again")
+                    os.remove(local_path)
+
+            if self.offline:
+                raise AssetUnavailable(
+                    f"Asset '{name}' is missing from {self.assets_dir} and MODEL_OFFLINE is set; "
+                    f"run 'python -m Factory.AssetStore prefetch' on a connected machine"
+                )
+            self._download(asset, local_path)
+            try:
+                self._verify(asset, local_path)
+            except AssetChecksumError:
+                os.remove(local_path)
+                raise
+            return local_path
+
+    def _verify(self, asset: Asset, local_path: str):
+        stat = os.stat(local_path)
+        entry = self._manifest.get(asset.name)
+        unchanged = entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime
+        expected = asset.sha256 or (entry or {}).get("sha256")
+        if unchanged and entry.get("sha256") == expected:
+            return
+
+        digest = _sha256(local_path)
+        if expected and digest != expected:
+            raise AssetChecksumError(f"Asset '{asset.name}' has sha256 {digest}, expected {expected}")
+        if asset.sha256_prefix and not digest.startswith(asset.sha256_prefix):
+            raise AssetChecksumError(f"Asset '{asset.name}' has sha256 {digest}, expected prefix {asset.sha256_prefix}")
+        if not expected:
+            logger.warning(
+                f"Asset '{asset.name}' has no pinned sha256; recording {digest} from its first download. "
+                f"Pin it with ASSET_SHA256_{asset.name.upper()}"
+            )
+
+        self._manifest[asset.name] = {
+            "file": asset.filename,
+            "url": asset.url,
+            "sha256": digest,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        self._write_manifest()
+
+    def _download(self, asset: Asset, local_path: str):
+        os.makedirs(self.assets_dir, exist_ok=True)
+        tmp_path = f"{local_path}.{os.getpid()}.part"
+        logger.info(f"Downloading asset '{asset.name}' from {asset.url}")
+        try:
+            with requests.get(asset.url, stream=True, timeout=self.timeout, allow_redirects=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+            os.replace(tmp_path, local_path)
+        except requests.RequestException as e:
+            raise AssetUnavailable(f"Could not download asset '{asset.name}': {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def hash(self, name: str):
+        if name not in ASSETS:
+            raise ValueError(f"Unknown asset: {name}")
+        asset = ASSETS[name]
+        tmp_path = os.path.join(self.assets_dir, f"{asset.filename}.unverified")
+        try:
+            self._download(asset, tmp_path)
+            return {"asset": name, "url": asset.url, "sha256": _sha256(tmp_path), "size": os.path.getsize(tmp_path)}
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def huggingface_kwargs(self):
+        return {"cache_dir": self.hf_cache_dir, "local_files_only": self.offline}
+
+    def configure_deepface(self):
+        os.environ.setdefault("DEEPFACE_HOME", self.deepface_home)
+        if not self.offline:
+            return
+        weights_dir = os.path.join(os.environ["DEEPFACE_HOME"], ".deepface", "weights")
+        missing = [name for name in DEEPFACE_WEIGHTS if not os.path.exists(os.path.join(weights_dir, name))]
+        if missing:
+            raise AssetUnavailable(f"DeepFace weights {missing} are missing from {weights_dir} and MODEL_OFFLINE is set")
+
+    def prefetch(self, model_names=None):
+        model_names = list(model_names or MODEL_ASSETS)
+        fetched = {}
+        for model_name in model_names:
+            for name in MODEL_ASSETS.get(model_name, []):
+                fetched[name] = self.path(name)
+
+        if "genre" in model_names:
+            from transformers import AutoProcessor, AutoModelForZeroShotImageClassification
+
+            AutoProcessor.from_pretrained(CLIP_MODEL, **self.huggingface_kwargs())
+            AutoModelForZeroShotImageClassification.from_pretrained(CLIP_MODEL, **self.huggingface_kwargs())
+            fetched[CLIP_MODEL] = self.hf_cache_dir
+
+        if "object" in model_names:
+            self.configure_deepface()
+            from deepface import DeepFace
+
+            for attribute in ("Age", "Gender", "Emotion"):
+                try:
+                    DeepFace.build_model(model_name=attribute, task="facial_attribute")
+                except TypeError:
+                    DeepFace.build_model(attribute)
+            fetched["deepface"] = os.environ["DEEPFACE_HOME"]
+        return fetched
+
+    def status(self):
+        return {
+            name: {
+                "cached": os.path.exists(os.path.join(self.assets_dir, asset.filename)),
+                "pinned": bool(asset.sha256),
+                "sha256": self._manifest.get(name, {}).get("sha256"),
+            }
+            for name, asset in ASSETS.items()
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage the local cache of model assets.")
+    parser.add_argument("command", choices=["prefetch", "status", "hash"])
+    parser.add_argument("name", nargs="?", help="asset to download and hash without caching it (hash only)")
+    parser.add_argument("--models", default=",".join(MODEL_ASSETS), help="comma separated model names")
+    args = parser.parse_args()
+
+    store = AssetStore.get_instance()
+    if args.command == "prefetch":
+        result = store.prefetch([name.strip() for name in args.models.split(",") if name.strip()])
+    elif args.command == "hash":
+        result = store.hash(args.name)
+    else:
+        result = store.status()
+    print(json.dumps(result, indent=2))
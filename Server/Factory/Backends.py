@@ -0,0 +1,89 @@
+import logging
+import os
+
+import torch
+
+from Factory.AssetStore import MODEL_CACHE_DIR
+
+logger = logging.getLogger("Backends")
+
+SUPPORTED_BACKENDS = ("eager", "quantized", "onnx")
+BACKEND_MODELS = ("object", "scene", "genre")
+ONNX_DIR = os.path.join(MODEL_CACHE_DIR, "onnx")
+
+
+def _configured_backends():
+    configured = {}
+    for entry in os.getenv("MODEL_BACKENDS", "").split(","):
+        if "=" in entry:
+            name, backend = entry.split("=", 1)
+            configured[name.strip()] = backend.strip().lower()
+    return configured
+
+
+def backend_for(model_name: str) -> str:
+    if model_name not in BACKEND_MODELS:
+        return "eager"
+    backend = _configured_backends().get(model_name, os.getenv("MODEL_BACKEND", "eager").strip().lower())
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' for model '{model_name}', expected one of {SUPPORTED_BACKENDS}")
+    return backend
+
+
+def versioned(model_name: str, version: str) -> str:
+    backend = backend_for(model_name)
+    return version if backend == "eager" else f"{version}+{backend}"
+
+
+class OnnxRunner:
+    def __init__(self, path: str):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("The 'onnx' backend requires the onnxruntime package")
+
+        options = onnxruntime.SessionOptions()
+        threads = int(os.getenv("ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        outputs = self.session.run(None, {self.input_name: batch.detach().cpu().numpy()})
+        return torch.from_numpy(outputs[0])
+
+
+def _export_onnx(module: torch.nn.Module, example_input: torch.Tensor, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.onnx.export(
+        module,
+        (example_input,),
+        tmp_path,
+        input_names=["input"],
+        output_names=["output"],
+        dynamic_axes={"input": {0: "batch"}, "output": {0: "batch"}},
+        opset_version=17,
+        dynamo=False,
+    )
+    os.replace(tmp_path, path)
+
+
+def compile_module(module: torch.nn.Module, model_name: str, version: str, backend: str, example_input: torch.Tensor):
+    module.eval()
+    if backend == "eager":
+        return module
+    if backend == "quantized":
+        # Dynamic quantization only rewrites Linear layers: weights are stored as
+        # int8 and activations quantized on the fly, which suits CPU inference.
+        return torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        module.cpu()
+        path = os.path.join(ONNX_DIR, f"{model_name}-{version}.onnx")
+        if not os.path.exists(path):
+            logger.info(f"Exporting '{model_name}' to ONNX at {path}")
+            with torch.no_grad():
+                _export_onnx(module, example_input.cpu(), path)
+        return OnnxRunner(path)
+    raise ValueError(f"Unknown backend: {backend}")
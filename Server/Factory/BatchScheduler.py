@@ -0,0 +1,144 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import Metrics
+from Factory.ModelRegistry import ModelRegistry
+
+logger = logging.getLogger("BatchScheduler")
+
+BATCHED_MODELS = ("object", "scene", "genre")
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _setting(name: str, model_name: str, default: str) -> str:
+    return os.getenv(f"{name}_{model_name.upper()}", os.getenv(name, default))
+
+
+class BatchScheduler:
+    _schedulers = {}
+    _schedulers_lock = threading.Lock()
+
+    def __init__(self, model_name: str, max_batch_size: int = 8, max_wait: float = 0.005):
+        self.model_name = model_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = {}
+        self._queue_depths = {bucket: 0 for bucket in DEPTH_BUCKETS}
+        self._queue_depths["+Inf"] = 0
+        self._requests = 0
+        self._batches = 0
+        self._fallbacks = 0
+        self._total_wait = 0.0
+        self._worker = threading.Thread(target=self._run, name=f"batch-{model_name}", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def is_enabled(cls, model_name: str) -> bool:
+        enabled = os.getenv("INFERENCE_BATCHING", "true").strip().lower() in ("1", "true", "yes")
+        return enabled and model_name in BATCHED_MODELS
+
+    @classmethod
+    def for_model(cls, model_name: str) -> "BatchScheduler":
+        scheduler = cls._schedulers.get(model_name)
+        if scheduler is None:
+            with cls._schedulers_lock:
+                scheduler = cls._schedulers.get(model_name)
+                if scheduler is None:
+                    scheduler = cls(
+                        model_name,
+                        max_batch_size=int(_setting("BATCH_MAX_SIZE", model_name, "8")),
+                        max_wait=float(_setting("BATCH_MAX_WAIT_MS", model_name, "5")) / 1000,
+                    )
+                    cls._schedulers[model_name] = scheduler
+        return scheduler
+
+    def submit(self, image) -> Future:
+        future = Future()
+        self._queue.put((image, future, time.monotonic()))
+        return future
+
+    def predict(self, image, timeout: float = None):
+        return self.submit(image).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self._record(batch, self._queue.qsize())
+            futures = [future for _, future, _ in batch]
+            try:
+                model = ModelRegistry.get_instance().get(self.model_name)
+            except Exception as e:
+                logger.error(f"Could not load '{self.model_name}' for batched inference: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            try:
+                results = model.predict_batch([image for image, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Expected {len(batch)} results, got {len(results)}")
+            except Exception as e:
+                if len(batch) == 1:
+                    futures[0].set_exception(e)
+                    continue
+                # One bad image must not fail the requests it happened to be batched with.
+                logger.warning(f"Batched inference for '{self.model_name}' failed, predicting one at a time: {e}")
+                with self._stats_lock:
+                    self._fallbacks += 1
+                for image, future, _ in batch:
+                    self._predict_one(model, image, future)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def _predict_one(self, model, image, future: Future):
+        try:
+            future.set_result(model.predict(image))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _record(self, batch, depth: int):
+        now = time.monotonic()
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            self._total_wait += sum(now - enqueued for _, _, enqueued in batch)
+            bucket = next((b for b in DEPTH_BUCKETS if depth <= b), "+Inf")
+            self._queue_depths[bucket] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self._requests,
+                "batches": self._batches,
+                "fallbacks": self._fallbacks,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "avg_queue_wait_ms": round(self._total_wait / self._requests * 1000, 2) if self._requests else 0.0,
+                "queue_depth": self._queue.qsize(),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "queue_depth_histogram": {str(k): v for k, v in self._queue_depths.items()},
+            }
+
+
+Metrics.register("batching", lambda: {name: s.stats() for name, s in BatchScheduler._schedulers.items()})
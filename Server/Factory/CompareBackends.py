@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import time
+
+from PIL import Image
+
+from Factory.Backends import BACKEND_MODELS, SUPPORTED_BACKENDS
+from Factory.ModelRegistry import ModelRegistry
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+TOP1 = {
+    "object": lambda result: "human" if isinstance(result, dict) else result[0]["label"],
+    "scene": lambda result: result[0]["scene"],
+    "genre": lambda result: result[0]["style"],
+}
+
+
+def _load_images(folder: str, limit: int = None):
+    paths = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder) if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return [(path, Image.open(path).convert("RGB")) for path in paths[:limit]]
+
+
+def _run(model, images, batch_size: int):
+    results = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        results.extend(model.predict_batch(images[i:i + batch_size]))
+    return results, time.perf_counter() - start
+
+
+def compare(model_name: str, backend: str, folder: str, limit: int = None, batch_size: int = 8):
+    images = _load_images(folder, limit)
+    if not images:
+        raise ValueError(f"No images found in {folder}")
+
+    model_class = ModelRegistry.get_instance()._import(model_name)
+    paths, pixels = zip(*images)
+    reference, reference_time = _run(model_class(backend="eager"), list(pixels), batch_size)
+    candidate, candidate_time = _run(model_class(backend=backend), list(pixels), batch_size)
+
+    top1 = TOP1[model_name]
+    disagreements = [
+        {"image": os.path.basename(path), "eager": top1(expected), backend: top1(actual)}
+        for path, expected, actual in zip(paths, reference, candidate)
+        if top1(expected) != top1(actual)
+    ]
+    return {
+        "model": model_name,
+        "backend": backend,
+        "images": len(images),
+        "top1_agreement": round(1 - len(disagreements) / len(images), 4),
+        "eager_ms_per_image": round(reference_time / len(images) * 1000, 2),
+        f"{backend}_ms_per_image": round(candidate_time / len(images) * 1000, 2),
+        "disagreements": disagreements,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a model backend against eager fp32 on local images.")
+    parser.add_argument("model", choices=BACKEND_MODELS)
+    parser.add_argument("backend", choices=[b for b in SUPPORTED_BACKENDS if b != "eager"])
+    parser.add_argument("folder")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(compare(args.model, args.backend, args.folder, args.limit, args.batch_size), indent=2))
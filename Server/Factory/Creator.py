@@ -1,25 +1,18 @@
 from Factory.products.BaseModel import BaseModel
-from Factory.products.AestheticIQA import AestheticIQA
-from Factory.products.TechnicalQualityAssessment import TechnicalQualityAssessment
-from Factory.products.ObjectRecognition import ObjectRecognition
-from Factory.products.SceneClassifier import SceneClassifier
-from Factory.products.GenreClassifier import GenreClassifier
-from Factory.products.CompositionIQA import CompositionIQA
-from Factory.products.ChromaticIQA import ChromaticIQA
+from Factory.ModelRegistry import ModelRegistry
+from Factory.BatchScheduler import BatchScheduler
+from Factory.WorkerPool import InferenceWorkerPool
 
 class Creator:
     @staticmethod
     def get_model(model_type: str) -> BaseModel:
-        model_map = {
-            "aesthetic": AestheticIQA(),
-            "composition": CompositionIQA(),
-            "chromatic": ChromaticIQA(),  
-            "quality": TechnicalQualityAssessment(),
-            "object": ObjectRecognition(),
-            "scene": SceneClassifier(),
-            "genre": GenreClassifier(),
-        }
-        model = model_map.get(model_type)
-        if not model:
-            raise ValueError(f"No model found for type: {model_type}")
-        return model
+        return ModelRegistry.get_instance().get(model_type)
+
+    @staticmethod
+    def predict(model_type: str, image):
+        pool = InferenceWorkerPool.get_instance()
+        if pool is not None and pool.handles(model_type):
+            return pool.predict(model_type, image)
+        if BatchScheduler.is_enabled(model_type):
+            return BatchScheduler.for_model(model_type).predict(image)
+        return Creator.get_model(model_type).predict(image)
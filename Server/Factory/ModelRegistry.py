@@ -0,0 +1,193 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Factory.Backends import versioned
+
+logger = logging.getLogger("ModelRegistry")
+
+MODEL_PATHS = {
+    "aesthetic": "Factory.products.AestheticIQA.AestheticIQA",
+    "composition": "Factory.products.CompositionIQA.CompositionIQA",
+    "chromatic": "Factory.products.ChromaticIQA.ChromaticIQA",
+    "quality": "Factory.products.TechnicalQualityAssessment.TechnicalQualityAssessment",
+    "object": "Factory.products.ObjectRecognition.ObjectRecognition",
+    "scene": "Factory.products.SceneClassifier.SceneClassifier",
+    "genre": "Factory.products.GenreClassifier.GenreClassifier",
+}
+
+
+class ModelRegistry:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, model_paths: dict = None, idle_timeout: float = None):
+        self._model_paths = dict(model_paths or MODEL_PATHS)
+        self._models = {}
+        self._model_locks = {name: threading.Lock() for name in self._model_paths}
+        self._load_times = {}
+        self._last_used = {}
+        self._errors = {}
+        self._loading = set()
+        self.required = set()
+        self.idle_timeout = idle_timeout
+        self._evictor = None
+        if idle_timeout:
+            self._start_evictor()
+
+    @classmethod
+    def get_instance(cls) -> "ModelRegistry":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    idle_timeout = float(os.getenv("MODEL_IDLE_TIMEOUT", "0")) or None
+                    cls._instance = cls(idle_timeout=idle_timeout)
+        return cls._instance
+
+    @property
+    def model_names(self):
+        return list(self._model_paths)
+
+    def get(self, name: str):
+        if name not in self._model_paths:
+            raise ValueError(f"No model found for type: {name}")
+
+        model = self._models.get(name)
+        if model is None:
+            with self._model_locks[name]:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._load(name)
+        self._last_used[name] = time.monotonic()
+        return model
+
+    def _import(self, name: str):
+        module_path, class_name = self._model_paths[name].rsplit(".", 1)
+        return getattr(importlib.import_module(module_path), class_name)
+
+    def _load(self, name: str):
+        start = time.perf_counter()
+        self._loading.add(name)
+        try:
+            model = self._import(name)()
+        except Exception as e:
+            self._errors[name] = str(e)
+            logger.error(f"Failed to load model '{name}': {e}")
+            raise
+        finally:
+            self._loading.discard(name)
+
+        elapsed = time.perf_counter() - start
+        self._errors.pop(name, None)
+        self._load_times[name] = elapsed
+        self._models[name] = model
+        logger.info(f"Loaded model '{name}' in {elapsed:.2f}s")
+        return model
+
+    def warm_up(self, names=None, parallel: bool = False, max_workers: int = None):
+        names = list(names or self.model_names)
+        if not parallel or len(names) < 2:
+            for name in names:
+                self.get(name)
+            return {name: self._load_times.get(name) for name in names}
+
+        # torch, transformers and TensorFlow (via DeepFace) are not safe to import
+        # concurrently, so modules are imported one by one and only the weight
+        # loading inside each constructor runs in parallel.
+        errors = []
+        importable = []
+        for name in names:
+            try:
+                self._import(name)
+                importable.append(name)
+            except Exception as e:
+                self._errors[name] = str(e)
+                errors.append(e)
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(importable) or 1, thread_name_prefix="model-warmup") as pool:
+            futures = [pool.submit(self.get, name) for name in importable]
+        errors.extend(f.exception() for f in futures if f.exception())
+        if errors:
+            raise errors[0]
+        return {name: self._load_times.get(name) for name in names}
+
+    def require(self, names):
+        unknown = [name for name in names if name not in self._model_paths]
+        if unknown:
+            logger.warning(f"Ignoring unknown models: {unknown}")
+        names = [name for name in names if name in self._model_paths]
+        self.required.update(names)
+        return names
+
+    def preload(self, names=None, parallel: bool = True):
+        names = self.require(list(names or self.model_names))
+        try:
+            self.warm_up(names, parallel=parallel)
+        except Exception as e:
+            logger.error(f"Model preload incomplete: {e}")
+        return {name: self._errors.get(name, "not loaded") for name in names if not self.is_loaded(name)}
+
+    def is_ready(self) -> bool:
+        return all(self.is_loaded(name) for name in self.required)
+
+    def model_version(self, name: str) -> str:
+        if name not in self._model_paths:
+            raise ValueError(f"No model found for type: {name}")
+        model = self._models.get(name)
+        return versioned(name, getattr(model if model is not None else self._import(name), "version", "1"))
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def evict(self, name: str) -> bool:
+        with self._model_locks[name]:
+            model = self._models.pop(name, None)
+        if model is not None:
+            logger.info(f"Evicted model '{name}'")
+        return model is not None
+
+    def evict_idle(self):
+        if not self.idle_timeout:
+            return []
+        now = time.monotonic()
+        idle = [
+            name for name in list(self._models)
+            if name not in self.required and now - self._last_used.get(name, now) > self.idle_timeout
+        ]
+        return [name for name in idle if self.evict(name)]
+
+    def _start_evictor(self):
+        def run():
+            while True:
+                time.sleep(max(self.idle_timeout / 2, 1.0))
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    logger.warning(f"Idle eviction failed: {e}")
+
+        self._evictor = threading.Thread(target=run, name="model-evictor", daemon=True)
+        self._evictor.start()
+
+    def _state(self, name: str) -> str:
+        if name in self._models:
+            return "loaded"
+        if name in self._loading:
+            return "loading"
+        if name in self._errors:
+            return "failed"
+        return "not_loaded"
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            name: {
+                "state": self._state(name),
+                "load_time": self._load_times.get(name),
+                "idle_for": round(now - self._last_used[name], 2) if name in self._last_used else None,
+                "error": self._errors.get(name),
+            }
+            for name in self._model_paths
+        }
@@ -0,0 +1,291 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing.shared_memory import SharedMemory
+
+from PIL import Image
+
+import Metrics
+
+logger = logging.getLogger("WorkerPool")
+
+DEFAULT_WORKER_MODELS = "object,scene,genre,aesthetic"
+
+
+class InferencePoolBusy(Exception):
+    pass
+
+
+class InferenceTimeout(Exception):
+    pass
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def _worker_main(index: int, model_names, request_queue, result_queue, threads: int):
+    # Workers must run models themselves instead of routing back into a pool.
+    os.environ["INFERENCE_WORKERS"] = "0"
+    logging.basicConfig(level=logging.INFO)
+    from Factory.Creator import Creator
+    from Factory.ModelRegistry import ModelRegistry
+
+    failed = ModelRegistry.get_instance().preload(model_names, parallel=False)
+    result_queue.put(("ready", os.getpid(), failed))
+
+    def handle(request_id, model_name, shm_name, size, mode):
+        try:
+            shm = SharedMemory(name=shm_name)
+            try:
+                image = Image.frombytes(mode, size, bytes(shm.buf[:shm.size]))
+            finally:
+                shm.close()
+            result_queue.put((request_id, True, Creator.predict(model_name, image)))
+        except Exception as e:
+            result_queue.put((request_id, False, f"{type(e).__name__}: {e}"))
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"inference-{index}") as executor:
+        while True:
+            item = request_queue.get()
+            if item is None:
+                break
+            executor.submit(handle, *item)
+
+
+def _release(shm):
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class _Worker:
+    def __init__(self, process, request_queue, result_queue):
+        self.process = process
+        self.request_queue = request_queue
+        # Each worker answers on its own queue, so one killed mid-write cannot corrupt the others'.
+        self.result_queue = result_queue
+        self.ready = False
+        self.retired = False
+        self.in_flight = set()
+
+
+class InferenceWorkerPool:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        num_workers: int,
+        model_names,
+        max_pending: int = 64,
+        timeout: float = 30.0,
+        queue_timeout: float = 1.0,
+        threads_per_worker: int = 4,
+    ):
+        self.model_names = list(model_names)
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.threads_per_worker = threads_per_worker
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._counters = {"requests": 0, "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "restarts": 0}
+        self._closed = False
+        self._workers = [self._start(index) for index in range(num_workers)]
+
+        threading.Thread(target=self._monitor, name="inference-monitor", daemon=True).start()
+
+    @classmethod
+    def get_instance(cls):
+        num_workers = int(os.getenv("INFERENCE_WORKERS", "0"))
+        if num_workers <= 0:
+            return None
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    models = os.getenv("INFERENCE_WORKER_MODELS", DEFAULT_WORKER_MODELS)
+                    cls._instance = cls(
+                        num_workers,
+                        [name.strip() for name in models.split(",") if name.strip()],
+                        max_pending=int(os.getenv("INFERENCE_MAX_PENDING", "64")),
+                        timeout=float(os.getenv("INFERENCE_TIMEOUT", "30")),
+                        queue_timeout=float(os.getenv("INFERENCE_QUEUE_TIMEOUT", "1")),
+                        threads_per_worker=int(os.getenv("INFERENCE_WORKER_THREADS", "4")),
+                    )
+        return cls._instance
+
+    def handles(self, model_name: str) -> bool:
+        return model_name in self.model_names
+
+    def _spawn(self, index: int) -> _Worker:
+        request_queue = self._ctx.Queue()
+        result_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self.model_names, request_queue, result_queue, self.threads_per_worker),
+            name=f"inference-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        logger.info(f"Started inference worker {index} (pid {process.pid}) for {self.model_names}")
+        return _Worker(process, request_queue, result_queue)
+
+    def _start(self, index: int) -> _Worker:
+        worker = self._spawn(index)
+        threading.Thread(
+            target=self._collect_results, args=(index, worker), name=f"inference-results-{index}", daemon=True
+        ).start()
+        return worker
+
+    def predict(self, model_name: str, image, timeout: float = None):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count("rejected")
+            raise InferencePoolBusy("Inference queue is full")
+
+        request_id = next(self._ids)
+        future = Future()
+        shm = None
+        registered = sent = False
+        try:
+            image = image if image.mode in ("RGB", "L") else image.convert("RGB")
+            data = image.tobytes()
+            shm = SharedMemory(create=True, size=max(len(data), 1))
+            shm.buf[:len(data)] = data
+            with self._lock:
+                index = min(range(len(self._workers)), key=lambda i: len(self._workers[i].in_flight))
+                worker = self._workers[index]
+                worker.in_flight.add(request_id)
+                self._pending[request_id] = (future, index, shm)
+                registered = True
+            self._count("requests")
+            worker.request_queue.put((request_id, model_name, shm.name, image.size, image.mode))
+            sent = True
+            return future.result(timeout or self.timeout)
+        except FutureTimeoutError:
+            self._count("timeouts")
+            raise InferenceTimeout(f"Inference for '{model_name}' timed out")
+        finally:
+            # Once the request is queued the worker may still be reading the image after a timeout,
+            # so its shared memory and queue slot are freed when the answer arrives or the worker dies.
+            if not sent:
+                with self._lock:
+                    entry = self._pending.pop(request_id, None)
+                    if entry is not None:
+                        self._workers[entry[1]].in_flight.discard(request_id)
+                if entry is not None or not registered:
+                    self._free(shm)
+
+    def _free(self, shm):
+        if shm is not None:
+            _release(shm)
+        self._slots.release()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _collect_results(self, index: int, worker: _Worker):
+        while not self._closed and not worker.retired:
+            try:
+                request_id, ok, payload = worker.result_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except Exception as e:
+                # A worker killed while writing leaves its queue unreadable; restart it with a new one.
+                logger.error(f"Lost the result queue of inference worker {index} ({type(e).__name__}: {e}); restarting")
+                worker.process.terminate()
+                break
+
+            if request_id == "ready":
+                worker.ready = True
+                if payload:
+                    logger.error(f"Inference worker {index} (pid {ok}) failed to load: {payload}")
+                continue
+
+            with self._lock:
+                entry = self._pending.pop(request_id, None)
+                self._counters["completed" if ok else "failed"] += 1
+                if entry is not None:
+                    self._workers[entry[1]].in_flight.discard(request_id)
+            if entry is None:
+                continue
+            # Workers copy the image out of shared memory before answering.
+            future, _, shm = entry
+            self._free(shm)
+            if future.done():
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _monitor(self):
+        while not self._closed:
+            time.sleep(1.0)
+            for index, worker in enumerate(list(self._workers)):
+                if self._closed or worker.process.is_alive():
+                    continue
+                logger.error(f"Inference worker {index} exited with code {worker.process.exitcode}; restarting")
+                replacement = self._start(index)
+                with self._lock:
+                    worker.retired = True
+                    self._workers[index] = replacement
+                    lost = [self._pending.pop(r) for r in worker.in_flight if r in self._pending]
+                    worker.in_flight.clear()
+                    self._counters["restarts"] += 1
+                for future, _, shm in lost:
+                    self._free(shm)
+                    if not future.done():
+                        future.set_exception(WorkerCrashed(f"Inference worker {index} crashed"))
+
+    def is_ready(self) -> bool:
+        return all(worker.ready for worker in self._workers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._counters,
+                "workers": [
+                    {"pid": w.process.pid, "alive": w.process.is_alive(), "ready": w.ready, "in_flight": len(w.in_flight)}
+                    for w in self._workers
+                ],
+                "pending": len(self._pending),
+                "max_pending": self.max_pending,
+                "models": self.model_names,
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.request_queue.put(None)
+            except (ValueError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        with self._lock:
+            abandoned = list(self._pending.values())
+            self._pending.clear()
+        for future, _, shm in abandoned:
+            self._free(shm)
+            if not future.done():
+                future.set_exception(WorkerCrashed("Inference pool shut down"))
+
+
+Metrics.register(
+    "inference_pool",
+    lambda: InferenceWorkerPool._instance.stats() if InferenceWorkerPool._instance else {"enabled": False},
+)
@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
 
 class BaseModel(ABC):
+    version = "1"
+
     @abstractmethod
     def predict(self, image):
         pass
+
+    def predict_batch(self, images):
+        return [self.predict(image) for image in images]
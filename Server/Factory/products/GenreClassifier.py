@@ -1,11 +1,40 @@
+import hashlib
+import json
+import logging
+import os
 import torch
 from PIL import Image
 from transformers import AutoProcessor, AutoModelForZeroShotImageClassification
+from Factory.products.BaseModel import BaseModel
+from Factory.Backends import backend_for, compile_module
+from Factory.AssetStore import MODEL_CACHE_DIR, AssetStore
 
-class GenreClassifier:
-    def __init__(self, model_name="openai/clip-vit-base-patch32"):
-        self.processor = AutoProcessor.from_pretrained(model_name)
-        self.model = AutoModelForZeroShotImageClassification.from_pretrained(model_name)
+logger = logging.getLogger("GenreClassifier")
+
+DEFAULT_LABEL_SET = "default"
+EMBEDDINGS_DIR = os.path.join(MODEL_CACHE_DIR, "genre_embeddings")
+
+class _ImageEncoder(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return GenreClassifier._projected(self.model.get_image_features(pixel_values=pixel_values))
+
+class GenreClassifier(BaseModel):
+    version = "clip-vit-base-patch32-v1"
+
+    def __init__(self, model_name="openai/clip-vit-base-patch32", backend: str = None):
+        self.model_name = model_name
+        self.backend = backend or backend_for("genre")
+        hub_options = AssetStore.get_instance().huggingface_kwargs()
+        self.processor = AutoProcessor.from_pretrained(model_name, **hub_options)
+        self.model = AutoModelForZeroShotImageClassification.from_pretrained(model_name, **hub_options)
+        self.model.eval()
+        self.logit_scale = self.model.logit_scale.exp().item()
+        self.persist_embeddings = os.getenv("GENRE_EMBEDDINGS_PERSIST", "true").strip().lower() in ("1", "true", "yes")
+        self._label_sets = {}
         self.candidate_labels = [
             "nature photography",
             "landscape photography",
@@ -35,13 +64,73 @@ class GenreClassifier:
             "abstract photography"
         ]
 
-    def predict(self, image: Image.Image):
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        inputs = self.processor(images=image, text=self.candidate_labels, return_tensors="pt", padding=True)
-        outputs = self.model(**inputs)
-        logits_per_image = outputs.logits_per_image
-        probs = torch.softmax(logits_per_image[0], dim=0).tolist()
-        results = [{"style": label, "confidence": round(prob * 100, 2)} for label, prob in zip(self.candidate_labels, probs)]
+        self.register_label_set(DEFAULT_LABEL_SET, self.candidate_labels)
+
+        # Label embeddings always come from the fp32 text tower; only the image
+        # tower, which runs on every request, goes through the selected backend.
+        crop = self.processor.image_processor.crop_size["height"]
+        self.image_encoder = compile_module(
+            _ImageEncoder(self.model), "genre", self.version, self.backend, torch.zeros(1, 3, crop, crop)
+        )
+
+    def register_label_set(self, name: str, labels):
+        labels = list(labels)
+        self._label_sets[name] = (labels, self._text_embeddings(labels))
+
+    @property
+    def label_sets(self):
+        return {name: labels for name, (labels, _) in self._label_sets.items()}
+
+    def _embeddings_path(self, labels):
+        key = hashlib.sha256(json.dumps([self.model_name, labels]).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(EMBEDDINGS_DIR, f"{self.model_name.replace('/', '--')}-{key}.pt")
+
+    def _text_embeddings(self, labels):
+        path = self._embeddings_path(labels)
+        if self.persist_embeddings and os.path.exists(path):
+            try:
+                return torch.load(path, weights_only=True)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable label embeddings at {path}: {e}")
+
+        inputs = self.processor(text=labels, return_tensors="pt", padding=True)
+        with torch.no_grad():
+            embeddings = self._projected(self.model.get_text_features(**inputs))
+        embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+
+        if self.persist_embeddings:
+            try:
+                os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
+                torch.save(embeddings, path)
+            except OSError as e:
+                logger.warning(f"Could not persist label embeddings to {path}: {e}")
+        return embeddings
+
+    @staticmethod
+    def _projected(features):
+        # Newer transformers releases return a model output whose pooler_output
+        # holds the projected embeddings instead of the bare tensor.
+        return features if isinstance(features, torch.Tensor) else features.pooler_output
+
+    def predict(self, image: Image.Image, label_set: str = DEFAULT_LABEL_SET):
+        return self.predict_batch([image], label_set)[0]
+
+    def predict_batch(self, images, label_set: str = DEFAULT_LABEL_SET):
+        if label_set not in self._label_sets:
+            raise ValueError(f"Unknown genre label set: {label_set}")
+        labels, text_embeddings = self._label_sets[label_set]
+
+        images = [image if image.mode == "RGB" else image.convert("RGB") for image in images]
+        inputs = self.processor(images=images, return_tensors="pt")
+        with torch.no_grad():
+            image_embeddings = self.image_encoder(inputs["pixel_values"])
+        image_embeddings = image_embeddings / image_embeddings.norm(dim=-1, keepdim=True)
+
+        logits = self.logit_scale * image_embeddings @ text_embeddings.T
+        probs = torch.softmax(logits, dim=1).tolist()
+        return [self._rank(labels, row) for row in probs]
+
+    def _rank(self, labels, probs):
+        results = [{"style": label, "confidence": round(prob * 100, 2)} for label, prob in zip(labels, probs)]
         results.sort(key=lambda x: x["confidence"], reverse=True)
         return results
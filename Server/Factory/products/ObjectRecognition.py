@@ -2,19 +2,26 @@ import torch
 from torchvision import models, transforms
 from PIL import Image
 import json
-import requests
 from io import BytesIO
 from deepface import DeepFace  
 from Factory.products.BaseModel import BaseModel
+from Factory.Backends import backend_for, compile_module
+from Factory.AssetStore import AssetStore
 
 class ObjectRecognition(BaseModel):
-    def __init__(self):
-        self.model = models.resnet50(pretrained=True)
+    version = "resnet50-imagenet1k-v1"
+
+    def __init__(self, backend: str = None):
+        self.backend = backend or backend_for("object")
+        store = AssetStore.get_instance()
+        store.configure_deepface()
+        self.model = models.resnet50()
+        self.model.load_state_dict(torch.load(store.path("resnet50_imagenet1k_v1"), map_location="cpu", weights_only=True))
         self.model.eval()
+        self.runner = compile_module(self.model, "object", self.version, self.backend, torch.zeros(1, 3, 224, 224))
 
-        self.labels_url = "https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json"
-        response = requests.get(self.labels_url)
-        self.labels = json.loads(response.text)
+        with open(store.path("imagenet_class_index")) as f:
+            self.labels = json.load(f)
 
         self.transform = transforms.Compose([
             transforms.Resize(256),
@@ -31,32 +38,37 @@ class ObjectRecognition(BaseModel):
             return None 
 
     def predict(self, image):
-        face_info = self._detect_human(image)
-        if face_info:
-            age = face_info[0]['age']
-            gender = face_info[0]['gender']
-            emotion = face_info[0]['dominant_emotion']
-            return {
-                "human_detected": True,
-                "age": age,
-                "gender": gender,
-                "emotion": emotion
-            }
-
-        img_tensor = self.transform(image).unsqueeze(0)
-        with torch.no_grad():
-            outputs = self.model(img_tensor)
-
-        probabilities = torch.nn.functional.softmax(outputs[0], dim=0)
-        top_prob, top_catid = torch.topk(probabilities, 1)
-
-        label = self.labels[str(top_catid.item())][1]
-        number = top_catid.item()
-        confidence = top_prob.item() * 100
-
-        return [{
-            "human_detected": False,
-            "label": label,
-            "number": number,
-            "confidence": round(confidence, 2)
-        }]
+        return self.predict_batch([image])[0]
+
+    def predict_batch(self, images):
+        results = [None] * len(images)
+        object_indexes = []
+        for i, image in enumerate(images):
+            face_info = self._detect_human(image)
+            if face_info:
+                results[i] = {
+                    "human_detected": True,
+                    "age": face_info[0]['age'],
+                    "gender": face_info[0]['gender'],
+                    "emotion": face_info[0]['dominant_emotion']
+                }
+            else:
+                object_indexes.append(i)
+
+        if object_indexes:
+            batch = torch.stack([self.transform(images[i]) for i in object_indexes])
+            with torch.no_grad():
+                outputs = self.runner(batch)
+
+            probabilities = torch.nn.functional.softmax(outputs, dim=1)
+            top_prob, top_catid = probabilities.max(dim=1)
+
+            for i, prob, catid in zip(object_indexes, top_prob.tolist(), top_catid.tolist()):
+                results[i] = [{
+                    "human_detected": False,
+                    "label": self.labels[str(catid)][1],
+                    "number": catid,
+                    "confidence": round(prob * 100, 2)
+                }]
+
+        return results
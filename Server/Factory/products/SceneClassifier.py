@@ -2,28 +2,27 @@ import torch
 from torchvision import models, transforms
 from PIL import Image
 import os
-import requests
 import zipfile
 from collections import OrderedDict
 
 from Factory.products.BaseModel import BaseModel
+from Factory.Backends import backend_for, compile_module
+from Factory.AssetStore import AssetStore
 
 class SceneClassifier(BaseModel):
-    def __init__(self):
+    version = "resnet18-places365-v1"
+
+    def __init__(self, backend: str = None):
         super().__init__()
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.backend = backend or backend_for("scene")
+        use_cuda = torch.cuda.is_available() and self.backend == "eager"
+        self.device = torch.device("cuda" if use_cuda else "cpu")
 
         self.model = models.resnet18(num_classes=365)
-        model_file = 'resnet18_places365.pth.tar'
-
-        if not os.path.exists(model_file):
-            print("Downloading model weights...*")
-            url = 'http://places2.csail.mit.edu/models_places365/resnet18_places365.pth.tar'
-            r = requests.get(url, allow_redirects=True)
-            with open(model_file, 'wb') as f:
-                f.write(r.content)
+        store = AssetStore.get_instance()
+        model_file = store.path("resnet18_places365")
 
-        checkpoint = torch.load(model_file, map_location=self.device)
+        checkpoint = torch.load(model_file, map_location=self.device, weights_only=True)
         new_state_dict = OrderedDict()
         for k, v in checkpoint['state_dict'].items():
             new_key = k.replace('module.', '')  
@@ -31,16 +30,10 @@ class SceneClassifier(BaseModel):
 
         self.model.load_state_dict(new_state_dict)
         self.model.eval().to(self.device)
+        self.runner = compile_module(self.model, "scene", self.version, self.backend, torch.zeros(1, 3, 224, 224))
 
         self.classes = []
-        categories_file = 'categories_places365.txt'
-        if not os.path.exists(categories_file):
-            print("Downloading categories...")
-            url = 'https://raw.githubusercontent.com/csailvision/places365/master/categories_places365.txt'
-            r = requests.get(url)
-            with open(categories_file, 'w') as f:
-                f.write(r.text)
-
+        categories_file = store.path("categories_places365")
         with open(categories_file) as class_file:
             self.classes = [line.strip().split(' ')[0][3:] for line in class_file]
 
@@ -53,12 +46,16 @@ class SceneClassifier(BaseModel):
         ])
 
     def predict(self, image: Image.Image):
-        img_tensor = self.transform(image).unsqueeze(0).to(self.device)
+        return self.predict_batch([image])[0]
+
+    def predict_batch(self, images):
+        batch = torch.stack([self.transform(image) for image in images]).to(self.device)
 
         with torch.no_grad():
-            logit = self.model(img_tensor)
-            h_x = torch.nn.functional.softmax(logit, 1).data.squeeze()
-            probs, idx = h_x.sort(0, True)
+            logit = self.runner(batch)
+            probs, idx = torch.nn.functional.softmax(logit, 1).topk(5, dim=1)
 
-        top5 = [{"scene": self.classes[idx[i]], "confidence": round(probs[i].item() * 100, 2)} for i in range(5)]
-        return top5
+        return [
+            [{"scene": self.classes[i], "confidence": round(p * 100, 2)} for p, i in zip(row_probs, row_idx)]
+            for row_probs, row_idx in zip(probs.tolist(), idx.tolist())
+        ]
@@ -1,17 +1,75 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi.staticfiles import StaticFiles
 load_dotenv()
+logging.basicConfig(level=logging.INFO)
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from Factory.ModelRegistry import ModelRegistry
+from Factory.WorkerPool import InferenceWorkerPool
+from Repository.DocumentCache import request_scope
 from Routes.Chatbot import Chatbot
 from Routes.Data import Comment, Post, User, Rating, Votes
+from Routes.Health import Health
+from Routes.Metrics import Metrics
+from Service.AccountDeletionQueue import AccountDeletionQueue
+from Service.ViewBuffer import ViewBuffer
 from TokenValidation import verify_token
-import tensorflow as tf
-print(tf.__version__)
 
-app = FastAPI()
+
+def _env_flag(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+def _preload_model_names(registry: ModelRegistry):
+    value = os.getenv("PRELOAD_MODELS", "").strip()
+    if value.lower() == "all":
+        return registry.model_names
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry = ModelRegistry.get_instance()
+    pool = InferenceWorkerPool.get_instance()
+    names = _preload_model_names(registry)
+    if pool is not None:
+        names = [name for name in names if not pool.handles(name)]
+    names = registry.require(names)
+    if names:
+        preload = asyncio.to_thread(registry.preload, names, _env_flag("PRELOAD_PARALLEL"))
+        if _env_flag("PRELOAD_BLOCKING"):
+            await preload
+        else:
+            app.state.preload_task = asyncio.create_task(preload)
+    # Deletions interrupted by a restart carry on from their last saved step.
+    AccountDeletionQueue.get_instance(os.getenv("FIREBASE_CREDENTIALS")).start()
+    yield
+    await Chatbot.image_fetcher.aclose()
+    if AccountDeletionQueue._instance is not None:
+        await AccountDeletionQueue._instance.close()
+    if Post.post_service._timeline_service is not None:
+        await Post.post_service.timeline_service.close()
+    if ViewBuffer._instance is not None:
+        await ViewBuffer._instance.close()
+    Chatbot.strategy_executor.shutdown(wait=False, cancel_futures=True)
+    if pool is not None:
+        await asyncio.to_thread(pool.shutdown)
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def document_scope(request: Request, call_next):
+    with request_scope():
+        return await call_next(request)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8081"],  
@@ -19,6 +77,8 @@ app.add_middleware(
     allow_methods=["*"],  
     allow_headers=["*"],  
 )
+app.include_router(Health.router, prefix="/health", tags=["Health"])
+app.include_router(Metrics.router, prefix="/metrics", tags=["Metrics"])
 app.include_router(Chatbot.router, prefix="/chatbot", tags=["Chatbot"])
 
 app.include_router(Post.router, prefix="/data/posts", tags=["Posts"],dependencies=[Depends(verify_token)])
@@ -28,4 +88,4 @@ app.include_router(Rating.router, prefix="/data/rating", tags=["Ratings"],depend
 app.include_router(Votes.router, prefix="/data/votes", tags=["Votes"],dependencies=[Depends(verify_token)])
 # conda activate licentaenv
 # RUN WITH uvicorn Main:app --reload --host 127.0.0.1 --port 8000
-
+# Every setting is read from the environment; README.md in this folder lists them.
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from dotenv import load_dotenv
+load_dotenv()
+logging.basicConfig(level=logging.INFO)
+
+from Repository.CommentsRepository import CommentsRepository
+from Repository.PostsRepository import PostsRepository
+from Repository.RatingsRepository import RatingsRepository
+from Repository.UsersRepository import UsersRepository
+from Service.TimelineService import TimelineService
+
+FIREBASE_CREDENTIALS_PATH = os.getenv("FIREBASE_CREDENTIALS")
+
+
+async def backfill_reply_counts():
+    return await CommentsRepository(FIREBASE_CREDENTIALS_PATH).backfill_reply_counts()
+
+
+async def rebuild_timelines():
+    timelines = TimelineService(FIREBASE_CREDENTIALS_PATH)
+    users = await UsersRepository(FIREBASE_CREDENTIALS_PATH).get_all_users()
+    rebuilt = [await timelines.rebuild(user["userId"]) for user in users]
+    return {"users": len(rebuilt), "entries": sum(r.get("entries", 0) for r in rebuilt)}
+
+
+async def backfill_follow_edges():
+    return await UsersRepository(FIREBASE_CREDENTIALS_PATH).backfill_follow_edges()
+
+
+async def resume_deletions():
+    reports = await PostsRepository(FIREBASE_CREDENTIALS_PATH).resume_deletions()
+    return {"posts": len(reports), "documents": sum(r["documents"] for r in reports)}
+
+
+async def check_ratings():
+    return await RatingsRepository(FIREBASE_CREDENTIALS_PATH).reconcile_aggregates(repair=False)
+
+
+async def reconcile_ratings():
+    return await RatingsRepository(FIREBASE_CREDENTIALS_PATH).reconcile_aggregates()
+
+
+COMMANDS = {
+    "backfill-reply-counts": backfill_reply_counts,
+    "rebuild-timelines": rebuild_timelines,
+    "backfill-follow-edges": backfill_follow_edges,
+    "resume-deletions": resume_deletions,
+    "check-ratings": check_ratings,
+    "reconcile-ratings": reconcile_ratings,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One-off data maintenance jobs.")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(COMMANDS[args.command]()), indent=2))
+# RUN WITH python Maintenance.py <command>, e.g. backfill-reply-counts, rebuild-timelines or reconcile-ratings
@@ -0,0 +1,20 @@
+import logging
+
+logger = logging.getLogger("Metrics")
+
+_providers = {}
+
+
+def register(name: str, provider):
+    _providers[name] = provider
+
+
+def collect():
+    snapshot = {}
+    for name, provider in _providers.items():
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.warning(f"Metrics provider '{name}' failed: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
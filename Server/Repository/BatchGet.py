@@ -0,0 +1,25 @@
+import asyncio
+from typing import Dict, Iterable
+
+# Documents per BatchGetDocuments call; larger lists are split and fetched concurrently.
+GET_ALL_LIMIT = 100
+
+
+async def get_all(db, collection, doc_ids: Iterable[str], id_field: str = None) -> Dict[str, dict]:
+    unique = list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+    if not unique:
+        return {}
+
+    def fetch(chunk):
+        refs = [collection.document(doc_id) for doc_id in chunk]
+        return [doc for doc in db.get_all(refs) if doc.exists]
+
+    chunks = [unique[i:i + GET_ALL_LIMIT] for i in range(0, len(unique), GET_ALL_LIMIT)]
+    found = {}
+    for docs in await asyncio.gather(*(asyncio.to_thread(fetch, chunk) for chunk in chunks)):
+        for doc in docs:
+            data = doc.to_dict() or {}
+            if id_field:
+                data[id_field] = doc.id
+            found[doc.id] = data
+    return found
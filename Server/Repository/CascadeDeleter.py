@@ -0,0 +1,244 @@
+from google.cloud.firestore import Increment, SERVER_TIMESTAMP, transactional
+import asyncio
+import logging
+import threading
+import time
+
+import Metrics
+from Repository.BatchGet import get_all
+from Repository.CommentsRepository import forget_comment_reads
+from Repository.DocumentCache import DocumentCache
+from Repository.RatingsRepository import _numeric, author_totals
+
+logger = logging.getLogger("CascadeDeleter")
+
+BATCH_LIMIT = 500
+IN_QUERY_LIMIT = 30
+
+
+class CascadeDeleter:
+    _totals = {"posts": 0, "documents": 0, "batches": 0, "seconds": 0.0, "max_seconds": 0.0, "resumed": 0}
+    _totals_lock = threading.Lock()
+
+    def __init__(self, db, view_counter=None, max_concurrency: int = 4, timelines: bool = False):
+        self.db = db
+        self.view_counter = view_counter
+        # Timeline entries are found with a collection group query, which needs its own index.
+        self.timelines = timelines
+        self.max_concurrency = max(1, max_concurrency)
+        self.posts_collection = db.collection("posts")
+        self.comments_collection = db.collection("comments")
+        self.ratings_collection = db.collection("ratings")
+        self.votes_collection = db.collection("votes")
+        self.users_collection = db.collection("users")
+        self.markers = db.collection("deletions")
+
+    async def _stream(self, query):
+        return await asyncio.to_thread(lambda: list(query.stream()))
+
+    async def _find_votes(self, comment_ids):
+        chunks = [comment_ids[i:i + IN_QUERY_LIMIT] for i in range(0, len(comment_ids), IN_QUERY_LIMIT)]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(chunk):
+            async with semaphore:
+                return await self._stream(self.votes_collection.where("commId", "in", chunk))
+
+        return [vote for votes in await asyncio.gather(*(fetch(chunk) for chunk in chunks)) for vote in votes]
+
+    async def _existing_users(self, user_ids):
+        return set(await get_all(self.db, self.users_collection, sorted(user_ids)))
+
+    def _comment_chunks(self, comments, authors):
+        # A comment's net score leaves its author's likes in the same batch that deletes it,
+        # so a resumed deletion never takes it away twice.
+        chunks, deletes, likes = [], [], {}
+        for comment in comments:
+            data = comment.to_dict() or {}
+            author, score = data.get("userId"), data.get("likes")
+            counted = author in authors and isinstance(score, int) and not isinstance(score, bool) and score != 0
+            if len(deletes) + len(likes) + 1 + (counted and author not in likes) > BATCH_LIMIT:
+                chunks.append(self._with_likes(deletes, likes))
+                deletes, likes = [], {}
+            deletes.append(("delete", comment.reference, None))
+            if counted:
+                likes[author] = likes.get(author, 0) + score
+        if deletes:
+            chunks.append(self._with_likes(deletes, likes))
+        return chunks
+
+    def _with_likes(self, deletes, likes):
+        updates = [("update", self.users_collection.document(author), {"likes": Increment(-score)})
+                   for author, score in likes.items() if score]
+        return deletes + updates
+
+    async def _commit(self, chunks):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        def write(chunk):
+            batch = self.db.batch()
+            for op, ref, data in chunk:
+                if op == "delete":
+                    batch.delete(ref)
+                elif op == "update":
+                    batch.update(ref, data)
+                else:
+                    batch.set(ref, data, merge=True)
+            batch.commit()
+
+        async def commit(chunk):
+            async with semaphore:
+                await asyncio.to_thread(write, chunk)
+
+        await asyncio.gather(*(commit(chunk) for chunk in chunks))
+        return len(chunks)
+
+    def _remove_post(self, post_ref, marker_ref):
+        # The post leaves its author's rating aggregates in the transaction that deletes it,
+        # so a post is taken off them exactly once however often its deletion is resumed.
+        @transactional
+        def remove(transaction):
+            post = post_ref.get(transaction=transaction)
+            data = (post.to_dict() or {}) if post.exists else {}
+            rating = _numeric(data.get("rating", 0.0))
+            author_ref = self.users_collection.document(data["userId"]) if data.get("userId") else None
+            author = author_ref.get(transaction=transaction) if author_ref and rating is not None else None
+            if author is not None and author.exists:
+                author_sum, author_count, _ = author_totals(transaction, self.posts_collection, author)
+                author_sum -= rating
+                author_count = max(author_count - 1, 0)
+                transaction.update(author_ref, {
+                    "postRating": author_sum / author_count if author_count else 0.0,
+                    "postRatingSum": author_sum if author_count else 0.0,
+                    "postRatingCount": author_count,
+                })
+            transaction.delete(post_ref)
+            transaction.delete(marker_ref)
+            return data.get("userId")
+
+        author_id = remove(self.db.transaction())
+        DocumentCache.for_collection("users").invalidate(author_id)
+
+    @staticmethod
+    def _chunk(ops):
+        return [ops[i:i + BATCH_LIMIT] for i in range(0, len(ops), BATCH_LIMIT)]
+
+    async def _find_timeline_entries(self, post_id: str):
+        if not self.timelines:
+            return []
+        return await self._stream(self.db.collection_group("entries").where("postId", "==", post_id))
+
+    def _timeline_chunks(self, entries):
+        # Each entry leaves with its timeline's entryCount, so a resumed deletion counts it once.
+        per_batch = BATCH_LIMIT // 2
+        return [
+            [op for entry in entries[i:i + per_batch] for op in (
+                ("delete", entry.reference, None),
+                ("set", entry.reference.parent.parent, {"entryCount": Increment(-1)}),
+            )]
+            for i in range(0, len(entries), per_batch)
+        ]
+
+    async def delete_post(self, post_id: str, user_id: str = None):
+        start = time.monotonic()
+        post_ref = self.posts_collection.document(post_id)
+        marker_ref = self.markers.document(post_id)
+        # The marker outlives an interrupted run, and the post itself is deleted last,
+        # so running the deletion again picks up whatever is still left.
+        marker = await asyncio.to_thread(marker_ref.get)
+        resumed = marker.exists
+        if not resumed:
+            await asyncio.to_thread(marker_ref.set, {"postId": post_id, "userId": user_id, "startedAt": SERVER_TIMESTAMP})
+
+        comments, ratings, entries = await asyncio.gather(
+            self._stream(self.comments_collection.where("postId", "==", post_id)),
+            self._stream(self.ratings_collection.where("postId", "==", post_id)),
+            self._find_timeline_entries(post_id),
+        )
+        votes = await self._find_votes([comment.id for comment in comments])
+        shards = await asyncio.to_thread(self.view_counter.shard_refs, post_ref)
+        authors = await self._existing_users({(c.to_dict() or {}).get("userId") for c in comments} - {None})
+
+        batches = await self._commit(self._chunk([("delete", vote.reference, None) for vote in votes]))
+        batches += await self._commit(
+            self._comment_chunks(comments, authors)
+            + self._chunk([("delete", ref, None) for ref in [r.reference for r in ratings] + shards])
+            + self._timeline_chunks(entries)
+        )
+        await asyncio.to_thread(self._remove_post, post_ref, marker_ref)
+        batches += 1
+        forget_comment_reads([comment.id for comment in comments], post_id)
+
+        elapsed = time.monotonic() - start
+        documents = len(votes) + len(comments) + len(ratings) + len(shards) + len(entries) + 1
+        report = {
+            "postId": post_id,
+            "votes": len(votes),
+            "comments": len(comments),
+            "ratings": len(ratings),
+            "shards": len(shards),
+            "timelineEntries": len(entries),
+            "documents": documents,
+            "batches": batches,
+            "seconds": round(elapsed, 3),
+            "docsPerSecond": round(documents / elapsed, 1) if elapsed > 0 else None,
+            "resumed": resumed,
+        }
+        self._record(report, elapsed)
+        logger.info(f"Cascade delete of post {post_id}: {documents} documents in {batches} batches, {report['docsPerSecond']} docs/s")
+        return report
+
+    async def delete_comment_thread(self, comment_id: str):
+        comment_ref = self.comments_collection.document(comment_id)
+        comment = await asyncio.to_thread(comment_ref.get)
+        if not comment.exists:
+            return {"error": "Comment not found"}
+        data = comment.to_dict() or {}
+        parent_id, post_id = data.get("parentId"), data.get("postId")
+
+        replies = await self._stream(self.comments_collection.where("parentId", "==", comment_id))
+        thread = replies + [comment]
+        votes = await self._find_votes([c.id for c in thread])
+        authors = await self._existing_users({(c.to_dict() or {}).get("userId") for c in thread} - {None})
+
+        # The comment itself goes last, together with its parent's reply count, so an
+        # interrupted deletion can be run again without touching the parent twice.
+        last = self._comment_chunks([comment], authors)
+        if parent_id and await get_all(self.db, self.comments_collection, [parent_id]):
+            last[0].append(("update", self.comments_collection.document(parent_id), {"replyCount": Increment(-1)}))
+        batches = await self._commit(self._chunk([("delete", vote.reference, None) for vote in votes]))
+        batches += await self._commit(self._comment_chunks(replies, authors))
+        batches += await self._commit(last)
+        forget_comment_reads([c.id for c in thread] + [parent_id], post_id)
+        DocumentCache.for_collection("users").invalidate(*authors)
+
+        logger.info(f"Cascade delete of comment {comment_id}: {len(replies)} replies and {len(votes)} votes in {batches} batches")
+        return {"commentId": comment_id, "replies": len(replies), "votes": len(votes), "batches": batches}
+
+    async def pending(self):
+        markers = await self._stream(self.markers)
+        return [{**(marker.to_dict() or {}), "postId": marker.id} for marker in markers]
+
+    @classmethod
+    def _record(cls, report: dict, elapsed: float):
+        with cls._totals_lock:
+            cls._totals["posts"] += 1
+            cls._totals["documents"] += report["documents"]
+            cls._totals["batches"] += report["batches"]
+            cls._totals["seconds"] += elapsed
+            cls._totals["max_seconds"] = max(cls._totals["max_seconds"], elapsed)
+            cls._totals["resumed"] += report["resumed"]
+
+    @classmethod
+    def stats(cls):
+        with cls._totals_lock:
+            seconds = cls._totals["seconds"]
+            return {
+                **cls._totals,
+                "seconds": round(seconds, 3),
+                "max_seconds": round(cls._totals["max_seconds"], 3),
+                "docs_per_second": round(cls._totals["documents"] / seconds, 1) if seconds else 0.0,
+            }
+
+
+Metrics.register("cascade_deletes", CascadeDeleter.stats)
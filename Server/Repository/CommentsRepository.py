@@ -1,14 +1,35 @@
 from FirebaseSingleton import FirebaseSingleton
 from Model import Comment
 import asyncio
+from typing import List, Optional
 from fastapi.concurrency import run_in_threadpool
-from google.cloud.firestore import Transaction
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import Increment, Transaction, transactional
+from Repository.BatchGet import get_all
+from Repository.SingleFlight import SingleFlight
+
+BATCH_LIMIT = 500
+
+
+def forget_comment_reads(comment_ids, post_id=None):
+    # After a comment write, reads of those comments, their threads and the post's comment
+    # pages start a new call. Writes that do not know the post detach every page read.
+    flights = SingleFlight.get_instance()
+    comment_ids = [comment_id for comment_id in comment_ids if comment_id]
+    if comment_ids:
+        flights.forget("comments", *comment_ids)
+        flights.forget("comment_trees", *comment_ids)
+    if post_id:
+        flights.forget("post_comments", post_id)
+    else:
+        flights.forget("post_comments")
 
 class CommentsRepository:
     def __init__(self, cred_path: str):
         self.firebase_instance = FirebaseSingleton(cred_path)
         self.db = self.firebase_instance.get_firestore_client()
         self.comments_collection = self.db.collection("comments")
+        self.flights = SingleFlight.get_instance()
 
     async def upload_comment_to_firestore(self, comment: Comment):
         comment_data = {
@@ -17,45 +38,72 @@ class CommentsRepository:
             "text": comment.text,
             "date": comment.date,
             "likes": comment.likes,
-            "parentId": comment.parentId or None
+            "parentId": comment.parentId or None,
+            "replyCount": 0
         }
         comment_ref = self.comments_collection.document()
-        await run_in_threadpool(comment_ref.set, comment_data)
+        if not comment.parentId:
+            await run_in_threadpool(comment_ref.set, comment_data)
+            forget_comment_reads([comment_ref.id], comment.postId)
+            return {"message": "Comment uploaded", "commentId": comment_ref.id}
+
+        batch = self.db.batch()
+        batch.set(comment_ref, comment_data)
+        batch.update(self.comments_collection.document(comment.parentId), {"replyCount": Increment(1)})
+        await run_in_threadpool(batch.commit)
+        forget_comment_reads([comment_ref.id, comment.parentId], comment.postId)
         return {"message": "Comment uploaded", "commentId": comment_ref.id}
 
-    async def get_post_comments_from_firestore(self, postId: str):
+    async def get_post_comments_from_firestore(self, postId: str, limit: Optional[int] = None, start_after: Optional[str] = None):
         def fetch_comments():
-            return list(
+            query = (
                 self.comments_collection
                 .where("postId", "==", postId)
                 .where("parentId", "==", None)
-                .stream()
             )
+            if limit is None:
+                return list(query.stream())
+
+            query = query.order_by("date")
+            if start_after:
+                cursor = self.comments_collection.document(start_after).get()
+                if not cursor.exists:
+                    raise ValueError("Invalid cursor")
+                query = query.start_after(cursor)
+            return list(query.limit(limit).stream())
+
+        async def load():
+            try:
+                comments = await run_in_threadpool(fetch_comments)
+            except ValueError as e:
+                return {"error": str(e)}
+
+            result = []
+            for comment in comments:
+                data = comment.to_dict()
+                data["commentId"] = comment.id
+                data["hasReplies"] = data.get("replyCount", 0) > 0
+                result.append(data)
+
+            if limit is None:
+                return result
+            next_cursor = result[-1]["commentId"] if len(result) == limit else None
+            return {"comments": result, "nextCursor": next_cursor}
+
+        return await self.flights.do(("post_comments", postId, limit, start_after), load)
 
-        comments = await run_in_threadpool(fetch_comments)
-        result = []
-
-        async def process_comment(comment):
-            data = comment.to_dict()
-            data["commentId"] = comment.id
-            replies = await run_in_threadpool(
-                lambda: list(
-                    self.comments_collection
-                    .where("parentId", "==", comment.id)
-                    .stream()
-                )
-            )
-            data["hasReplies"] = bool(replies)
-            result.append(data)
+    async def get_single_comment(self, commentId: str):
+        async def load():
+            comment = await run_in_threadpool(lambda: self.comments_collection.document(commentId).get())
+            if comment.exists:
+                return {**comment.to_dict(), "commentId": comment.id}
+            return {"error": "Comment not found"}
 
-        await asyncio.gather(*(process_comment(c) for c in comments))
-        return result
+        return await self.flights.do(("comments", commentId), load)
 
-    async def get_single_comment(self, commentId: str):
-        comment = await run_in_threadpool(lambda: self.comments_collection.document(commentId).get())
-        if comment.exists:
-            return {**comment.to_dict(), "commentId": comment.id}
-        return {"error": "Comment not found"}
+    async def get_many(self, commentIds: List[str]):
+        found = await get_all(self.db, self.comments_collection, commentIds, id_field="commentId")
+        return [found.get(cId) or {"commentId": cId, "error": "Comment not found"} for cId in commentIds]
 
     async def update_comment(self, commentId: str, updated_comment: Comment):
         updates = {
@@ -66,13 +114,57 @@ class CommentsRepository:
             }.items() if v is not None
         }
 
-        if updates:
-            await run_in_threadpool(lambda: self.comments_collection.document(commentId).update(updates))
-            return {"message": "Comment updated"}
-        return {"error": "No fields to update"}
+        if not updates:
+            return {"error": "No fields to update"}
+
+        # Moving a reply takes it off its old parent's replyCount and onto the new one's.
+        @transactional
+        def update(transaction):
+            comment_ref = self.comments_collection.document(commentId)
+            comment = comment_ref.get(transaction=transaction)
+            if not comment.exists:
+                raise LookupError("Comment not found")
+            old_parent = (comment.to_dict() or {}).get("parentId")
+            new_parent = updates.get("parentId", old_parent)
+            moves = []
+            if new_parent != old_parent:
+                if new_parent == commentId:
+                    raise LookupError("A comment cannot reply to itself")
+                new_ref = self.comments_collection.document(new_parent) if new_parent else None
+                if new_ref is not None and not new_ref.get(transaction=transaction).exists:
+                    raise LookupError("Parent comment not found")
+                old_ref = self.comments_collection.document(old_parent) if old_parent else None
+                if old_ref is not None and old_ref.get(transaction=transaction).exists:
+                    moves.append((old_ref, -1))
+                if new_ref is not None:
+                    moves.append((new_ref, 1))
+            transaction.update(comment_ref, updates)
+            for ref, step in moves:
+                transaction.update(ref, {"replyCount": Increment(step)})
+            return old_parent
+
+        try:
+            old_parent = await run_in_threadpool(update, self.db.transaction())
+        except LookupError as e:
+            return {"error": str(e)}
+        forget_comment_reads([commentId, old_parent, updates.get("parentId")])
+        return {"message": "Comment updated"}
 
-    async def delete_comment(self, commentId: str):
-        await run_in_threadpool(lambda: self.comments_collection.document(commentId).delete())
+    async def delete_comment(self, commentId: str, parentId: Optional[str] = None):
+        comment_ref = self.comments_collection.document(commentId)
+        if not parentId:
+            await run_in_threadpool(comment_ref.delete)
+            forget_comment_reads([commentId])
+            return {"message": "Comment deleted"}
+
+        batch = self.db.batch()
+        batch.delete(comment_ref)
+        batch.update(self.comments_collection.document(parentId), {"replyCount": Increment(-1)})
+        try:
+            await run_in_threadpool(batch.commit)
+        except NotFound:
+            await run_in_threadpool(comment_ref.delete)
+        forget_comment_reads([commentId, parentId])
         return {"message": "Comment deleted"}
 
     async def delete_comments_and_replies(self, commentId: str):
@@ -84,8 +176,9 @@ class CommentsRepository:
         replies = await run_in_threadpool(
             lambda: list(self.comments_collection.where("parentId", "==", commentId).stream())
         )
-        await run_in_threadpool(comment_ref.delete)
+        await self.delete_comment(commentId, comment.to_dict().get("parentId"))
         await asyncio.gather(*[run_in_threadpool(r.reference.delete) for r in replies])
+        forget_comment_reads([r.id for r in replies], comment.to_dict().get("postId"))
         return {"message": "Comment and all replies deleted successfully"}
 
     async def delete_post_and_comments(self, postId: str):
@@ -93,6 +186,7 @@ class CommentsRepository:
             lambda: list(self.comments_collection.where("postId", "==", postId).stream())
         )
         await asyncio.gather(*[run_in_threadpool(c.reference.delete) for c in comments])
+        forget_comment_reads([c.id for c in comments], postId)
         return {"message": f"Post {postId} and all comments deleted"}
 
     async def get_user_comments(self, userId: str):
@@ -102,19 +196,22 @@ class CommentsRepository:
         return [{**c.to_dict(), "commentId": c.id} for c in comments]
 
     async def get_comment_tree(self, postId: str, commentId: str):
-        main_comment_ref = self.comments_collection.document(commentId)
-        main_comment = await run_in_threadpool(main_comment_ref.get)
-        if not main_comment.exists:
-            return {"error": "Main comment not found"}
+        async def load():
+            main_comment_ref = self.comments_collection.document(commentId)
+            main_comment = await run_in_threadpool(main_comment_ref.get)
+            if not main_comment.exists:
+                return {"error": "Main comment not found"}
 
-        replies = await run_in_threadpool(
-            lambda: list(self.comments_collection.where("parentId", "==", commentId).where("postId", "==", postId).stream())
-        )
+            replies = await run_in_threadpool(
+                lambda: list(self.comments_collection.where("parentId", "==", commentId).where("postId", "==", postId).stream())
+            )
 
-        return {
-            "mainComment": {**main_comment.to_dict(), "commentId": main_comment.id},
-            "replies": [{**r.to_dict(), "commentId": r.id} for r in replies]
-        }
+            return {
+                "mainComment": {**main_comment.to_dict(), "commentId": main_comment.id},
+                "replies": [{**r.to_dict(), "commentId": r.id} for r in replies]
+            }
+
+        return await self.flights.do(("comment_trees", commentId, postId), load)
 
     async def get_comment_votes(self, commentId: str):
         comment = await run_in_threadpool(lambda: self.comments_collection.document(commentId).get())
@@ -122,19 +219,32 @@ class CommentsRepository:
             return {"error": "Comment not found"}
         return {"commentId": commentId, "likes": comment.to_dict().get("likes", 0)}
 
-    async def update_comment_votes(self, commentId: str, vote: bool):
-        def update_votes():
-            ref = self.comments_collection.document(commentId)
-            snapshot = ref.get()
-            if not snapshot.exists:
-                raise ValueError("Comment not found")
-            current_likes = snapshot.to_dict().get("likes", 0)
-            new_likes = current_likes + (1 if vote else -1)
-            ref.update({"likes": new_likes})
-            return new_likes
-
-        try:
-            new_likes = await run_in_threadpool(update_votes)
-            return {"message": "Comment votes updated", "likes": new_likes}
-        except ValueError as e:
-            return {"error": str(e)}
+    async def backfill_reply_counts(self):
+        def backfill():
+            comments = list(self.comments_collection.select(["parentId", "replyCount"]).stream())
+            counts = {}
+            for comment in comments:
+                parent_id = comment.to_dict().get("parentId")
+                if parent_id:
+                    counts[parent_id] = counts.get(parent_id, 0) + 1
+
+            updated = 0
+            batch, pending = self.db.batch(), 0
+            for comment in comments:
+                expected = counts.get(comment.id, 0)
+                if comment.to_dict().get("replyCount") == expected:
+                    continue
+                batch.update(comment.reference, {"replyCount": expected})
+                updated += 1
+                pending += 1
+                if pending == BATCH_LIMIT:
+                    batch.commit()
+                    batch, pending = self.db.batch(), 0
+            if pending:
+                batch.commit()
+            return {"scanned": len(comments), "updated": updated}
+
+        result = await run_in_threadpool(backfill)
+        for namespace in ("comments", "comment_trees", "post_comments"):
+            self.flights.forget(namespace)
+        return result
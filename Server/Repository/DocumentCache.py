@@ -0,0 +1,169 @@
+import contextvars
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import Metrics
+from Repository.SingleFlight import SingleFlight
+
+# Documents read while handling one request, keyed by (collection, id), so a
+# service that validates a document and then fetches it again reads it once.
+_request_documents = contextvars.ContextVar("request_documents", default=None)
+
+
+@contextmanager
+def request_scope():
+    token = _request_documents.set({})
+    try:
+        yield
+    finally:
+        _request_documents.reset(token)
+
+
+class DocumentCache:
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, collection: str, max_entries: int = 2048, ttl: float = 5.0):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._counters = {"request_hits": 0, "hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @classmethod
+    def for_collection(cls, collection: str) -> "DocumentCache":
+        if collection not in cls._caches:
+            with cls._caches_lock:
+                if collection not in cls._caches:
+                    cls._caches[collection] = cls(
+                        collection,
+                        max_entries=int(os.getenv("DOCUMENT_CACHE_SIZE", "2048")),
+                        ttl=float(os.getenv("DOCUMENT_CACHE_TTL", "5")),
+                    )
+        return cls._caches[collection]
+
+    @classmethod
+    def clear_all(cls):
+        for cache in list(cls._caches.values()):
+            cache.clear()
+
+    async def get(self, doc_id: str, load):
+        key = (self.collection, doc_id)
+        scope = _request_documents.get()
+        if scope is not None and key in scope:
+            with self._lock:
+                self._counters["request_hits"] += 1
+            return copy.deepcopy(scope[key])
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(doc_id)
+                self._counters["hits"] += 1
+                data = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[doc_id]
+                self._counters["misses"] += 1
+                data = None
+            generation = self._generation
+
+        if data is None:
+            data = await SingleFlight.get_instance().do((self.collection, doc_id), load)
+            if data is None:
+                return None
+            self._remember(doc_id, copy.deepcopy(data), generation)
+
+        if scope is not None:
+            scope[key] = copy.deepcopy(data)
+        return copy.deepcopy(data)
+
+    async def get_many(self, doc_ids, load_many):
+        scope = _request_documents.get()
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for doc_id in dict.fromkeys(doc_ids):
+                key = (self.collection, doc_id)
+                if scope is not None and key in scope:
+                    self._counters["request_hits"] += 1
+                    found[doc_id] = scope[key]
+                    continue
+                entry = self._entries.get(doc_id)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(doc_id)
+                    self._counters["hits"] += 1
+                    found[doc_id] = entry[1]
+                    continue
+                if entry is not None:
+                    del self._entries[doc_id]
+                self._counters["misses"] += 1
+                missing.append(doc_id)
+            generation = self._generation
+
+        if missing:
+            loaded = await load_many(missing)
+            for doc_id, data in loaded.items():
+                self._remember(doc_id, copy.deepcopy(data), generation)
+            found.update(loaded)
+
+        if scope is not None:
+            for doc_id, data in found.items():
+                scope[(self.collection, doc_id)] = copy.deepcopy(data)
+        return {doc_id: copy.deepcopy(data) for doc_id, data in found.items()}
+
+    def _remember(self, doc_id: str, data: dict, generation: int):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            # A write that landed while the document was being read makes the read stale.
+            if generation != self._generation:
+                return
+            self._entries[doc_id] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(doc_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, *doc_ids):
+        scope = _request_documents.get()
+        if doc_ids:
+            SingleFlight.get_instance().forget(self.collection, *doc_ids)
+        with self._lock:
+            self._generation += 1
+            for doc_id in doc_ids:
+                if doc_id is None:
+                    continue
+                self._entries.pop(doc_id, None)
+                if scope is not None:
+                    scope.pop((self.collection, doc_id), None)
+                self._counters["invalidations"] += 1
+
+    def clear(self):
+        SingleFlight.get_instance().forget(self.collection)
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            saved = self._counters["request_hits"] + self._counters["hits"]
+            lookups = saved + self._counters["misses"]
+            return {
+                **self._counters,
+                "reads_saved": saved,
+                "hit_rate": round(saved / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+            }
+
+
+Metrics.register("document_cache", lambda: {name: cache.stats() for name, cache in DocumentCache._caches.items()})
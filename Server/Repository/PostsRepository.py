@@ -1,14 +1,44 @@
 from FirebaseSingleton import FirebaseSingleton
 from Model.Post import Post
 from google.cloud.firestore import SERVER_TIMESTAMP
-from google.api_core.exceptions import InvalidArgument
+from google.cloud.firestore_v1.field_path import FieldPath
+from google.api_core.exceptions import InvalidArgument, NotFound
+from Repository.BatchGet import get_all
+from Repository.CascadeDeleter import CascadeDeleter
+from Repository.DocumentCache import DocumentCache
+from Repository.ShardedCounter import ShardedCounter
+from datetime import datetime
+from typing import Dict, List, Optional
 import asyncio
+import heapq
+import itertools
 import logging
+import os
+import threading
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PostsREPO")
 
+IN_QUERY_LIMIT = 30
+BATCH_LIMIT = 500
+# Fields a feed card needs; rating and date are also what the page cursor is built from.
+FEED_CARD_FIELDS = ["userId", "caption", "url", "rating", "date", "views"]
+
+
+def post_date_key(date):
+    # Legacy posts store the date as a string, newer ones a server timestamp; Firestore
+    # orders every timestamp before every string, so the key ranks the type first.
+    if isinstance(date, datetime):
+        return (1, date.timestamp())
+    if isinstance(date, str):
+        return (2, date)
+    return (0, 0)
+
 class PostsRepository:
+    _first_pages = {}
+    _first_pages_lock = threading.Lock()
+
     def __init__(self, cred_path: str):
         self.firebase_instance = FirebaseSingleton(cred_path)
         self.db = self.firebase_instance.get_firestore_client()
@@ -16,6 +46,22 @@ class PostsRepository:
         self.users_collection = self.db.collection("users")
         self.ratings_collection = self.db.collection("ratings")
         self.comments_collection = self.db.collection("comments")
+        self.cache = DocumentCache.for_collection("posts")
+        self.users_cache = DocumentCache.for_collection("users")
+        # VIEW_COUNTER_SHARDS > 0 spreads view increments over that many shard
+        # documents for posts that outgrow one write per second.
+        self.view_counter = ShardedCounter(
+            "views",
+            int(os.getenv("VIEW_COUNTER_SHARDS", "0")),
+            float(os.getenv("COUNTER_CACHE_TTL", "5")),
+        )
+        self.first_page_ttl = float(os.getenv("POSTS_FIRST_PAGE_TTL", "10"))
+        self.cascade = CascadeDeleter(
+            self.db,
+            self.view_counter,
+            int(os.getenv("CASCADE_CONCURRENCY", "4")),
+            timelines=os.getenv("FEED_MODE", "query").strip().lower() == "timeline",
+        )
 
     async def _fetch_document(self, collection, doc_id: str):
         doc_ref = collection.document(doc_id)
@@ -28,6 +74,8 @@ class PostsRepository:
             "caption": post.caption,
             "date": post.date or SERVER_TIMESTAMP,
             "rating": post.rating,
+            "ratingSum": 0.0,
+            "ratingCount": 0,
             "url": post.url,
             "views": post.views,
             "hashtags": post.hashtags,
@@ -35,6 +83,8 @@ class PostsRepository:
 
         post_ref = self.posts_collection.document(str(post.id))
         await asyncio.to_thread(post_ref.set, post_data)
+        self.cache.invalidate(str(post.id))
+        self._forget_first_pages()
 
         return {"message": "Post uploaded", "postId": post.id, "url": post.url}
 
@@ -57,6 +107,37 @@ class PostsRepository:
                 "error": "Firestore index is missing. Please create the required composite index."
             }
      
+    async def get_user_post_ids(self, user_id: str, limit: int):
+        query = self.posts_collection.where("userId", "==", user_id).select([]).limit(limit)
+        posts = await asyncio.to_thread(lambda: list(query.stream()))
+        return [post.id for post in posts]
+
+    async def get_posts_by_authors(self, author_ids: List[str], limit: int, start_after: Optional[str] = None):
+        if not author_ids or limit <= 0:
+            return []
+
+        cursor = None
+        if start_after:
+            cursor = await self._fetch_document(self.posts_collection, start_after)
+            if not cursor.exists:
+                return {"error": "Invalid cursor"}
+
+        def fetch_chunk(chunk):
+            query = self.posts_collection \
+                .where("userId", "in", chunk) \
+                .order_by("date", direction="DESCENDING") \
+                .order_by(FieldPath.document_id(), direction="DESCENDING")
+            if cursor is not None:
+                query = query.start_after(cursor)
+            return [{**p.to_dict(), "postId": p.id} for p in query.limit(limit).stream()]
+
+        chunks = [author_ids[i:i + IN_QUERY_LIMIT] for i in range(0, len(author_ids), IN_QUERY_LIMIT)]
+        streams = await asyncio.gather(*(asyncio.to_thread(fetch_chunk, chunk) for chunk in chunks))
+
+        # Each chunk is already newest-first, so a k-way merge yields the page in order.
+        merged = heapq.merge(*streams, key=lambda p: (post_date_key(p.get("date")), p["postId"]), reverse=True)
+        return list(itertools.islice(merged, limit))
+
     async def get_all_posts_from_firestore(self):
         try:
             posts_query = self.posts_collection \
@@ -71,23 +152,78 @@ class PostsRepository:
             logger.error(f"Firestore query failed: {e}")
             return {"error": "Firestore index is missing. Please create the required composite index."}
 
-    async def get_single_post(self, postId: str):
+    def _ranked_posts(self):
+        return self.posts_collection \
+            .order_by("rating", direction="DESCENDING") \
+            .order_by("date", direction="DESCENDING") \
+            .order_by(FieldPath.document_id(), direction="DESCENDING")
+
+    async def get_posts_page(self, limit: int, after: Optional[dict] = None, card: bool = False):
+        key = (limit, card)
+        if after is None and self.first_page_ttl > 0:
+            with self._first_pages_lock:
+                cached = self._first_pages.get(key)
+            if cached and cached[0] > time.monotonic():
+                return [dict(p) for p in cached[1]]
+
+        def fetch():
+            query = self._ranked_posts()
+            if card:
+                query = query.select(FEED_CARD_FIELDS)
+            if after is not None:
+                query = query.start_after({"rating": after["rating"], "date": after["date"], "__name__": after["postId"]})
+            return [{**p.to_dict(), "postId": p.id} for p in query.limit(limit).stream()]
+
+        try:
+            posts = await asyncio.to_thread(fetch)
+        except InvalidArgument as e:
+            logger.error(f"Firestore query failed: {e}")
+            return {"error": "Firestore index is missing. Please create the required composite index."}
+
+        if after is None and self.first_page_ttl > 0:
+            with self._first_pages_lock:
+                self._first_pages[key] = (time.monotonic() + self.first_page_ttl, [dict(p) for p in posts])
+        return posts
+
+    @classmethod
+    def _forget_first_pages(cls):
+        with cls._first_pages_lock:
+            cls._first_pages.clear()
+
+    async def _load_post(self, postId: str):
         post = await self._fetch_document(self.posts_collection, postId)
-        if post.exists:
-            data = post.to_dict()
-            data["postId"] = post.id
-            return data
-        return {"error": "Post not found"}
+        if not post.exists:
+            return None
+        data = post.to_dict()
+        data["postId"] = post.id
+        return data
+
+    async def get_single_post(self, postId: str):
+        data = await self.cache.get(postId, lambda: self._load_post(postId))
+        if data is None:
+            return {"error": "Post not found"}
+        return data
+
+    async def get_many(self, postIds: List[str]):
+        found = await self.cache.get_many(
+            [pId for pId in postIds if pId], lambda missing: get_all(self.db, self.posts_collection, missing, id_field="postId")
+        )
+        return [found.get(pId) or {"postId": pId, "error": "Post not found"} for pId in postIds]
 
     async def get_user_by_post(self, postId: str):
-        post = await self._fetch_document(self.posts_collection, postId)
-        if post.exists:
-            user_id = post.to_dict().get("userId")
+        post = await self.get_single_post(postId)
+        if "error" in post:
+            return post
+
+        async def load_user():
             user = await self._fetch_document(self.users_collection, user_id)
-            if user.exists:
-                return user.id
+            return {**user.to_dict(), "userId": user.id} if user.exists else None
+
+        user_id = post.get("userId")
+        user = await self.users_cache.get(user_id, load_user) if user_id else None
+        if user is None:
             return {"error": "User not found"}
-        return {"error": "Post not found"}
+        return user["userId"]
 
     async def update_post(self, user_id: str, postId: str, post: Post):
         existing = await self._fetch_document(self.posts_collection, postId)
@@ -104,23 +240,73 @@ class PostsRepository:
         if updates:
             post_ref = self.posts_collection.document(postId)
             await asyncio.to_thread(post_ref.update, updates)
+            self.cache.invalidate(postId)
+            self._forget_first_pages()
             return {"message": "Post updated"}
         return {"error": "No fields to update"}
 
-    async def update_post_views(self, postId: str):
+    async def update_post_views(self, postId: str, amount: int = 1):
         post_ref = self.posts_collection.document(postId)
-        existing = await asyncio.to_thread(post_ref.get)
-
-        if not existing.exists:
+        # Shard writes merge into a subcollection and would succeed for a post that does not exist.
+        if self.view_counter.enabled and not await get_all(self.db, self.posts_collection, [postId]):
             return {"error": "Post not found"}
-        views = existing.to_dict().get("views", 0)
-        if not isinstance(views, int):
-            return {"error": "Invalid views data"}
-
-        views += 1
-        await asyncio.to_thread(post_ref.update, {"views": views})
+        try:
+            await asyncio.to_thread(self.view_counter.increment, post_ref, amount)
+        except NotFound:
+            return {"error": "Post not found"}
+        if not self.view_counter.enabled:
+            self.cache.invalidate(postId)
         return {"message": "Views updated"}
 
+    async def add_post_views(self, counts: Dict[str, int]):
+        missing, written = [], []
+        if self.view_counter.enabled:
+            found = await get_all(self.db, self.posts_collection, list(counts))
+            missing = [post_id for post_id in counts if post_id not in found]
+        pending = {post_id: amount for post_id, amount in counts.items() if post_id not in missing}
+
+        def write():
+            items = list(pending.items())
+            for i in range(0, len(items), BATCH_LIMIT):
+                chunk = items[i:i + BATCH_LIMIT]
+                batch = self.db.batch()
+                for post_id, amount in chunk:
+                    self.view_counter.increment(self.posts_collection.document(post_id), amount, batch=batch)
+                try:
+                    batch.commit()
+                    written.extend(post_id for post_id, _ in chunk)
+                except NotFound:
+                    # A single deleted post fails the whole batch, so retry that chunk post by post.
+                    for post_id, amount in chunk:
+                        try:
+                            self.view_counter.increment(self.posts_collection.document(post_id), amount)
+                            written.append(post_id)
+                        except NotFound:
+                            missing.append(post_id)
+                        del pending[post_id]
+                    continue
+                for post_id, _ in chunk:
+                    del pending[post_id]
+
+        # Whatever is still pending was not committed, so the caller can retry exactly that.
+        result = {"written": written, "missing": missing, "pending": pending}
+        try:
+            await asyncio.to_thread(write)
+        except Exception as e:
+            logger.warning(f"View counts for {len(pending)} posts were not written: {e}")
+            result["error"] = str(e)
+        if not self.view_counter.enabled:
+            self.cache.invalidate(*written)
+        return result
+
+    async def get_post_views(self, postId: str):
+        post_ref = self.posts_collection.document(postId)
+        post = await asyncio.to_thread(post_ref.get)
+        if not post.exists:
+            return {"error": "Post not found"}
+        views = await asyncio.to_thread(self.view_counter.total, post_ref, post.to_dict().get("views", 0))
+        return {"postId": postId, "views": views}
+
     async def update_post_rating(self, postId: str, rating: float):
         post_ref = self.posts_collection.document(postId)
         existing = await asyncio.to_thread(post_ref.get)
@@ -129,6 +315,7 @@ class PostsRepository:
             return {"error": "Post not found"}
 
         await asyncio.to_thread(post_ref.update, {"rating": rating})
+        self.cache.invalidate(postId)
         return {"message": "Rating updated"}
 
     async def delete_post(self, user_id: str, post_id: str):
@@ -140,50 +327,36 @@ class PostsRepository:
         if post.to_dict().get("userId") != user_id:
             return {"error": "Unauthorized to delete this post"}
 
-        batch = self.db.batch()
-        ratings_ref = self.ratings_collection.where("postId", "==", post_id)
-        comments_ref = self.comments_collection.where("postId", "==", post_id)
-
-        ratings = await asyncio.to_thread(lambda: list(ratings_ref.stream()))
-        comments = await asyncio.to_thread(lambda: list(comments_ref.stream()))
-
-        for rating in ratings:
-            batch.delete(rating.reference)
-        for comment in comments:
-            batch.delete(comment.reference)
+        report = await self.cascade.delete_post(post_id, user_id)
+        self.cache.invalidate(post_id)
+        self._forget_first_pages()
 
-        batch.delete(post_ref)
-        await asyncio.to_thread(batch.commit)
-
-        return {"message": "Post and related data deleted"}
+        return {"message": "Post and related data deleted", "cascade": report}
 
     async def delete_all_posts_of_user(self, user_id: str):
         logger.info(f"Deleting all posts for user: {user_id}")
         
         posts_ref = self.posts_collection.where("userId", "==", user_id)
         posts = await asyncio.to_thread(lambda: list(posts_ref.stream()))
-        
-        batch = self.db.batch()
-        
-        for post in posts:
-            post_ref = post.reference
-            ratings_ref = self.ratings_collection.where("postId", "==", post_ref.id)
-            comments_ref = self.comments_collection.where("postId", "==", post_ref.id)
-            
-            ratings = await asyncio.to_thread(lambda: list(ratings_ref.stream()))
-            comments = await asyncio.to_thread(lambda: list(comments_ref.stream()))
 
-            for rating in ratings:
-                batch.delete(rating.reference)
-            for comment in comments:
-                batch.delete(comment.reference)
+        # Each post's cascade already commits its batches in parallel, so posts go one at a time.
+        for post in posts:
+            await self.cascade.delete_post(post.id, user_id)
 
-            batch.delete(post_ref)
-        
-        await asyncio.to_thread(batch.commit)
+        self.cache.invalidate(*(post.id for post in posts))
+        self._forget_first_pages()
         logger.info(f"Deleted all posts for user: {user_id}")
         return {"message": f"All posts deleted for user ID: {user_id}"}
 
+    async def resume_deletions(self):
+        reports = []
+        for marker in await self.cascade.pending():
+            reports.append(await self.cascade.delete_post(marker["postId"], marker.get("userId")))
+            self.cache.invalidate(marker["postId"])
+        if reports:
+            self._forget_first_pages()
+        return reports
+
     async def get_user_average_rating(self, user_id: str):
         try:
             posts_ref = self.posts_collection.where("userId", "==", user_id)
@@ -1,16 +1,40 @@
 import asyncio
+from collections import defaultdict
 from FirebaseSingleton import FirebaseSingleton
 from fastapi.concurrency import run_in_threadpool
+from google.cloud.firestore import transactional
+from Repository.DocumentCache import DocumentCache
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("RatingsRepository")
 
+BATCH_LIMIT = 500
+DRIFT_TOLERANCE = 1e-6
+
+
+def _numeric(value, default=None):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else default
+
+
+def author_totals(transaction, posts_collection, author_doc):
+    data = author_doc.to_dict() or {}
+    if isinstance(data.get("postRatingCount"), int):
+        return float(data.get("postRatingSum", 0.0)), data["postRatingCount"], False
+    query = posts_collection.where("userId", "==", author_doc.id)
+    ratings = [_numeric(p.to_dict().get("rating", 0.0)) for p in transaction.get(query)]
+    ratings = [r for r in ratings if r is not None]
+    return float(sum(ratings)), len(ratings), True
+
 class RatingsRepository:
     def __init__(self, cred_path: str):
         self.firebase_instance = FirebaseSingleton(cred_path)
         self.db = self.firebase_instance.get_firestore_client()
         self.collection_name = "ratings"
+        self.posts_collection = self.db.collection("posts")
+        self.users_collection = self.db.collection("users")
+        self.posts_cache = DocumentCache.for_collection("posts")
+        self.users_cache = DocumentCache.for_collection("users")
 
     async def _get_rating_document(self, pId: str, uId: str):
         doc_id = f"{pId}_{uId}"
@@ -123,3 +147,205 @@ class RatingsRepository:
         except Exception as e:
             logger.error(f"Error retrieving rating for post {pId} and user {uId}: {e}")
             return {"error": "Failed to retrieve rating"}
+
+    def _post_totals(self, transaction, post_doc):
+        data = post_doc.to_dict() or {}
+        if isinstance(data.get("ratingCount"), int):
+            return float(data.get("ratingSum", 0.0)), data["ratingCount"]
+        # Posts written before the aggregates existed are summed once from their ratings.
+        query = self.db.collection(self.collection_name).where("postId", "==", post_doc.id)
+        ratings = [_numeric(r.to_dict().get("rating")) for r in transaction.get(query)]
+        ratings = [r for r in ratings if r is not None]
+        return float(sum(ratings)), len(ratings)
+
+    def _author_totals(self, transaction, author_doc):
+        return author_totals(transaction, self.posts_collection, author_doc)
+
+    def _update_aggregates(self, transaction, pId: str, change):
+        post_ref = self.posts_collection.document(pId)
+        post_doc = post_ref.get(transaction=transaction)
+        if not post_doc.exists:
+            raise LookupError(f"Post {pId} not found")
+        post_data = post_doc.to_dict() or {}
+        post_sum, post_count = self._post_totals(transaction, post_doc)
+
+        author_ref = self.users_collection.document(post_data["userId"]) if post_data.get("userId") else None
+        author_doc = author_ref.get(transaction=transaction) if author_ref else None
+        author_totals = self._author_totals(transaction, author_doc) if author_doc and author_doc.exists else None
+
+        post_sum, post_count = change(post_sum, post_count)
+        post_count = max(post_count, 0)
+        new_rating = post_sum / post_count if post_count else 0.0
+        transaction.update(post_ref, {
+            "rating": new_rating,
+            "ratingSum": post_sum if post_count else 0.0,
+            "ratingCount": post_count,
+        })
+        result = {"rating": new_rating, "authorId": post_data.get("userId")}
+
+        if author_totals:
+            author_sum, author_count, _ = author_totals
+            author_sum += new_rating - _numeric(post_data.get("rating", 0.0), 0.0)
+            result["userRating"] = author_sum / author_count if author_count else 0.0
+            transaction.update(author_ref, {
+                "postRating": result["userRating"],
+                "postRatingSum": author_sum,
+                "postRatingCount": author_count,
+            })
+        return result
+
+    def _invalidate(self, pId: str, result: dict):
+        # authorId only tells us which cached user to drop; it is not part of the response.
+        self.posts_cache.invalidate(pId)
+        self.users_cache.invalidate(result.pop("authorId", None))
+        return result
+
+    async def apply_rating(self, pId: str, uId: str, rating: float):
+        if not (1 <= rating <= 5):
+            return {"error": "Rating must be between 1 and 5"}
+
+        @transactional
+        def update(transaction):
+            rating_ref = self.db.collection(self.collection_name).document(f"{pId}_{uId}")
+            rating_doc = rating_ref.get(transaction=transaction)
+            old_rating = _numeric(rating_doc.to_dict().get("rating")) if rating_doc.exists else None
+            delta = rating - (old_rating or 0.0)
+            added = 0 if old_rating is not None else 1
+            totals = self._update_aggregates(transaction, pId, lambda s, c: (s + delta, c + added))
+            transaction.set(rating_ref, {"userId": uId, "postId": pId, "rating": rating})
+            if rating_doc.exists:
+                return {"message": "Rating updated", "oldRating": old_rating, "isNew": False, **totals}
+            return {"message": "Rating created", "isNew": True, **totals}
+
+        try:
+            return self._invalidate(pId, await run_in_threadpool(update, self.db.transaction()))
+        except LookupError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Error applying rating for post {pId} by user {uId}: {e}")
+            return {"error": "Failed to upload or update rating"}
+
+    async def retract_rating(self, pId: str, uId: str):
+        @transactional
+        def update(transaction):
+            rating_ref = self.db.collection(self.collection_name).document(f"{pId}_{uId}")
+            rating_doc = rating_ref.get(transaction=transaction)
+            if not rating_doc.exists:
+                return {"error": "Rating not found"}
+            old_rating = _numeric(rating_doc.to_dict().get("rating"))
+            removed = 1 if old_rating is not None else 0
+            totals = self._update_aggregates(transaction, pId, lambda s, c: (s - (old_rating or 0.0), c - removed))
+            transaction.delete(rating_ref)
+            return {"message": "Rating deleted", "oldRating": old_rating, **totals}
+
+        try:
+            return self._invalidate(pId, await run_in_threadpool(update, self.db.transaction()))
+        except LookupError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Error retracting rating for post {pId} by user {uId}: {e}")
+            return {"error": "Failed to delete rating"}
+
+    async def reset_post_aggregates(self, pId: str):
+        @transactional
+        def update(transaction):
+            return self._update_aggregates(transaction, pId, lambda s, c: (0.0, 0))
+
+        try:
+            return self._invalidate(pId, await run_in_threadpool(update, self.db.transaction()))
+        except LookupError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Error resetting rating aggregates for post {pId}: {e}")
+            return {"error": "Failed to reset rating aggregates"}
+
+    async def adjust_author_aggregates(self, uId: str, rating_delta: float, count_delta: int):
+        @transactional
+        def update(transaction):
+            author_ref = self.users_collection.document(uId)
+            author_doc = author_ref.get(transaction=transaction)
+            if not author_doc.exists:
+                return {"error": "User not found"}
+            author_sum, author_count, scanned = self._author_totals(transaction, author_doc)
+            # A fresh scan already reflects the post that was just written or deleted.
+            if not scanned:
+                author_sum += rating_delta
+                author_count = max(author_count + count_delta, 0)
+            user_rating = author_sum / author_count if author_count else 0.0
+            transaction.update(author_ref, {
+                "postRating": user_rating,
+                "postRatingSum": author_sum if author_count else 0.0,
+                "postRatingCount": author_count,
+            })
+            return {"userRating": user_rating}
+
+        try:
+            result = await run_in_threadpool(update, self.db.transaction())
+            self.users_cache.invalidate(uId)
+            return result
+        except Exception as e:
+            logger.error(f"Error adjusting rating aggregates for user {uId}: {e}")
+            return {"error": "Failed to adjust user rating"}
+
+    async def reconcile_aggregates(self, repair: bool = True):
+        def drifted(data, expected):
+            for field, value in expected.items():
+                current = data.get(field)
+                if _numeric(current) is None or abs(current - value) > DRIFT_TOLERANCE:
+                    return True
+            return False
+
+        def reconcile():
+            post_totals = defaultdict(lambda: [0.0, 0])
+            for r in self.db.collection(self.collection_name).stream():
+                data = r.to_dict()
+                rating = _numeric(data.get("rating"))
+                if rating is not None and data.get("postId"):
+                    post_totals[data["postId"]][0] += rating
+                    post_totals[data["postId"]][1] += 1
+
+            updates = []
+            report = {"postsChecked": 0, "postsRepaired": 0, "usersChecked": 0, "usersRepaired": 0}
+            author_totals = defaultdict(lambda: [0.0, 0])
+            for post in self.posts_collection.stream():
+                data = post.to_dict()
+                rating_sum, rating_count = post_totals.get(post.id, (0.0, 0))
+                # Unrated posts keep the rating they were created with.
+                rating = rating_sum / rating_count if rating_count else _numeric(data.get("rating", 0.0))
+                expected = {"ratingSum": rating_sum, "ratingCount": rating_count}
+                if rating_count:
+                    expected["rating"] = rating
+                report["postsChecked"] += 1
+                if drifted(data, expected):
+                    report["postsRepaired"] += 1
+                    updates.append((post.reference, expected))
+                if rating is not None and data.get("userId"):
+                    author_totals[data["userId"]][0] += rating
+                    author_totals[data["userId"]][1] += 1
+
+            for user in self.users_collection.stream():
+                rating_sum, rating_count = author_totals.get(user.id, (0.0, 0))
+                expected = {
+                    "postRating": rating_sum / rating_count if rating_count else 0.0,
+                    "postRatingSum": rating_sum,
+                    "postRatingCount": rating_count,
+                }
+                report["usersChecked"] += 1
+                if drifted(user.to_dict(), expected):
+                    report["usersRepaired"] += 1
+                    updates.append((user.reference, expected))
+
+            if repair:
+                for i in range(0, len(updates), BATCH_LIMIT):
+                    batch = self.db.batch()
+                    for ref, fields in updates[i:i + BATCH_LIMIT]:
+                        batch.update(ref, fields)
+                    batch.commit()
+            return report
+
+        report = await run_in_threadpool(reconcile)
+        if repair and (report["postsRepaired"] or report["usersRepaired"]):
+            self.posts_cache.clear()
+            self.users_cache.clear()
+        logger.info(f"Rating aggregate reconciliation: {report}")
+        return report
@@ -0,0 +1,65 @@
+from google.cloud.firestore import Increment
+import random
+import threading
+import time
+
+MAX_CACHED_TOTALS = 10000
+
+
+class ShardedCounter:
+    def __init__(self, field: str, num_shards: int = 0, cache_ttl: float = 5.0):
+        self.field = field
+        self.num_shards = num_shards
+        self.cache_ttl = cache_ttl
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.num_shards > 0
+
+    def _shards(self, doc_ref):
+        return doc_ref.collection(f"{self.field}Shards")
+
+    # The counted document keeps its own field as the base value, so enabling
+    # shards later does not lose what was counted before.
+    def increment(self, doc_ref, amount: int = 1, batch=None):
+        if not self.enabled:
+            if batch is not None:
+                batch.update(doc_ref, {self.field: Increment(amount)})
+            else:
+                doc_ref.update({self.field: Increment(amount)})
+            return
+        shard_ref = self._shards(doc_ref).document(str(random.randrange(self.num_shards)))
+        if batch is not None:
+            batch.set(shard_ref, {"count": Increment(amount)}, merge=True)
+        else:
+            shard_ref.set({"count": Increment(amount)}, merge=True)
+
+    def shard_total(self, doc_ref) -> int:
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            cached = self._totals.get(doc_ref.path)
+            if cached and cached[1] > now:
+                return cached[0]
+
+        total = sum((shard.to_dict() or {}).get("count", 0) for shard in self._shards(doc_ref).stream())
+        with self._lock:
+            if len(self._totals) >= MAX_CACHED_TOTALS:
+                self._totals = {path: entry for path, entry in self._totals.items() if entry[1] > now}
+                if len(self._totals) >= MAX_CACHED_TOTALS:
+                    self._totals.clear()
+            self._totals[doc_ref.path] = (total, now + self.cache_ttl)
+        return total
+
+    def total(self, doc_ref, base: int = 0) -> int:
+        return (base if isinstance(base, int) else 0) + self.shard_total(doc_ref)
+
+    def shard_refs(self, doc_ref):
+        with self._lock:
+            self._totals.pop(doc_ref.path, None)
+        if not self.enabled:
+            return []
+        return list(self._shards(doc_ref).list_documents())
@@ -0,0 +1,82 @@
+import asyncio
+import copy
+import os
+import threading
+
+import Metrics
+
+
+class SingleFlight:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "leaders": 0, "coalesced": 0, "forgotten": 0}
+        self._coalesced_by_namespace = {}
+
+    @classmethod
+    def get_instance(cls) -> "SingleFlight":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(enabled=os.getenv("SINGLE_FLIGHT", "1") != "0")
+                    Metrics.register("single_flight", cls._instance.stats)
+        return cls._instance
+
+    async def do(self, key: tuple, fn):
+        if not self.enabled:
+            return await fn()
+
+        # Keys are (namespace, id, *query signature); forget() detaches them by namespace and id.
+        namespace = key[0]
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flight_key = (id(loop), *key)
+            task = self._calls.get(flight_key)
+            self._counters["calls"] += 1
+            leader = task is None
+            if leader:
+                self._counters["leaders"] += 1
+                task = loop.create_task(fn())
+                self._calls[flight_key] = task
+                task.add_done_callback(lambda _: self._finish(flight_key, task))
+            else:
+                self._counters["coalesced"] += 1
+                self._coalesced_by_namespace[namespace] = self._coalesced_by_namespace.get(namespace, 0) + 1
+
+        # The shared call keeps running for the others if one caller is cancelled.
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def _finish(self, flight_key, task):
+        with self._lock:
+            if self._calls.get(flight_key) is task:
+                del self._calls[flight_key]
+
+    def forget(self, namespace: str, *ids):
+        # Called after a write: reads issued from now on start a new call instead of joining
+        # one that began before the write. Callers already waiting keep their call.
+        # Without ids every call in the namespace is detached.
+        if ids:
+            ids = {doc_id for doc_id in ids if doc_id is not None}
+            if not ids:
+                return
+        with self._lock:
+            for flight_key in list(self._calls):
+                if flight_key[1] == namespace and (not ids or flight_key[2] in ids):
+                    del self._calls[flight_key]
+                    self._counters["forgotten"] += 1
+
+    def stats(self):
+        with self._lock:
+            calls = self._counters["calls"]
+            return {
+                **self._counters,
+                "coalesced_by_collection": dict(self._coalesced_by_namespace),
+                "coalesced_rate": round(self._counters["coalesced"] / calls, 4) if calls else 0.0,
+                "in_flight": len(self._calls),
+                "enabled": self.enabled,
+            }
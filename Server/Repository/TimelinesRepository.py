@@ -0,0 +1,101 @@
+from FirebaseSingleton import FirebaseSingleton
+from google.cloud.firestore import Increment
+from google.cloud.firestore_v1.field_path import FieldPath
+from Repository.BatchGet import get_all
+from typing import Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger("TimelinesREPO")
+
+BATCH_LIMIT = 500
+# Each follower costs two writes per batch: the entry and the entry counter.
+FOLLOWERS_PER_BATCH = BATCH_LIMIT // 2
+
+
+class TimelinesRepository:
+    def __init__(self, cred_path: str):
+        self.firebase_instance = FirebaseSingleton(cred_path)
+        self.db = self.firebase_instance.get_firestore_client()
+        self.timelines_collection = self.db.collection("timelines")
+
+    def _entries(self, user_id: str):
+        return self.timelines_collection.document(user_id).collection("entries")
+
+    def _ordered_entries(self, user_id: str):
+        return self._entries(user_id) \
+            .order_by("priority") \
+            .order_by("date", direction="DESCENDING") \
+            .order_by(FieldPath.document_id(), direction="DESCENDING")
+
+    async def add_entries(self, post_id: str, author_id: str, date: str, recipients: Dict[str, int]) -> int:
+        def write():
+            items = list(recipients.items())
+            for i in range(0, len(items), FOLLOWERS_PER_BATCH):
+                batch = self.db.batch()
+                for user_id, priority in items[i:i + FOLLOWERS_PER_BATCH]:
+                    batch.set(self._entries(user_id).document(post_id), {
+                        "postId": post_id,
+                        "authorId": author_id,
+                        "date": date,
+                        "priority": priority,
+                    })
+                    batch.set(self.timelines_collection.document(user_id), {"entryCount": Increment(1)}, merge=True)
+                batch.commit()
+            return len(items)
+
+        return await asyncio.to_thread(write)
+
+    async def put_entries(self, user_id: str, entries: List[dict]) -> int:
+        # Entries the timeline already holds are overwritten but not counted again.
+        counted = set(await get_all(self.db, self._entries(user_id), [entry["postId"] for entry in entries]))
+
+        def write():
+            for i in range(0, len(entries), BATCH_LIMIT - 1):
+                chunk = entries[i:i + BATCH_LIMIT - 1]
+                batch = self.db.batch()
+                created = 0
+                for entry in chunk:
+                    batch.set(self._entries(user_id).document(entry["postId"]), entry)
+                    if entry["postId"] not in counted:
+                        counted.add(entry["postId"])
+                        created += 1
+                if created:
+                    batch.set(self.timelines_collection.document(user_id), {"entryCount": Increment(created)}, merge=True)
+                batch.commit()
+            return len(entries)
+
+        return await asyncio.to_thread(write)
+
+    async def get_entries(self, user_id: str, limit: int, start_after: Optional[str] = None):
+        def fetch():
+            query = self._ordered_entries(user_id)
+            if start_after:
+                cursor = self._entries(user_id).document(start_after).get()
+                if not cursor.exists:
+                    return {"error": "Invalid cursor"}
+                query = query.start_after(cursor)
+            return [entry.to_dict() for entry in query.limit(limit).stream()]
+
+        return await asyncio.to_thread(fetch)
+
+    async def get_entry_count(self, user_id: str) -> int:
+        doc = await asyncio.to_thread(self.timelines_collection.document(user_id).get)
+        return (doc.to_dict() or {}).get("entryCount", 0) if doc.exists else 0
+
+    async def trim(self, user_id: str, max_entries: int) -> int:
+        def delete_overflow():
+            overflow = list(self._ordered_entries(user_id).offset(max_entries).stream())
+            for i in range(0, len(overflow), BATCH_LIMIT):
+                batch = self.db.batch()
+                for entry in overflow[i:i + BATCH_LIMIT]:
+                    batch.delete(entry.reference)
+                batch.commit()
+            kept = max_entries if overflow else self._entries(user_id).count().get()[0][0].value
+            self.timelines_collection.document(user_id).set({"entryCount": kept}, merge=True)
+            return len(overflow)
+
+        removed = await asyncio.to_thread(delete_overflow)
+        if removed:
+            logger.info(f"Trimmed {removed} entries from the timeline of {user_id}")
+        return removed
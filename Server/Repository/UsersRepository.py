@@ -1,15 +1,25 @@
 from FirebaseSingleton import FirebaseSingleton
 from Model import User
 from fastapi.concurrency import run_in_threadpool
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import ArrayRemove, ArrayUnion, Increment, SERVER_TIMESTAMP, transactional
+from Repository.BatchGet import get_all
+from Repository.DocumentCache import DocumentCache
+from typing import List
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("UsersRepository")
 
+BATCH_LIMIT = 500
+
 class UsersRepository:
     def __init__(self, cred_path: str):
         self.firebase_instance = FirebaseSingleton(cred_path)
         self.db = self.firebase_instance.get_firestore_client()
+        self.users_collection = self.db.collection("users")
+        self.follows_collection = self.db.collection("follows")
+        self.cache = DocumentCache.for_collection("users")
 
     async def _get_user_doc(self, uId: str):
         user_ref = self.db.collection("users").document(uId)
@@ -27,39 +37,112 @@ class UsersRepository:
 
             if updates:
                 await run_in_threadpool(user_doc.reference.update, updates)
+                self.cache.invalidate(uId)
                 return {"message": "User updated"}
             else:
                 return {"error": "No fields to update"}
         else:
             return {"error": "User not found"}
 
-    async def _update_followers_or_following(self, uId: str, user_field: str, userId: str, status: bool):
-        user_doc = await self._get_user_doc(uId)
-
-        if user_doc.exists:
-            all_users = await self.get_all_users()
-            all_user_ids = {user["userId"] for user in all_users}
+    def _follow_ref(self, follower_id: str, followee_id: str):
+        return self.follows_collection.document(f"{follower_id}_{followee_id}")
 
-            if userId not in all_user_ids:
+    async def _update_followers_or_following(self, uId: str, user_field: str, userId: str, status: bool):
+        follower_id, followee_id = (uId, userId) if user_field == "following" else (userId, uId)
+
+        @transactional
+        def update(transaction):
+            user_ref = self.users_collection.document(uId)
+            other_ref = self.users_collection.document(userId)
+            edge_ref = self._follow_ref(follower_id, followee_id)
+            docs = {doc.reference.path: doc for doc in transaction.get_all([user_ref, other_ref, edge_ref])}
+
+            user_doc = docs.get(user_ref.path)
+            if user_doc is None or not user_doc.exists:
+                return {"error": "User not found"}
+            other_doc = docs.get(other_ref.path)
+            if other_doc is None or not other_doc.exists:
                 return {"error": f"User '{userId}' does not exist"}
-            user_list = user_doc.to_dict().get(user_field, [])
 
+            edge_doc = docs.get(edge_ref.path)
+            # Relationships made before the follows collection existed are only in the arrays.
+            linked = (edge_doc is not None and edge_doc.exists) or userId in (user_doc.to_dict() or {}).get(user_field, [])
+            if status == linked:
+                return {"message": f"{'Already' if status else 'Not'} {user_field[:-1]} {userId}"}
+
+            follower_ref = self.users_collection.document(follower_id)
+            followee_ref = self.users_collection.document(followee_id)
             if status:
-                if userId not in user_list:
-                    user_list.append(userId)
-                    await run_in_threadpool(user_doc.reference.update, {user_field: user_list})
-                    return {"message": f"Now {user_field[:-1]} {userId}"}
-                else:
-                    return {"message": f"Already {user_field[:-1]} {userId}"}
-            else:
-                if userId in user_list:
-                    user_list.remove(userId)
-                    await run_in_threadpool(user_doc.reference.update, {user_field: user_list})
-                    return {"message": f"Un{user_field[:-1]} {userId}"}
-                else:
-                    return {"message": f"Not {user_field[:-1]} {userId}"}
-        else:
-            return {"error": "User not found"}
+                transaction.set(edge_ref, {"followerId": follower_id, "followeeId": followee_id, "createdAt": SERVER_TIMESTAMP})
+                transaction.update(follower_ref, {"following": ArrayUnion([followee_id])})
+                transaction.update(followee_ref, {"followers": ArrayUnion([follower_id])})
+                return {"message": f"Now {user_field[:-1]} {userId}"}
+            transaction.delete(edge_ref)
+            transaction.update(follower_ref, {"following": ArrayRemove([followee_id])})
+            transaction.update(followee_ref, {"followers": ArrayRemove([follower_id])})
+            return {"message": f"Un{user_field[:-1]} {userId}"}
+
+        result = await run_in_threadpool(update, self.db.transaction())
+        self.cache.invalidate(uId, userId)
+        return result
+
+    async def get_following_ids(self, uId: str):
+        edges = await run_in_threadpool(lambda: list(self.follows_collection.where("followerId", "==", uId).stream()))
+        return [edge.to_dict()["followeeId"] for edge in edges]
+
+    async def get_follower_ids(self, uId: str):
+        edges = await run_in_threadpool(lambda: list(self.follows_collection.where("followeeId", "==", uId).stream()))
+        return [edge.to_dict()["followerId"] for edge in edges]
+
+    async def remove_all_follows(self, uId: str):
+        def remove():
+            user_doc = self.users_collection.document(uId).get()
+            data = (user_doc.to_dict() or {}) if user_doc.exists else {}
+            outgoing = list(self.follows_collection.where("followerId", "==", uId).stream())
+            incoming = list(self.follows_collection.where("followeeId", "==", uId).stream())
+
+            following = set(data.get("following", [])) | {edge.to_dict()["followeeId"] for edge in outgoing}
+            followers = set(data.get("followers", [])) | {edge.to_dict()["followerId"] for edge in incoming}
+            following.discard(uId)
+            followers.discard(uId)
+            others = [self.users_collection.document(other_id) for other_id in sorted(following | followers)]
+            existing = {doc.id for doc in self.db.get_all(others) if doc.exists} if others else set()
+
+            ops = [(edge.reference, None) for edge in outgoing + incoming]
+            ops += [(self.users_collection.document(other_id), {"followers": ArrayRemove([uId])})
+                    for other_id in sorted(following) if other_id in existing]
+            ops += [(self.users_collection.document(other_id), {"following": ArrayRemove([uId])})
+                    for other_id in sorted(followers) if other_id in existing]
+            for i in range(0, len(ops), BATCH_LIMIT):
+                batch = self.db.batch()
+                for ref, fields in ops[i:i + BATCH_LIMIT]:
+                    if fields is None:
+                        batch.delete(ref)
+                    else:
+                        batch.update(ref, fields)
+                batch.commit()
+            self.cache.invalidate(uId, *existing)
+            return {"edges": len(outgoing) + len(incoming), "users": len(existing)}
+
+        return await run_in_threadpool(remove)
+
+    async def backfill_follow_edges(self):
+        def backfill():
+            edges = set()
+            for user in self.users_collection.select(["following", "followers"]).stream():
+                data = user.to_dict() or {}
+                edges.update((user.id, followee_id) for followee_id in data.get("following", []))
+                edges.update((follower_id, user.id) for follower_id in data.get("followers", []))
+
+            edges = sorted(edges)
+            for i in range(0, len(edges), BATCH_LIMIT):
+                batch = self.db.batch()
+                for follower_id, followee_id in edges[i:i + BATCH_LIMIT]:
+                    batch.set(self._follow_ref(follower_id, followee_id), {"followerId": follower_id, "followeeId": followee_id}, merge=True)
+                batch.commit()
+            return {"edges": len(edges)}
+
+        return await run_in_threadpool(backfill)
 
     async def follow_update(self, uId: str, followingUserId: str, status: bool):
         return await self._update_followers_or_following(uId, "following", followingUserId, status)
@@ -71,42 +154,48 @@ class UsersRepository:
         user_doc = await self._get_user_doc(uId)
         if user_doc.exists:
             await run_in_threadpool(user_doc.reference.update, {"postRating": new_rating})
+            self.cache.invalidate(uId)
             return {"message": "User rating updated"}
         else:
             return {"error": "User not found"}
 
     async def update_user_votes(self, uId: str, vote: bool):
-        user_doc = await self._get_user_doc(uId)
-
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            if isinstance(user_data["commentsRating"], int):
-                user_data["commentsRating"] += 1 if vote else -1
-            else:
-                logger.error("Invalid data type for commentsRating: expected int but got {}".format(type(user_data["commentsRating"])))
-                return {"error": "Invalid data type for commentsRating"}
-
-            await run_in_threadpool(user_doc.reference.update, user_data)
+        user_ref = self.db.collection("users").document(uId)
+        try:
+            await run_in_threadpool(user_ref.update, {"commentsRating": Increment(1 if vote else -1)})
+            self.cache.invalidate(uId)
             return {"message": "User votes updated"}
-        else:
+        except NotFound:
             return {"error": "User not found"}
 
     async def update_user_likes(self, uId: str, total_likes: int):
         user_doc = await self._get_user_doc(uId)
         if user_doc.exists:
             await run_in_threadpool(user_doc.reference.update, {"likes": total_likes})
+            self.cache.invalidate(uId)
             return {"message": "User total likes updated"}
         else:
             return {"error": "User not found"}
 
     async def get_user_by_id(self, uId: str):
-        user_doc = await self._get_user_doc(uId)
-        if user_doc.exists:
+        async def load():
+            user_doc = await self._get_user_doc(uId)
+            if not user_doc.exists:
+                return None
             user_data = user_doc.to_dict()
             user_data['userId'] = user_doc.id
             return user_data
-        else:
+
+        user_data = await self.cache.get(uId, load)
+        if user_data is None:
             return {"error": "User not found"}
+        return user_data
+
+    async def get_many(self, uIds: List[str]):
+        found = await self.cache.get_many(
+            [uId for uId in uIds if uId], lambda missing: get_all(self.db, self.users_collection, missing, id_field="userId")
+        )
+        return [found.get(uId) or {"userId": uId, "error": "User not found"} for uId in uIds]
 
     async def get_all_users(self):
         users_ref = self.db.collection("users")
@@ -119,6 +208,7 @@ class UsersRepository:
 
         if user_doc.exists:
             await run_in_threadpool(user_doc.reference.delete)
+            self.cache.invalidate(uId)
             return {"message": "User and all associated posts deleted"}
         else:
             return {"error": "User not found"}
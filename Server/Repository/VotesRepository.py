@@ -1,5 +1,8 @@
 from FirebaseSingleton import FirebaseSingleton
 from fastapi.concurrency import run_in_threadpool
+from google.cloud.firestore import Increment, transactional
+from Repository.DocumentCache import DocumentCache
+from Repository.CommentsRepository import forget_comment_reads
 from typing import List, Dict
 
 
@@ -8,6 +11,9 @@ class VotesRepository:
         self.firebase_instance = FirebaseSingleton(cred_path)
         self.db = self.firebase_instance.get_firestore_client()
         self.collection_name = "votes"
+        self.comments_collection = self.db.collection("comments")
+        self.users_collection = self.db.collection("users")
+        self.users_cache = DocumentCache.for_collection("users")
 
     async def calculate_total_votes(self, cId: str) -> int:
         votes_ref = self.db.collection(self.collection_name).where("commId", "==", cId)
@@ -20,24 +26,6 @@ class VotesRepository:
 
         return total_votes
 
-    async def upload_or_update_vote(self, cId: str, uId: str, vote: bool) -> Dict[str, str]:
-        doc_id = f"{cId}_{uId}"
-        vote_ref = self.db.collection(self.collection_name).document(doc_id)
-        vote_doc = await run_in_threadpool(vote_ref.get)
-
-        if vote_doc.exists:
-            await run_in_threadpool(vote_ref.update, {"vote": vote})
-            return {"message": "Vote updated"}
-
-        data = {
-            "userId": uId,
-            "commId": cId,
-            "vote": vote
-        }
-
-        await run_in_threadpool(vote_ref.set, data)
-        return {"message": "Vote uploaded"}
-
     async def get_comment_votes(self, cId: str) -> List[Dict]:
         votes_ref = self.db.collection(self.collection_name).where("commId", "==", cId)
         votes = await run_in_threadpool(lambda: list(votes_ref.stream()))
@@ -51,6 +39,15 @@ class VotesRepository:
         return vote_list
 
     async def get_comment_total_votes(self, cId: str) -> Dict[str, int]:
+        comment = await run_in_threadpool(self.comments_collection.document(cId).get)
+        data = comment.to_dict() if comment.exists else None
+        if data and isinstance(data.get("upvotes"), int) and isinstance(data.get("downvotes"), int):
+            return {
+                "commId": cId,
+                "totalVotes": data["upvotes"] - data["downvotes"],
+                "upvotes": data["upvotes"],
+                "downvotes": data["downvotes"],
+            }
         total_votes = await self.calculate_total_votes(cId)
         return {"commId": cId, "totalVotes": total_votes}
 
@@ -81,3 +78,108 @@ class VotesRepository:
             return {"userId": data["userId"], "vote": data["vote"]}
         else:
             return {"userId": uId, "vote": None}
+
+    def _tally(self, transaction, comment_doc):
+        data = comment_doc.to_dict() or {}
+        if isinstance(data.get("upvotes"), int) and isinstance(data.get("downvotes"), int):
+            return data["upvotes"], data["downvotes"]
+        # Comments voted on before the tallies existed are counted once from their votes.
+        query = self.db.collection(self.collection_name).where("commId", "==", comment_doc.id)
+        votes = [v.to_dict().get("vote", False) for v in transaction.get(query)]
+        upvotes = sum(1 for v in votes if v)
+        return upvotes, len(votes) - upvotes
+
+    def _read_for_vote(self, transaction, cId: str, uId: str):
+        vote_ref = self.db.collection(self.collection_name).document(f"{cId}_{uId}")
+        comment_ref = self.comments_collection.document(cId)
+        voter_ref = self.users_collection.document(uId)
+        # One batched read inside the transaction replaces the separate validation lookups.
+        docs = {doc.reference.path: doc for doc in transaction.get_all([vote_ref, comment_ref, voter_ref])}
+
+        comment_doc = docs.get(comment_ref.path)
+        if comment_doc is None or not comment_doc.exists:
+            raise LookupError("Invalid comment ID")
+        voter_doc = docs.get(voter_ref.path)
+        if voter_doc is None or not voter_doc.exists:
+            raise LookupError("Invalid user ID")
+        vote_doc = docs.get(vote_ref.path)
+        old_vote = vote_doc.to_dict().get("vote", False) if vote_doc is not None and vote_doc.exists else None
+        return vote_ref, old_vote, comment_ref, comment_doc
+
+    def _change_tally(self, transaction, comment_ref, comment_doc, old_vote, new_vote):
+        data = comment_doc.to_dict() or {}
+        upvotes, downvotes = self._tally(transaction, comment_doc)
+
+        if old_vote is not None:
+            upvotes, downvotes = (upvotes - 1, downvotes) if old_vote else (upvotes, downvotes - 1)
+        if new_vote is not None:
+            upvotes, downvotes = (upvotes + 1, downvotes) if new_vote else (upvotes, downvotes + 1)
+        upvotes, downvotes = max(upvotes, 0), max(downvotes, 0)
+
+        # "likes" stays the net score so existing readers keep working.
+        likes = upvotes - downvotes
+        old_likes = data.get("likes", 0) if isinstance(data.get("likes"), int) else 0
+        transaction.update(comment_ref, {"upvotes": upvotes, "downvotes": downvotes, "likes": likes})
+        if likes != old_likes and data.get("userId"):
+            transaction.update(self.users_collection.document(data["userId"]), {"likes": Increment(likes - old_likes)})
+        return {"commId": comment_doc.id, "totalVotes": likes, "upvotes": upvotes, "downvotes": downvotes, **self._comment_keys(data)}
+
+    @staticmethod
+    def _comment_keys(data: dict):
+        return {"authorId": data.get("userId"), "postId": data.get("postId"), "parentId": data.get("parentId")}
+
+    def _invalidate(self, result: dict):
+        # These keys only say which cached user and comment reads to drop; they are not part of the response.
+        keys = {name: result.pop(name, None) for name in ("authorId", "postId", "parentId")}
+        self.users_cache.invalidate(keys["authorId"])
+        forget_comment_reads([result["commId"], keys["parentId"]], keys["postId"])
+        return result
+
+    async def apply_vote(self, cId: str, uId: str, vote: bool) -> Dict[str, any]:
+        @transactional
+        def upsert(transaction):
+            vote_ref, old_vote, comment_ref, comment_doc = self._read_for_vote(transaction, cId, uId)
+            totals = self._change_tally(transaction, comment_ref, comment_doc, old_vote, vote)
+            transaction.set(vote_ref, {"userId": uId, "commId": cId, "vote": vote})
+            return {"message": "Vote uploaded" if old_vote is None else "Vote updated", "previousVote": old_vote, **totals}
+
+        try:
+            result = await run_in_threadpool(upsert, self.db.transaction())
+        except LookupError as e:
+            return {"error": str(e)}
+        return self._invalidate(result)
+
+    async def retract_vote(self, cId: str, uId: str) -> Dict[str, any]:
+        @transactional
+        def remove(transaction):
+            vote_ref, old_vote, comment_ref, comment_doc = self._read_for_vote(transaction, cId, uId)
+            totals = self._change_tally(transaction, comment_ref, comment_doc, old_vote, None)
+            if old_vote is not None:
+                transaction.delete(vote_ref)
+            return {"message": "Vote not found" if old_vote is None else "Vote deleted", "previousVote": old_vote, **totals}
+
+        try:
+            result = await run_in_threadpool(remove, self.db.transaction())
+        except LookupError as e:
+            return {"error": str(e)}
+        return self._invalidate(result)
+
+    async def reset_comment_tally(self, cId: str) -> Dict[str, any]:
+        @transactional
+        def reset(transaction):
+            comment_ref = self.comments_collection.document(cId)
+            comment_doc = comment_ref.get(transaction=transaction)
+            if not comment_doc.exists:
+                raise LookupError("Comment not found")
+            data = comment_doc.to_dict() or {}
+            old_likes = data.get("likes", 0) if isinstance(data.get("likes"), int) else 0
+            transaction.update(comment_ref, {"upvotes": 0, "downvotes": 0, "likes": 0})
+            if old_likes and data.get("userId"):
+                transaction.update(self.users_collection.document(data["userId"]), {"likes": Increment(-old_likes)})
+            return {"commId": cId, "totalVotes": 0, "upvotes": 0, "downvotes": 0, **self._comment_keys(data)}
+
+        try:
+            result = await run_in_threadpool(reset, self.db.transaction())
+        except LookupError as e:
+            return {"error": str(e)}
+        return self._invalidate(result)
@@ -1,9 +1,11 @@
+import asyncio
 import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
-import requests
 from fastapi import APIRouter, Form, HTTPException
 from PIL import Image
-from io import BytesIO
 
 from Strategy.AestheticStrategy import AestheticStrategy
 from Strategy.Context import Context
@@ -12,17 +14,32 @@ from Strategy.ObjectStrategy import ObjectStrategy
 from Strategy.SceneStrategy import SceneStrategy
 from Strategy.GenreStrategy import GenreStrategy
 from Strategy.GeneralAdviceStrategy import GeneralAdviceStrategy
+from Routes.Chatbot.ImageFetcher import ImageFetcher
+from Factory.WorkerPool import InferencePoolBusy, InferenceTimeout, WorkerCrashed
 
 router = APIRouter()
+image_fetcher = ImageFetcher()
+strategy_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CHATBOT_STRATEGY_WORKERS", "4")),
+    thread_name_prefix="strategy",
+)
+STRATEGY_TIMEOUT = float(os.getenv("CHATBOT_STRATEGY_TIMEOUT", "30"))
 
-def read_image_from_url(image_url: str) -> Image.Image:
-    try:
-        response = requests.get(image_url)
-        response.raise_for_status() 
-        image = Image.open(BytesIO(response.content)).convert("RGB")
-        return image
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=400, detail=f"Error downloading image: {e}")
+REPORT_STRATEGIES = {
+    "aesthetic_score": lambda: AestheticStrategy(sub_option="general"),
+    "technical_quality": QualityStrategy,
+    "object_advice": ObjectStrategy,
+    "scene_advice": SceneStrategy,
+    "genre_advice": GenreStrategy,
+}
+# Reports run on their own threads, at least one per strategy, so a slow report cannot starve /advice.
+report_executor = ThreadPoolExecutor(
+    max_workers=max(int(os.getenv("CHATBOT_REPORT_WORKERS", "0")), len(REPORT_STRATEGIES)),
+    thread_name_prefix="report",
+)
+
+async def read_image_from_url(image_url: str) -> Image.Image:
+    return await image_fetcher.fetch(image_url)
 
 @router.get("/")
 async def get_options():
@@ -43,7 +60,7 @@ async def get_advice(
 ):
     if choice == "general_advice":
         raise HTTPException(status_code=400, detail="Use the /general_advice endpoint for this option.")  
-    image = read_image_from_url(image_url)
+    image = await read_image_from_url(image_url)
 
     if choice == "aesthetic_score":
         strategy = AestheticStrategy(sub_option=sub_choice or "general")
@@ -60,12 +77,21 @@ async def get_advice(
     else:
         raise HTTPException(status_code=400, detail="Invalid strategy choice.")
     advisor = Context(strategy)
-    advice = advisor.execute(image)
+    loop = asyncio.get_running_loop()
+    try:
+        advice = await loop.run_in_executor(strategy_executor, advisor.execute, image)
+    except InferencePoolBusy:
+        raise HTTPException(status_code=503, detail="Image analysis is busy, try again shortly.")
+    except WorkerCrashed:
+        raise HTTPException(status_code=503, detail="Image analysis is restarting, try again shortly.")
+    except InferenceTimeout:
+        raise HTTPException(status_code=504, detail="Image analysis timed out.")
 
     return {
         "advice_type": choice,
         "sub_advice_type": sub_choice,
-        "result": advice
+        "result": advice,
+        "backends": strategy.backends,
     }
 
 
@@ -86,4 +112,47 @@ async def get_general_advice(
     strategy = GeneralAdviceStrategy(sub_option=sub_choice, sub_sub_option=sub_sub_option)
     advisor = Context(strategy)
     advice = advisor.execute(None) 
-    return advice  
\ No newline at end of file
+    return advice
+
+def _run_strategy(strategy_factory, image, deadline: float = None):
+    if deadline is not None and time.monotonic() > deadline:
+        raise TimeoutError("Report timed out before this strategy started")
+    strategy = strategy_factory()
+    return Context(strategy).execute(image), strategy.backends
+
+@router.post("/full_report")
+async def get_full_report(
+    image_url: str = Form(...),
+    timeout: Optional[float] = Form(None, gt=0),
+):
+    image = await read_image_from_url(image_url)
+    loop = asyncio.get_running_loop()
+    wait = min(timeout if timeout is not None else STRATEGY_TIMEOUT, STRATEGY_TIMEOUT)
+    deadline = time.monotonic() + wait
+
+    tasks = {
+        choice: asyncio.ensure_future(loop.run_in_executor(report_executor, _run_strategy, factory, image, deadline))
+        for choice, factory in REPORT_STRATEGIES.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=wait)
+    # Cancelling removes strategies that have not started; the deadline stops any that start anyway.
+    for task in pending:
+        task.cancel()
+
+    results, errors, timed_out, backends = {}, {}, [], {}
+    for choice, task in tasks.items():
+        if task in pending:
+            timed_out.append(choice)
+        elif task.exception():
+            errors[choice] = str(task.exception())
+        else:
+            results[choice], used = task.result()
+            backends.update(used)
+
+    return {
+        "complete": not errors and not timed_out,
+        "results": results,
+        "errors": errors,
+        "timed_out": timed_out,
+        "backends": backends,
+    }
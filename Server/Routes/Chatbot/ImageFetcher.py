@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException
+from PIL import Image, ImageFile
+
+logger = logging.getLogger("ImageFetcher")
+
+FEED_CHUNK_BYTES = 256 * 1024
+
+
+class ImageFetcher:
+    def __init__(
+        self,
+        max_bytes: int = int(os.getenv("IMAGE_FETCH_MAX_BYTES", str(20 * 1024 * 1024))),
+        timeout: float = float(os.getenv("IMAGE_FETCH_TIMEOUT", "10")),
+        per_host_limit: int = int(os.getenv("IMAGE_FETCH_PER_HOST", "8")),
+        max_connections: int = int(os.getenv("IMAGE_FETCH_MAX_CONNECTIONS", "100")),
+    ):
+        self.max_bytes = max_bytes
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections // 2,
+            keepalive_expiry=30.0,
+        )
+        self.per_host_limit = per_host_limit
+        # host -> [semaphore, requests holding or waiting for it]; idle hosts are dropped.
+        self._host_semaphores = {}
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, follow_redirects=True)
+        return self._client
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        entry = self._host_semaphores.get(host)
+        if entry is None:
+            entry = self._host_semaphores[host] = [asyncio.Semaphore(self.per_host_limit), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._host_semaphores[host]
+
+    async def fetch(self, image_url: str) -> Image.Image:
+        parts = urlsplit(image_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise HTTPException(status_code=400, detail="Error downloading image: unsupported URL")
+
+        async with self._host_slot(parts.hostname):
+            try:
+                image = await self._download(image_url)
+            except httpx.TimeoutException:
+                raise HTTPException(status_code=504, detail="Error downloading image: timed out")
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=400, detail=f"Error downloading image: {e}")
+
+        rgb_image = await asyncio.to_thread(image.convert, "RGB")
+        rgb_image.info["content_hash"] = image.info.get("content_hash")
+        return rgb_image
+
+    async def _download(self, image_url: str) -> Image.Image:
+        async with self._get_client().stream("GET", image_url) as response:
+            response.raise_for_status()
+            content_length = response.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                raise HTTPException(status_code=413, detail="Image is too large")
+
+            # Decode while downloading: the parser is fed in ~256 KB slices off the
+            # event loop, so a large JPEG never sits fully buffered before decoding.
+            parser = ImageFile.Parser()
+            hasher = hashlib.sha256()
+            received = 0
+            pending = bytearray()
+            try:
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise HTTPException(status_code=413, detail="Image is too large")
+                    hasher.update(chunk)
+                    pending.extend(chunk)
+                    if len(pending) >= FEED_CHUNK_BYTES:
+                        await asyncio.to_thread(parser.feed, bytes(pending))
+                        pending.clear()
+                if pending:
+                    await asyncio.to_thread(parser.feed, bytes(pending))
+                image = await asyncio.to_thread(parser.close)
+                image.info["content_hash"] = hasher.hexdigest()
+                return image
+            except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+                raise HTTPException(status_code=400, detail=f"Invalid image: {e}")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
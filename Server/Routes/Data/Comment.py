@@ -1,8 +1,8 @@
 import os
-from typing import List
+from typing import List, Optional
 from Service.CommentsService import CommentsService
 from Model.CommentPydantic import CommentPydantic
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
 router = APIRouter()
 FIREBASE_CREDENTIALS_PATH = os.getenv("FIREBASE_CREDENTIALS")
@@ -47,9 +47,13 @@ async def delete_comment(commentId: str):
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/post/{postId}")
-async def get_comments_by_post_id(postId: str):
+async def get_comments_by_post_id(
+    postId: str,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    start_after: Optional[str] = None,
+):
     try:
-        return await comments_service.get_post_comments(postId)
+        return await comments_service.get_post_comments(postId, limit, start_after)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -1,5 +1,6 @@
 import os
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from Model.PostPydantic import PostPydantic
 from Service.PostsService import PostsService
 import uuid
@@ -18,8 +19,14 @@ async def create_post(post_data: PostPydantic):
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/")
-async def get_all_posts():
+async def get_all_posts(
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    card: bool = False,
+):
     try:
+        if limit is not None:
+            return await post_service.get_posts_page(limit, cursor, card)
         return await post_service.get_all_posts()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -39,6 +46,13 @@ async def update_post_view(postId: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
         
+@router.get("/view/{postId}")
+async def get_post_views(postId: str):
+    try:
+        return await post_service.get_post_views(postId)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{postId}/{userId}")
 async def delete_post(userId: str, postId: str):
     try:
@@ -62,8 +76,14 @@ async def get_all_posts_of_user(userId: str):
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/all_friends/{userId}")
-async def get_all_posts_for_user(userId: str):
+async def get_all_posts_for_user(
+    userId: str,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
     try:
+        if limit is not None:
+            return await post_service.get_feed_page(userId, limit, cursor)
         return await post_service.get_all_posts_for_user(userId)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
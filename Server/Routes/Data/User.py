@@ -42,13 +42,20 @@ async def update_user(user_id: str, user: UserPydantic):
         raise HTTPException(status_code=404, detail=user_data["error"])
     return user_data
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", status_code=202)
 async def delete_user(user_id: str):
     delete_data = await users_service.delete_user(user_id)
     if delete_data.get("error"):
         raise HTTPException(status_code=404, detail=delete_data["error"])
     return delete_data
 
+@router.get("/deletions/{job_id}")
+async def get_deletion_status(job_id: str):
+    job = await users_service.get_deletion_status(job_id)
+    if job.get("error"):
+        raise HTTPException(status_code=404, detail=job["error"])
+    return job
+
 @router.post("/{user_id}/follow/{target_user_id}")
 async def follow_user(user_id: str, target_user_id: str):
     follow_data = await users_service.follow_user(user_id, target_user_id)
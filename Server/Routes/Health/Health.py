@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from Factory.ModelRegistry import ModelRegistry
+from Factory.WorkerPool import InferenceWorkerPool
+
+router = APIRouter()
+
+@router.get("/live")
+async def live():
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def ready():
+    registry = ModelRegistry.get_instance()
+    models = registry.status()
+    pool = InferenceWorkerPool.get_instance()
+    if registry.is_ready() and (pool is None or pool.is_ready()):
+        status = "ready"
+    elif any(models[name]["state"] == "failed" for name in registry.required):
+        status = "failed"
+    else:
+        status = "loading"
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={
+            "status": status,
+            "required": sorted(registry.required),
+            "models": models,
+            "workers": pool.stats()["workers"] if pool else [],
+        },
+    )
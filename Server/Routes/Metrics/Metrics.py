@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+import Metrics
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics():
+    return Metrics.collect()
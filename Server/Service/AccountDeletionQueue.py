@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import Metrics
+from Repository.PostsRepository import PostsRepository
+from Repository.UsersRepository import UsersRepository
+
+logger = logging.getLogger("AccountDeletionQueue")
+
+STEPS = ["follows", "posts", "user"]
+ACTIVE = ("pending", "running")
+
+
+class LeaseLost(Exception):
+    pass
+
+
+class AccountDeletionQueue:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, db_path: str, users_repo: UsersRepository, posts_repo: PostsRepository,
+                 posts_per_chunk: int = 20, max_attempts: int = 5, retry_delay: float = 5.0, poll_interval: float = 30.0,
+                 lease_seconds: float = 60.0):
+        self.users_repo = users_repo
+        self.posts_repo = posts_repo
+        self.posts_per_chunk = posts_per_chunk
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        # Several processes may share the file; each claims jobs under its own owner id.
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, user_id TEXT NOT NULL, status TEXT NOT NULL, step TEXT NOT NULL,"
+            " progress TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT,"
+            " run_after REAL NOT NULL, created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        if "lease_until" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, run_after)")
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_user ON jobs (user_id) WHERE status IN ('pending', 'running')"
+        )
+        self._db.commit()
+        self._wake = None
+        self._task = None
+        self._closing = False
+
+    @classmethod
+    def get_instance(cls, cred_path: str):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        os.getenv("ACCOUNT_DELETION_DB", "account_deletions.db"),
+                        UsersRepository(cred_path),
+                        PostsRepository(cred_path),
+                        posts_per_chunk=int(os.getenv("ACCOUNT_DELETION_CHUNK", "20")),
+                        max_attempts=int(os.getenv("ACCOUNT_DELETION_ATTEMPTS", "5")),
+                        lease_seconds=float(os.getenv("ACCOUNT_DELETION_LEASE", "60")),
+                    )
+                    Metrics.register("account_deletions", cls._instance.stats)
+        return cls._instance
+
+    def _row(self, row):
+        if row is None:
+            return None
+        return {
+            "jobId": row["id"],
+            "userId": row["user_id"],
+            "status": row["status"],
+            "step": row["step"],
+            "progress": json.loads(row["progress"]),
+            "attempts": row["attempts"],
+            "error": row["error"],
+            "createdAt": row["created"],
+            "updatedAt": row["updated"],
+        }
+
+    def _update(self, job_id: str, **fields):
+        # Every write by the worker renews its lease, and fails once another process has taken the job over.
+        fields["updated"] = time.time()
+        if fields.get("status", "running") == "running":
+            fields["lease_until"] = fields["updated"] + self.lease_seconds
+        else:
+            fields["owner"], fields["lease_until"] = None, None
+        if "progress" in fields:
+            fields["progress"] = json.dumps(fields["progress"])
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND owner = ? AND status = 'running'",
+                (*fields.values(), job_id, self.owner),
+            )
+            self._db.commit()
+        if cursor.rowcount != 1:
+            raise LeaseLost(f"Account deletion {job_id} is no longer owned by {self.owner}")
+
+    def enqueue(self, user_id: str):
+        now = time.time()
+        with self._lock:
+            job_id = str(uuid.uuid4())
+            try:
+                # The partial unique index keeps one active job per user, even across processes.
+                self._db.execute(
+                    "INSERT INTO jobs (id, user_id, status, step, progress, run_after, created, updated)"
+                    " VALUES (?, ?, 'pending', ?, ?, ?, ?, ?)",
+                    (job_id, user_id, STEPS[0], json.dumps({"postsDeleted": 0}), now, now, now),
+                )
+                self._db.commit()
+            except sqlite3.IntegrityError:
+                self._db.rollback()
+            existing = self._db.execute(
+                "SELECT * FROM jobs WHERE user_id = ? AND status IN (?, ?) ORDER BY created LIMIT 1", (user_id, *ACTIVE)
+            ).fetchone()
+        self.start()
+        if self._wake is not None:
+            self._wake.set()
+        return self._row(existing)
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._row(self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def _claim(self):
+        # A job is claimable when it is due, or when the process running it stopped renewing its lease.
+        claimable = "((status = 'pending' AND run_after <= ?) OR (status = 'running' AND lease_until < ?))"
+        with self._lock:
+            now = time.time()
+            candidates = self._db.execute(
+                f"SELECT id FROM jobs WHERE {claimable} ORDER BY run_after LIMIT 10", (now, now)
+            ).fetchall()
+            for candidate in candidates:
+                cursor = self._db.execute(
+                    f"UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, updated = ? WHERE id = ? AND {claimable}",
+                    (self.owner, now + self.lease_seconds, now, candidate["id"], now, now),
+                )
+                self._db.commit()
+                if cursor.rowcount == 1:
+                    return self._row(self._db.execute("SELECT * FROM jobs WHERE id = ?", (candidate["id"],)).fetchone())
+        return None
+
+    def _next_wait(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(CASE status WHEN 'pending' THEN run_after ELSE lease_until END) FROM jobs WHERE status IN (?, ?)",
+                ACTIVE,
+            ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return min(self.poll_interval, max(row[0] - time.time(), 0.0))
+
+    def start(self):
+        if self._closing:
+            return
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            job = self._claim()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._next_wait())
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            await self.process(job)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            self._update(job_id)
+
+    async def process(self, job: dict):
+        job_id, user_id, progress = job["jobId"], job["userId"], job["progress"]
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            try:
+                for step in STEPS[STEPS.index(job["step"]):]:
+                    if heartbeat.done():
+                        heartbeat.result()
+                    self._update(job_id, step=step)
+                    await getattr(self, f"_delete_{step}")(job_id, user_id, progress)
+            except LeaseLost:
+                raise
+            except Exception as e:
+                attempts = job["attempts"] + 1
+                failed = attempts >= self.max_attempts
+                self._update(
+                    job_id,
+                    status="failed" if failed else "pending",
+                    attempts=attempts,
+                    error=str(e),
+                    run_after=time.time() + self.retry_delay * 2 ** (attempts - 1),
+                )
+                logger.warning(f"Account deletion {job_id} for user {user_id} {'failed' if failed else 'will retry'}: {e}")
+                return
+            self._update(job_id, status="done", error=None)
+            logger.info(f"Account deletion {job_id} for user {user_id} finished: {progress}")
+        except LeaseLost as e:
+            # Another process took the job over after this one stopped renewing the lease; it finishes the job.
+            logger.warning(str(e))
+        finally:
+            heartbeat.cancel()
+            if heartbeat.done() and not heartbeat.cancelled():
+                heartbeat.exception()
+
+    async def _delete_follows(self, job_id: str, user_id: str, progress: dict):
+        result = await self.users_repo.remove_all_follows(user_id)
+        progress["followEdges"] = result.get("edges", 0)
+        self._update(job_id, progress=progress)
+
+    async def _delete_posts(self, job_id: str, user_id: str, progress: dict):
+        while True:
+            post_ids = await self.posts_repo.get_user_post_ids(user_id, self.posts_per_chunk)
+            if not post_ids:
+                return
+            for post_id in post_ids:
+                result = await self.posts_repo.delete_post(user_id, post_id)
+                if "error" in result and result["error"] != "Post not found":
+                    raise RuntimeError(f"Could not delete post {post_id}: {result['error']}")
+            progress["postsDeleted"] = progress.get("postsDeleted", 0) + len(post_ids)
+            self._update(job_id, progress=progress)
+
+    async def _delete_user(self, job_id: str, user_id: str, progress: dict):
+        await self.users_repo.delete_user(user_id)
+
+    async def close(self):
+        self._closing = True
+        if self._task is not None:
+            # Steps are idempotent, so a job interrupted here resumes from its saved step in any process.
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'pending', owner = NULL, lease_until = NULL WHERE status = 'running' AND owner = ?",
+                (self.owner,),
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
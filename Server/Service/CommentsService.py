@@ -1,9 +1,11 @@
 import logging
 import asyncio
+import os
 from datetime import datetime
 from typing import Callable, Any
 import uuid
 
+from Repository.CascadeDeleter import CascadeDeleter
 from Repository.CommentsRepository import CommentsRepository
 from Repository.VotesRepository import VotesRepository
 from Model.Comment import Comment
@@ -19,6 +21,7 @@ class CommentsService:
         self.votes_repo = VotesRepository(cred_path)
         self.posts_repo = PostsRepository(cred_path)
         self.users_repo = UsersRepository(cred_path)
+        self.cascade = CascadeDeleter(self.comments_repo.db, max_concurrency=int(os.getenv("CASCADE_CONCURRENCY", "4")))
 
     async def retry(self, func: Callable, *args, retries: int = 3, delay: float = 1.0, **kwargs):
         for attempt in range(retries):
@@ -57,12 +60,12 @@ class CommentsService:
         )
         return await self.retry(self.comments_repo.upload_comment_to_firestore, comment)
 
-    async def get_post_comments(self, postId):
+    async def get_post_comments(self, postId, limit=None, start_after=None):
         if not postId:
             return {"error": "Missing postId"}
         if error := await self._validate_ids(postId=postId):
             return {"error": error}
-        return await self.retry(self.comments_repo.get_post_comments_from_firestore, postId)
+        return await self.retry(self.comments_repo.get_post_comments_from_firestore, postId, limit, start_after)
 
     async def get_single_comment(self, commentId):
         if not commentId:
@@ -92,9 +95,10 @@ class CommentsService:
     async def delete_comment(self, commentId):
         if not commentId:
             return {"error": "Missing commentId"}
-        if error := await self._validate_ids(commentId=commentId):
-            return {"error": error}
-        return await self.retry(self.comments_repo.delete_comment, commentId)
+        comment = await self.retry(self.comments_repo.get_single_comment, commentId)
+        if not comment or "error" in comment:
+            return {"error": f"Invalid comment ID: {commentId}"}
+        return await self.retry(self.comments_repo.delete_comment, commentId, comment.get("parentId"))
 
     async def delete_comments_and_replies(self, commentId):
         if not commentId:
@@ -128,28 +132,8 @@ class CommentsService:
         if not commentId:
             return {"error": "Missing commentId"}
         
-        comment = await self.retry(self.comments_repo.get_single_comment, commentId)
-        if not comment:
+        # The cascade takes each deleted comment's score off its author's likes in the batch that deletes it.
+        report = await self.retry(self.cascade.delete_comment_thread, commentId)
+        if "error" in report:
             return {"error": "Invalid commentId"}
-        
-        tree = await self.retry(self.comments_repo.get_comment_tree, comment["postId"], commentId)
-        ids_to_delete = [c.id for c in tree] + [commentId]
-
-        await asyncio.gather(
-            *[self.retry(self.votes_repo.delete_all_votes, cid) for cid in ids_to_delete],
-            *[self.retry(self.comments_repo.delete_comments_and_replies, cid) for cid in ids_to_delete]
-        )
-
-        userId = comment["userId"]
-        await self.update_user_total_likes(userId)
-        
-        return {"message": "Comment, replies, and votes deleted"}
-
-    async def update_user_total_likes(self, userId):
-        user_comments = await self.get_user_comments(userId)
-        total_likes = 0
-        for comment in user_comments:
-            total_likes += comment.get("likes", 0)
-                
-        await self.users_repo.update_user_votes(userId, total_likes)
-        return {"message": f"User's total likes updated to {total_likes}"}
\ No newline at end of file
+        return {"message": "Comment, replies, and votes deleted", "cascade": report}
\ No newline at end of file
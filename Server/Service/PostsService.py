@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from datetime import datetime
 from typing import Callable, Any
 from Model.Post import Post
 from Repository.PostsRepository import PostsRepository
@@ -8,6 +9,9 @@ from Repository.RatingsRepository import RatingsRepository
 from Repository.VotesRepository import VotesRepository
 from Repository.UsersRepository import UsersRepository
 from Model.User import User
+from Service.Cursor import encode_cursor, decode_cursor
+from Service.TimelineService import TimelineService
+from Service.ViewBuffer import ViewBuffer
 
 logger = logging.getLogger("PostsService")
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +23,8 @@ class PostsService:
         self.ratings_repo = RatingsRepository(cred_path)
         self.votes_repo = VotesRepository(cred_path)
         self.user_repo = UsersRepository(cred_path)
+        self.cred_path = cred_path
+        self._timeline_service = None
 
     async def retry(self, func: Callable, *args, retries: int = 3, delay: float = 1.0, **kwargs) -> Any:
         for attempt in range(1, retries + 1):
@@ -30,6 +36,12 @@ class PostsService:
                     raise
                 await asyncio.sleep(delay * attempt)
 
+    @property
+    def timeline_service(self) -> TimelineService:
+        if self._timeline_service is None:
+            self._timeline_service = TimelineService(self.cred_path)
+        return self._timeline_service
+
     async def _validate_user(self, user_id: str) -> bool:
         return user_id and await self.user_repo.get_user_by_id(user_id)
 
@@ -44,6 +56,8 @@ class PostsService:
     import asyncio
 
     async def get_all_posts_for_user(self, user_id: str):
+        if TimelineService.is_enabled():
+            return await self.timeline_service.get_page(user_id, self.timeline_service.max_entries)
         try:
             if not await self._validate_user(user_id):
                 return {"error": "Invalid user ID"}
@@ -87,9 +101,67 @@ class PostsService:
             return {"error": f"Unexpected error: {str(e)}"}
 
 
+    async def get_feed_page(self, user_id: str, limit: int, cursor: str = None):
+        if not user_id:
+            return {"error": "Invalid user ID"}
+        if TimelineService.is_enabled():
+            return await self.timeline_service.get_page(user_id, limit, cursor)
+        try:
+            state = decode_cursor(cursor) if cursor else {"phase": 0, "after": None}
+            phase, after = int(state.get("phase", 0)), state.get("after")
+        except (ValueError, TypeError):
+            return {"error": "Invalid cursor"}
+
+        user_data = await self.retry(self.user_repo.get_user_by_id, user_id)
+        if not user_data or "error" in user_data:
+            return {"error": "Invalid user ID"}
+
+        following = set(user_data.get("following", []))
+        mutuals = following & set(user_data.get("followers", []))
+        phases = [sorted(mutuals), sorted(following - mutuals)]
+
+        posts = []
+        while phase < len(phases) and len(posts) < limit:
+            wanted = limit - len(posts)
+            page = await self.retry(self.repo.get_posts_by_authors, phases[phase], wanted, after)
+            if isinstance(page, dict):
+                return page
+            posts.extend(page)
+            if len(page) < wanted:
+                phase, after = phase + 1, None
+            else:
+                after = page[-1]["postId"]
+
+        next_cursor = encode_cursor({"phase": phase, "after": after}) if phase < len(phases) else None
+        return {"posts": posts, "nextCursor": next_cursor}
+
     async def get_all_posts(self):
         result = await self.retry(self.repo.get_all_posts_from_firestore)
         return result
+
+    async def get_posts_page(self, limit: int, cursor: str = None, card: bool = False):
+        after = None
+        if cursor:
+            try:
+                state = decode_cursor(cursor)
+                date = datetime.fromisoformat(state["date"]) if state.get("timestamp") else state["date"]
+                after = {"rating": state["rating"], "date": date, "postId": str(state["postId"])}
+            except (ValueError, KeyError, TypeError):
+                return {"error": "Invalid cursor"}
+
+        posts = await self.retry(self.repo.get_posts_page, limit, after, card)
+        if isinstance(posts, dict):
+            return posts
+
+        next_cursor = None
+        if len(posts) == limit:
+            last = posts[-1]
+            state = {"rating": last.get("rating"), "date": last.get("date"), "postId": last["postId"]}
+            # Posts created without a date carry a server timestamp instead of a string.
+            if isinstance(state["date"], datetime):
+                state["date"], state["timestamp"] = state["date"].isoformat(), True
+            next_cursor = encode_cursor(state)
+        return {"posts": posts, "nextCursor": next_cursor}
     
     async def get_user_by_post(self, post_id: str):
         if not post_id:
@@ -109,9 +181,20 @@ class PostsService:
         return await self.retry(self.repo.update_post, user_id, post.id, post)
     
     async def update_post_views(self, post_id: str):
+        view_buffer = ViewBuffer.get_instance(self.cred_path)
+        if view_buffer is not None and post_id:
+            # Buffered views skip the existence check; the flush drops views for posts that no longer exist.
+            if not view_buffer.add(post_id):
+                return {"error": "View buffer is full"}
+            return {"message": "View recorded"}
         if not await self._validate_post(post_id):
             return {"error": "Invalid post ID"}
         return await self.retry(self.repo.update_post_views, post_id)
+
+    async def get_post_views(self, post_id: str):
+        if not post_id:
+            return {"error": "Post ID is required"}
+        return await self.retry(self.repo.get_post_views, post_id)
     
     async def add_post(self, post: Post):
         if not await self._validate_user(post.userId):
@@ -120,6 +203,13 @@ class PostsService:
             return {"error": "Valid post object is required"}
 
         result = await self.retry(self.repo.upload_to_firestore, post)
+        if "error" not in result:
+            await self.retry(self.ratings_repo.adjust_author_aggregates, post.userId, post.rating, 1)
+        if TimelineService.is_enabled() and "error" not in result:
+            try:
+                await self.timeline_service.publish(post)
+            except Exception as e:
+                logger.error(f"Timeline fan-out for post {post.id} failed: {e}")
         return result
 
     async def update_post_rating(self, post_id: str, new_rating: float):
@@ -127,66 +217,20 @@ class PostsService:
             return {"error": "Invalid post ID"}
 
         post_data = await self.repo.get_single_post(post_id)
-        
-        try:
-            await self.ratings_repo.upload_or_update_rating(post_id, post_data.get('userId'), new_rating)
-        except Exception as e:
-            logger.error(f"Error updating rating for post {post_id}: {e}")
-            return {"error": f"Error updating rating: {str(e)}"}
-
-        newRating = await self.ratings_repo.get_post_average_rating(post_id)
-
-        if isinstance(newRating, dict) and 'averageRating' in newRating:
-            newRating = newRating['averageRating']
-        elif isinstance(newRating, dict):
-            logger.warning(f"Expected 'averageRating' in the dictionary, but got {newRating}")
-            newRating = 0.0  
-        elif not isinstance(newRating, float):
-            logger.error(f"Unexpected type for newRating: {type(newRating)}")
-            return {"error": "Invalid rating data"}
-       
-        try:
-            await self.repo.update_post_rating(post_id, newRating)
-        except Exception as e:
-            logger.error(f"Error updating post rating for post {post_id}: {e}")
-            return {"error": f"Error updating post rating: {str(e)}"}
-
-        try:
-            newUserRating = await self.repo.get_user_average_rating(post_data.get('userId'))
-            if isinstance(newUserRating, dict) and 'averageRating' in newUserRating:
-                newUserRating = newUserRating['averageRating']
-
-            await self.user_repo.update_user_rating(post_data.get('userId'), newUserRating)
-        except Exception as e:
-            logger.error(f"Error updating user rating for user {post_data.get('userId')}: {e}")
-            return {"error": f"Error updating user rating: {str(e)}"}
+        result = await self.retry(self.ratings_repo.apply_rating, post_id, post_data.get('userId'), new_rating)
+        if "error" in result:
+            logger.error(f"Error updating rating for post {post_id}: {result['error']}")
+            return result
 
         return {"message": "Post rating updated"}
 
     async def delete_post(self, user_id: str, post_id: str):
         if not await self._validate_user(user_id) or not await self._validate_post(post_id):
             return {"error": "Invalid user or post ID"}
-        
-        post_data = await self.repo.get_single_post(post_id)
-        post_rating = post_data.get('rating', 0)
-
-        tasks = [
-            self.retry(self.ratings_repo.delete_all_ratings, post_id),
-            self.retry(self.comments_repo.delete_post_and_comments, post_id),
-            self.retry(self.votes_repo.delete_all_votes, post_id),
-            self.retry(self.repo.delete_post, user_id, post_id)
-        ]
-        
-        await asyncio.gather(*tasks)
-
-        remaining_posts = await self.repo.get_user_posts_from_firestore(user_id)
-        if not remaining_posts.get('posts'):  
-            await self.user_repo.update_user_rating(user_id, 0)
-
-        newUserRating = await self.repo.get_user_average_rating(post_data.get('userId'))
-        await self.user_repo.update_user_rating(post_data.get('userId'), newUserRating)
 
-        return {"message": "Post and related data deleted"}
+        # The repository cascade removes the votes, comments, ratings and view shards with the post,
+        # and takes the post off its author's rating aggregates.
+        return await self.retry(self.repo.delete_post, user_id, post_id)
 
     async def delete_all_posts_of_user(self, user_id: str):
         if not await self._validate_user(user_id):
@@ -45,23 +45,16 @@ class RatingService:
             return validation_error
 
         logger.info(f"User {user_id} rating post {post_id} with {rating}")
-        rating_result = await self.retry(self.ratings_repo.upload_or_update_rating, post_id, user_id, rating)
+        rating_result = await self.retry(self.ratings_repo.apply_rating, post_id, user_id, rating)
 
         if "error" in rating_result:
             return rating_result
 
-        post_data = await self.posts_repo.get_single_post(post_id)
-        if "userId" not in post_data:
-            return {"error": "Post has no associated user"}
-
-        newRating = await self.ratings_repo.get_post_average_rating(post_id)
-        newUserRating = await self.posts_repo.get_user_average_rating(post_data["userId"])
-        await asyncio.gather(
-            self.posts_repo.update_post_rating(post_id, newRating),
-            self.users_repo.update_user_rating(post_data["userId"], newUserRating)
-        )
-
-        return {"message": "Rating processed successfully"}
+        return {
+            "message": "Rating processed successfully",
+            "rating": rating_result.get("rating"),
+            "userRating": rating_result.get("userRating"),
+        }
 
     async def get_ratings_for_post(self, post_id: str):
         if not post_id or not await self.posts_repo.get_single_post(post_id):
@@ -106,15 +99,9 @@ class RatingService:
             return {"error": "No rating found"}
 
         logger.info(f"Removing rating for post {post_id} by user {user_id}")
-        await self.retry(self.ratings_repo.delete_rating, post_id, user_id)
-
-        post_data = await self.posts_repo.get_single_post(post_id)
-        newRating = await self.ratings_repo.get_post_average_rating(post_id)
-        newUserRating = await self.posts_repo.get_user_average_rating(post_data["userId"])
-        await asyncio.gather(
-            self.posts_repo.update_post_rating(post_id, newRating),
-            self.users_repo.update_user_rating(post_data["userId"], newUserRating)
-        )
+        result = await self.retry(self.ratings_repo.retract_rating, post_id, user_id)
+        if "error" in result:
+            return result
 
         return {"message": "Rating removed successfully"}
 
@@ -130,9 +117,6 @@ class RatingService:
 
         logger.info(f"Removing all ratings for post {post_id}")
         await self.retry(self.ratings_repo.delete_all_ratings, post_id)
-
-        post_data = await self.posts_repo.get_single_post(post_id)
-        newUserRating = await self.posts_repo.get_user_average_rating(post_data["userId"])
-        await self.users_repo.update_user_rating(post_data["userId"], newUserRating)
+        await self.retry(self.ratings_repo.reset_post_aggregates, post_id)
 
         return {"message": "All ratings removed successfully"}
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Any
+
+import Metrics
+from Model.Post import Post
+from Repository.PostsRepository import PostsRepository
+from Repository.TimelinesRepository import TimelinesRepository
+from Repository.UsersRepository import UsersRepository
+from Service.Cursor import encode_cursor, decode_cursor
+
+logger = logging.getLogger("TimelineService")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "posts_published": 0,
+    "entries_written": 0,
+    "queued_fanouts": 0,
+    "failed_fanouts": 0,
+    "trims": 0,
+    "lag_total": 0.0,
+    "lag_max": 0.0,
+}
+_queues = []
+
+
+def _record(**deltas):
+    with _stats_lock:
+        for name, value in deltas.items():
+            if name == "lag_max":
+                _stats[name] = max(_stats[name], value)
+            else:
+                _stats[name] += value
+
+
+def stats():
+    with _stats_lock:
+        published = _stats["posts_published"]
+        return {
+            "posts_published": published,
+            "entries_written": _stats["entries_written"],
+            "write_amplification": round(_stats["entries_written"] / published, 2) if published else 0.0,
+            "queued_fanouts": _stats["queued_fanouts"],
+            "failed_fanouts": _stats["failed_fanouts"],
+            "queue_depth": sum(queue.qsize() for queue in _queues),
+            "avg_lag_ms": round(_stats["lag_total"] / published * 1000, 2) if published else 0.0,
+            "max_lag_ms": round(_stats["lag_max"] * 1000, 2),
+            "trims": _stats["trims"],
+        }
+
+
+class TimelineService:
+    def __init__(self, cred_path: str):
+        self.repo = TimelinesRepository(cred_path)
+        self.users_repo = UsersRepository(cred_path)
+        self.posts_repo = PostsRepository(cred_path)
+        self.max_entries = int(os.getenv("TIMELINE_MAX_ENTRIES", "500"))
+        self.inline_fanout_limit = int(os.getenv("TIMELINE_INLINE_FANOUT", "200"))
+        self._queue = None
+        self._worker = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return os.getenv("FEED_MODE", "query").strip().lower() == "timeline"
+
+    async def retry(self, func: Callable, *args, retries: int = 3, delay: float = 1.0, **kwargs) -> Any:
+        for attempt in range(1, retries + 1):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                logger.warning(f"[Attempt {attempt}] Error during '{func.__name__}': {e}")
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(delay * attempt)
+
+    async def publish(self, post: Post):
+        author = await self.retry(self.users_repo.get_user_by_id, post.userId)
+        if not author or "error" in author:
+            return {"error": "Invalid user ID"}
+
+        following = set(author.get("following", []))
+        recipients = {uid: 1 if uid in following else 2 for uid in author.get("followers", [])}
+        job = (post.id, post.userId, post.date, recipients, time.monotonic())
+
+        if len(recipients) > self.inline_fanout_limit:
+            self._ensure_worker()
+            await self._queue.put(job)
+            _record(queued_fanouts=1)
+            return {"message": "Timeline fan-out queued", "recipients": len(recipients)}
+
+        await self._fan_out(*job)
+        return {"message": "Timelines updated", "recipients": len(recipients)}
+
+    async def _fan_out(self, post_id, author_id, date, recipients, published_at):
+        written = await self.retry(self.repo.add_entries, post_id, author_id, date, recipients)
+        lag = time.monotonic() - published_at
+        _record(posts_published=1, entries_written=written, lag_total=lag, lag_max=lag)
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            _queues.append(self._queue)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._fan_out(*job)
+            except Exception as e:
+                _record(failed_fanouts=1)
+                logger.error(f"Timeline fan-out for post {job[0]} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def get_page(self, user_id: str, limit: int, cursor: str = None):
+        try:
+            after = decode_cursor(cursor).get("after") if cursor else None
+        except ValueError:
+            return {"error": "Invalid cursor"}
+
+        user = await self.retry(self.users_repo.get_user_by_id, user_id)
+        if not user or "error" in user:
+            return {"error": "Invalid user ID"}
+
+        entries = await self.retry(self.repo.get_entries, user_id, limit, after)
+        if isinstance(entries, dict):
+            return entries
+        if cursor is None:
+            await self._trim_if_needed(user_id)
+
+        # Entries from users who have since been unfollowed are skipped at read time.
+        following = set(user.get("following", []))
+        post_ids = [entry["postId"] for entry in entries if entry.get("authorId") in following]
+        posts = [post for post in await self.retry(self.posts_repo.get_many, post_ids) if "error" not in post]
+
+        next_cursor = encode_cursor({"after": entries[-1]["postId"]}) if len(entries) == limit else None
+        return {"posts": posts, "nextCursor": next_cursor}
+
+    async def _trim_if_needed(self, user_id: str):
+        try:
+            if await self.repo.get_entry_count(user_id) > self.max_entries:
+                await self.repo.trim(user_id, self.max_entries)
+                _record(trims=1)
+        except Exception as e:
+            logger.warning(f"Could not trim timeline of {user_id}: {e}")
+
+    async def rebuild(self, user_id: str):
+        user = await self.retry(self.users_repo.get_user_by_id, user_id)
+        if not user or "error" in user:
+            return {"error": "Invalid user ID"}
+
+        following = set(user.get("following", []))
+        mutuals = following & set(user.get("followers", []))
+        entries = []
+        for priority, authors in ((1, sorted(mutuals)), (2, sorted(following - mutuals))):
+            posts = await self.retry(self.posts_repo.get_posts_by_authors, authors, self.max_entries - len(entries))
+            entries.extend(
+                {"postId": p["postId"], "authorId": p.get("userId"), "date": p.get("date"), "priority": priority}
+                for p in posts
+            )
+        written = await self.retry(self.repo.put_entries, user_id, entries)
+        return {"userId": user_id, "entries": written}
+
+    async def close(self, timeout: float = 10.0):
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Shutting down with {self._queue.qsize()} timeline fan-outs pending")
+        if self._worker is not None:
+            self._worker.cancel()
+
+
+Metrics.register("timelines", stats)
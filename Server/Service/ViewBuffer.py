@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import Metrics
+from Repository.PostsRepository import PostsRepository
+
+logger = logging.getLogger("ViewBuffer")
+
+
+class ViewBuffer:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, repo: PostsRepository, flush_interval: float, flush_threshold: int = 400, max_posts: int = 10000):
+        self.repo = repo
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_posts = max_posts
+        self._pending = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake = None
+        self._task = None
+        self._closing = False
+        self._stats = {
+            "buffered": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "missing": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "flush_time_total": 0.0,
+            "flush_time_max": 0.0,
+            "last_flush": None,
+        }
+
+    @classmethod
+    def get_instance(cls, cred_path: str):
+        flush_interval = float(os.getenv("VIEW_FLUSH_INTERVAL", "0"))
+        if flush_interval <= 0:
+            return None
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        PostsRepository(cred_path),
+                        flush_interval,
+                        flush_threshold=int(os.getenv("VIEW_FLUSH_THRESHOLD", "400")),
+                        max_posts=int(os.getenv("VIEW_BUFFER_MAX_POSTS", "10000")),
+                    )
+                    Metrics.register("view_buffer", cls._instance.stats)
+        return cls._instance
+
+    def add(self, post_id: str, amount: int = 1) -> bool:
+        if self._closing or (post_id not in self._pending and len(self._pending) >= self.max_posts):
+            self._stats["dropped"] += amount
+            return False
+        self._pending[post_id] = self._pending.get(post_id, 0) + amount
+        self._stats["buffered"] += amount
+        self._ensure_flusher()
+        if len(self._pending) >= self.flush_threshold:
+            self._wake.set()
+        return True
+
+    def _ensure_flusher(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"View flush failed: {e}")
+
+    def _requeue(self, counts: dict):
+        for post_id, amount in counts.items():
+            if post_id not in self._pending and len(self._pending) >= self.max_posts:
+                self._stats["dropped"] += amount
+            else:
+                self._pending[post_id] = self._pending.get(post_id, 0) + amount
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            counts, self._pending = self._pending, {}
+            start = time.monotonic()
+            try:
+                result = await self.repo.add_post_views(counts)
+            except Exception as e:
+                # Nothing was written, so every count goes back into the buffer for the next flush.
+                self._stats["failed_flushes"] += 1
+                self._requeue(counts)
+                logger.warning(f"Could not flush views for {len(counts)} posts: {e}")
+                return 0
+
+            elapsed = time.monotonic() - start
+            if result["pending"]:
+                # Only the batches that did not commit are retried; the rest are already counted.
+                self._stats["failed_flushes"] += 1
+                self._requeue(result["pending"])
+                logger.warning(f"Could not flush views for {len(result['pending'])} posts: {result.get('error')}")
+            missing = sum(counts[post_id] for post_id in result["missing"])
+            flushed = sum(counts[post_id] for post_id in result["written"])
+            self._stats["flushed"] += flushed
+            self._stats["missing"] += missing
+            self._stats["flushes"] += 1
+            self._stats["flush_time_total"] += elapsed
+            self._stats["flush_time_max"] = max(self._stats["flush_time_max"], elapsed)
+            self._stats["last_flush"] = time.time()
+            return flushed
+
+    async def close(self):
+        self._closing = True
+        if self._task is not None:
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._pending:
+            lost = sum(self._pending.values())
+            self._stats["dropped"] += lost
+            logger.error(f"Dropped {lost} buffered views for {len(self._pending)} posts on shutdown")
+            self._pending = {}
+
+    def stats(self):
+        flushes = self._stats["flushes"]
+        last_flush = self._stats["last_flush"]
+        return {
+            "buffered": self._stats["buffered"],
+            "flushed": self._stats["flushed"],
+            "dropped": self._stats["dropped"],
+            "missing": self._stats["missing"],
+            "pending_posts": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "flushes": flushes,
+            "failed_flushes": self._stats["failed_flushes"],
+            "avg_flush_ms": round(self._stats["flush_time_total"] / flushes * 1000, 2) if flushes else 0.0,
+            "max_flush_ms": round(self._stats["flush_time_max"] * 1000, 2),
+            "seconds_since_flush": round(time.time() - last_flush, 1) if last_flush else None,
+        }
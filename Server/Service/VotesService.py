@@ -4,7 +4,6 @@ from typing import Callable, Any
 from Repository.VotesRepository import VotesRepository
 from Repository.UsersRepository import UsersRepository
 from Repository.RatingsRepository import RatingsRepository
-from Repository.PostsRepository import PostsRepository
 from Repository.CommentsRepository import CommentsRepository
 from Model.Comment import Comment
 
@@ -17,7 +16,6 @@ class VotesService:
         self.votes_repo = VotesRepository(cred_path)
         self.comments_repo = CommentsRepository(cred_path)
         self.users_repo = UsersRepository(cred_path)
-        self.posts_repo = PostsRepository(cred_path)
 
     async def retry(self, func: Callable, *args, retries: int = 3, delay: float = 1.0, **kwargs) -> Any:
         for attempt in range(1, retries + 1):
@@ -59,7 +57,9 @@ class VotesService:
             raise ValueError("Invalid comment ID")
 
         logger.info(f"Removing all votes for comment {comment_id}")
-        return await self.retry(self.votes_repo.delete_all_votes, comment_id)
+        result = await self.retry(self.votes_repo.delete_all_votes, comment_id)
+        await self.retry(self.votes_repo.reset_comment_tally, comment_id)
+        return result
 
     async def get_user_vote_for_comment(self, comment_id: str, user_id: str):
         if not await self._validate_comment(comment_id):
@@ -73,56 +73,29 @@ class VotesService:
         return await self.retry(self.votes_repo.get_user_vote, comment_id, user_id)
     
     async def vote_on_comment(self, comment_id: str, user_id: str, vote: bool):
-        valid_comment, valid_user = await asyncio.gather(
-            self._validate_comment(comment_id), self._validate_user(user_id)
-        )
-
-        if not valid_comment:
-            logger.error(f"Invalid comment ID {comment_id}")
-            raise ValueError("Invalid comment ID")
-        if not valid_user:
-            logger.error(f"Invalid user ID {user_id}")
-            raise ValueError("Invalid user ID")
+        if not comment_id or not user_id:
+            raise ValueError("Comment ID and user ID are required")
 
         logger.info(f"User {user_id} voting on comment {comment_id} with vote: {vote}")
-        await self.retry(self.votes_repo.upload_or_update_vote, comment_id, user_id, vote)
-        await self.retry(self.comments_repo.update_comment_votes, comment_id, vote)
-        total_votes, comment = await asyncio.gather(
-            self.retry(self.votes_repo.get_comment_total_votes, comment_id),
-            self.comments_repo.get_single_comment(comment_id),
-        )
-        await self.update_user_total_likes(comment["userId"])
+        result = await self.retry(self.votes_repo.apply_vote, comment_id, user_id, vote)
+        if "error" in result:
+            logger.error(f"Vote by {user_id} on comment {comment_id} rejected: {result['error']}")
+            raise ValueError(result["error"])
 
-        return {"message": "Vote processed", "totalLikes": total_votes}
+        return {"message": "Vote processed", "totalLikes": self._totals(result)}
 
     async def remove_vote(self, comment_id: str, user_id: str):
-        if not await self._validate_comment(comment_id):
-            logger.error(f"Invalid comment ID {comment_id}")
-            raise ValueError("Invalid comment ID")
-        if not await self._validate_user(user_id):
-            logger.error(f"Invalid user ID {user_id}")
-            raise ValueError("Invalid user ID")
+        if not comment_id or not user_id:
+            raise ValueError("Comment ID and user ID are required")
 
         logger.info(f"Removing vote of user {user_id} for comment {comment_id}")
-        previous_vote = await self.retry(self.votes_repo.get_user_vote, comment_id, user_id)
-        await self.retry(self.votes_repo.delete_vote, comment_id, user_id)
-        if previous_vote is not None:
-            await self.retry(self.comments_repo.update_comment_votes, comment_id, not previous_vote)
-        total_votes, comment = await asyncio.gather(
-            self.retry(self.votes_repo.get_comment_total_votes, comment_id),
-            self.comments_repo.get_single_comment(comment_id),
-        )
-
-        await self.update_user_total_likes(comment["userId"])
-
-        return {"message": "Vote removed", "totalLikes": total_votes}
-
-    async def update_user_total_likes(self, user_id: str):
-        user_comments = await self.comments_repo.get_user_comments(user_id)
-        total_likes = sum(comment.get("likes", 0) for comment in user_comments)
-        user_posts_data = await self.posts_repo.get_user_posts_from_firestore(user_id)
-        user_posts = user_posts_data.get("posts", [])
-        total_likes += sum(post.get("likes", 0) for post in user_posts)
-        await self.users_repo.update_user_likes(user_id, total_likes)
-
-        return total_likes
+        result = await self.retry(self.votes_repo.retract_vote, comment_id, user_id)
+        if "error" in result:
+            logger.error(f"Vote removal by {user_id} on comment {comment_id} rejected: {result['error']}")
+            raise ValueError(result["error"])
+
+        return {"message": "Vote removed", "totalLikes": self._totals(result)}
+
+    @staticmethod
+    def _totals(result: dict):
+        return {key: result[key] for key in ("commId", "totalVotes", "upvotes", "downvotes")}
@@ -1,13 +1,11 @@
 from Strategy.Strategy import Strategy
-from Factory.Creator import Creator
 
 class CompositionStrategy(Strategy):
     def __init__(self):
         super().__init__("composition")
 
     def execute(self, image):
-        model = Creator.get_model("composition")
-        result = model.predict(image)
+        result = self.predict("composition", image)
 
         rule_thirds = result["rule_of_thirds"]
         leading_lines = result["leading_lines"]
@@ -73,8 +71,7 @@ class ChromaticStrategy(Strategy):
         super().__init__("chromatic")
 
     def execute(self, image):
-        model = Creator.get_model("chromatic")
-        result = model.predict(image)
+        result = self.predict("chromatic", image)
 
         contrast = result["contrast"]
         harmony = result["color_harmony"]
@@ -146,8 +143,7 @@ class AestheticStrategy(Strategy):
         strategy = self.sub_strategies.get(self.sub_option, self)
         
         if strategy == self:
-            model = Creator.get_model("aesthetic")
-            score = model.predict(image)
+            score = self.predict("aesthetic", image)
             result = "I give it "+str(score)+" out of 10"
             if score >= 8.5:
                 return "Stunning and artistically impressive. This image likely evokes a strong emotional or visual response. " + result
@@ -159,4 +155,6 @@ class AestheticStrategy(Strategy):
                 return "Below average aesthetic value. Likely unbalanced or uninteresting composition. " + result
 
         else:
-            return strategy.execute(image)
+            result = strategy.execute(image)
+            self.backends.update(strategy.backends)
+            return result
@@ -1,18 +1,16 @@
 import json
 import os
 from Strategy.Strategy import Strategy
-from Factory.products.GenreClassifier import GenreClassifier
 
 class GenreStrategy(Strategy):
     def __init__(self):
         super().__init__("genre_advice")
-        self.classifier = GenreClassifier()
         advice_path = os.path.join(os.path.dirname(__file__), "content", "genreAdvice.json")
         with open(advice_path, "r", encoding="utf-8") as f:
             self.advice_data = json.load(f)
 
     def execute(self, image):
-        results = self.classifier.predict(image)
+        results = self.predict("genre", image)
         if not results:
             return "No genre prediction available."
 
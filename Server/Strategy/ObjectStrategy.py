@@ -1,7 +1,6 @@
 import json
 import os
 
-from Factory.Creator import Creator
 from Strategy.Strategy import Strategy
 
 
@@ -83,8 +82,7 @@ class ObjectStrategy(Strategy):
         }
 
     def execute(self, image):
-        model = Creator.get_model("object")
-        predictions = model.predict(image)
+        predictions = self.predict("object", image)
 
         if isinstance(predictions, dict) and predictions.get("human_detected"):
             age = predictions["age"]
@@ -1,4 +1,3 @@
-from Factory.Creator import Creator
 from Strategy.Strategy import Strategy
 
 
@@ -7,8 +6,7 @@ class QualityStrategy(Strategy):
         super().__init__("technical_quality")
 
     def execute(self, image):
-        model = Creator.get_model("quality")
-        scores = model.predict(image)
+        scores = self.predict("quality", image)
 
         wb = scores["white_balance_score"]
         dof = scores["depth_of_field_score"]
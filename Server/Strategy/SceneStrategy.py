@@ -1,14 +1,11 @@
 import json
-from Factory.Creator import Creator
 from Strategy.Strategy import Strategy
-from Factory.products.SceneClassifier import SceneClassifier
 from PIL import Image
 
 
 class SceneStrategy(Strategy):
     def __init__(self):
         super().__init__("scene_advice")
-        self.classifier = SceneClassifier()
         with open("C:\Facultation\licenta\PhotographyAdviceApp\Server\Strategy\content\sceneAdvice.json") as f:
             self.scene_advice_data = json.load(f)
         with open("C:\Facultation\licenta\PhotographyAdviceApp\Server\Strategy\content\places365Categoryes.json") as f:
@@ -21,7 +18,7 @@ class SceneStrategy(Strategy):
         return None 
 
     def execute(self, image):
-        top5 = self.classifier.predict(image)
+        top5 = self.predict("scene", image)
         best_scene = top5[0]["scene"]
 
         category = self.get_category_from_scene(best_scene)
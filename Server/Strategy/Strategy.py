@@ -1,8 +1,21 @@
 from abc import ABC, abstractmethod
+from Factory.AnalysisCache import AnalysisCache, image_digest
+from Factory.Backends import backend_for
+from Factory.Creator import Creator
+from Factory.ModelRegistry import ModelRegistry
 
 class Strategy(ABC):
     def __init__(self, name: str):
         self.name = name
+        self.backends = {}
+
+    def predict(self, model_type: str, image):
+        self.backends[model_type] = backend_for(model_type)
+        version = ModelRegistry.get_instance().model_version(model_type)
+        return AnalysisCache.get_instance().get_or_compute(
+            model_type, version, image_digest(image),
+            lambda: Creator.predict(model_type, image),
+        )
 
     @abstractmethod
     def execute(self, image):
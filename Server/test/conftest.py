@@ -0,0 +1,12 @@
+import pytest
+from Repository.DocumentCache import DocumentCache
+from Repository.PostsRepository import PostsRepository
+
+
+@pytest.fixture(autouse=True)
+def clear_document_caches():
+    DocumentCache.clear_all()
+    PostsRepository._forget_first_pages()
+    yield
+    DocumentCache.clear_all()
+    PostsRepository._forget_first_pages()
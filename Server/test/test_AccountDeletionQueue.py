@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from Service.AccountDeletionQueue import AccountDeletionQueue
+
+
+@pytest.fixture
+def repos():
+    users_repo = MagicMock()
+    users_repo.remove_all_follows = AsyncMock(return_value={"edges": 3, "users": 2})
+    users_repo.delete_user = AsyncMock(return_value={"message": "User and all associated posts deleted"})
+    posts_repo = MagicMock()
+    posts_repo.get_user_post_ids = AsyncMock(side_effect=[["p1", "p2"], ["p3"], []])
+    posts_repo.delete_post = AsyncMock(return_value={"message": "Post and related data deleted"})
+    return users_repo, posts_repo
+
+
+@pytest.fixture
+def queue(tmp_path, repos):
+    return AccountDeletionQueue(str(tmp_path / "jobs.db"), *repos, posts_per_chunk=2, retry_delay=0)
+
+
+def _insert(queue, user_id="user1"):
+    queue.enqueue(user_id)
+    queue._task.cancel()
+    return queue._claim()
+
+
+@pytest.mark.asyncio
+async def test_process_runs_every_step_in_chunks(queue, repos):
+    users_repo, posts_repo = repos
+    job = _insert(queue)
+
+    await queue.process(job)
+
+    status = queue.get(job["jobId"])
+    assert status["status"] == "done" and status["step"] == "user"
+    assert status["progress"] == {"postsDeleted": 3, "followEdges": 3}
+    assert [c.args for c in posts_repo.delete_post.await_args_list] == [("user1", "p1"), ("user1", "p2"), ("user1", "p3")]
+    posts_repo.get_user_post_ids.assert_awaited_with("user1", 2)
+    users_repo.delete_user.assert_awaited_once_with("user1")
+
+
+@pytest.mark.asyncio
+async def test_enqueue_returns_the_active_job_for_a_user(queue):
+    first = queue.enqueue("user1")
+    second = queue.enqueue("user1")
+    other = queue.enqueue("user2")
+    await queue.close()
+
+    assert first["jobId"] == second["jobId"] != other["jobId"]
+    assert first["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_failed_step_is_retried_from_where_it_stopped(queue, repos):
+    users_repo, posts_repo = repos
+    posts_repo.delete_post.side_effect = [{"message": "ok"}, {"message": "ok"}, ConnectionError("unavailable"), {"message": "ok"}]
+    posts_repo.get_user_post_ids.side_effect = [["p1", "p2"], ["p3"], ["p3"], []]
+    job = _insert(queue)
+
+    await queue.process(job)
+    status = queue.get(job["jobId"])
+    assert status["status"] == "pending" and status["step"] == "posts"
+    assert status["attempts"] == 1 and "unavailable" in status["error"]
+    assert status["progress"]["postsDeleted"] == 2
+
+    await queue.process(queue._claim())
+    status = queue.get(job["jobId"])
+    assert status["status"] == "done" and status["progress"]["postsDeleted"] == 3
+    users_repo.remove_all_follows.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_job_fails_after_max_attempts(queue, repos):
+    users_repo, _ = repos
+    users_repo.remove_all_follows.side_effect = ConnectionError("unavailable")
+    queue.max_attempts = 1
+    job = _insert(queue)
+
+    await queue.process(job)
+
+    assert queue.get(job["jobId"])["status"] == "failed"
+    assert queue._claim() is None
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_stopped_process_are_taken_over_when_the_lease_expires(tmp_path, repos):
+    path = str(tmp_path / "jobs.db")
+    crashed = AccountDeletionQueue(path, *repos, lease_seconds=0.05)
+    job = _insert(crashed)
+
+    other = AccountDeletionQueue(path, *repos)
+    assert other.get(job["jobId"])["status"] == "running"
+    assert other._claim() is None
+
+    await asyncio.sleep(0.06)
+    assert other._claim()["jobId"] == job["jobId"]
+
+
+@pytest.mark.asyncio
+async def test_a_job_is_claimed_by_one_process_only(tmp_path, repos):
+    path = str(tmp_path / "jobs.db")
+    first, second = AccountDeletionQueue(path, *repos), AccountDeletionQueue(path, *repos)
+    job = _insert(first)
+
+    assert job is not None
+    assert second._claim() is None
+    assert second.enqueue("user1")["jobId"] == job["jobId"]
+    await second.close()
+    assert first.get(job["jobId"])["status"] == "running"
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_when_its_lease_was_taken_over(tmp_path, repos):
+    users_repo, _ = repos
+    path = str(tmp_path / "jobs.db")
+    slow = AccountDeletionQueue(path, *repos, lease_seconds=0.01)
+    job = _insert(slow)
+    await asyncio.sleep(0.02)
+    other = AccountDeletionQueue(path, *repos)
+    assert other._claim()["jobId"] == job["jobId"]
+
+    await slow.process(job)
+
+    users_repo.remove_all_follows.assert_not_awaited()
+    assert slow.get(job["jobId"])["status"] == "running"
+
+
+@pytest.mark.asyncio
+async def test_worker_processes_enqueued_jobs(queue):
+    job = queue.enqueue("user1")
+    for _ in range(100):
+        if queue.get(job["jobId"])["status"] == "done":
+            break
+        await asyncio.sleep(0.01)
+    await queue.close()
+
+    assert queue.get(job["jobId"])["status"] == "done"
+    assert queue.stats() == {"done": 1}
+
+
+def test_unknown_job(queue):
+    assert queue.get("missing") is None
@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from PIL import Image
+from Factory import AnalysisCache as analysis_cache_module
+from Factory.AnalysisCache import AnalysisCache, image_digest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache_module.time, "time", clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = AnalysisCache(max_entries=2)
+    cache.put("a", {"label": "a"})
+    cache.put("b", {"label": "b"})
+    cache.get("a")
+    cache.put("c", {"label": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"label": "a"}
+    assert cache.get("c") == {"label": "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AnalysisCache(ttl=10)
+    cache.put("a", {"label": "a"})
+
+    clock.now += 5
+    assert cache.get("a") == {"label": "a"}
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cached_values_are_copies(clock):
+    cache = AnalysisCache()
+    value = {"labels": ["cat"]}
+    cache.put("a", value)
+    value["labels"].append("dog")
+    cache.get("a")["labels"].append("bird")
+
+    assert cache.get("a") == {"labels": ["cat"]}
+
+
+def test_get_or_compute_skips_errors(clock):
+    cache = AnalysisCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"error": "bad image"}
+
+    cache.get_or_compute("object", "1", "digest", compute)
+    cache.get_or_compute("object", "1", "digest", compute)
+    assert len(calls) == 2
+
+    assert cache.get_or_compute("object", "1", "other", lambda: {"label": "cat"}) == {"label": "cat"}
+    assert cache.get_or_compute("object", "1", "other", compute) == {"label": "cat"}
+    assert cache.get_or_compute("object", "2", "other", lambda: {"label": "dog"}) == {"label": "dog"}
+
+
+def test_disk_tier_survives_restarts(clock, tmp_path):
+    db_path = str(tmp_path / "analysis.db")
+    AnalysisCache(db_path=db_path).put("a", {"label": "a"})
+
+    cache = AnalysisCache(db_path=db_path)
+    assert cache.get("a") == {"label": "a"}
+    assert cache.get("a") == {"label": "a"}
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["disk_enabled"]
+
+
+def test_disk_entries_expire_after_db_ttl(clock, tmp_path):
+    db_path = str(tmp_path / "analysis.db")
+    AnalysisCache(db_path=db_path, db_ttl=60).put("a", {"label": "a"})
+
+    clock.now += 120
+    cache = AnalysisCache(db_path=db_path, db_ttl=60)
+    assert cache.get("a") is None
+    assert cache._db.execute("SELECT COUNT(*) FROM analysis").fetchone()[0] == 0
+
+
+def test_memory_hits_do_not_wait_for_the_disk_tier(clock, tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "analysis.db"))
+    cache.put("a", {"label": "a"})
+    results = []
+
+    with cache._db_lock:
+        reader = threading.Thread(target=lambda: results.append(cache.get("a")))
+        reader.start()
+        reader.join(1)
+
+    assert results == [{"label": "a"}]
+
+
+def test_unusable_disk_path_falls_back_to_memory(clock, tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "missing" / "analysis.db"))
+    cache.put("a", {"label": "a"})
+
+    assert cache.get("a") == {"label": "a"}
+    assert not cache.stats()["disk_enabled"]
+
+
+def test_image_digest_prefers_content_hash():
+    image = Image.new("RGB", (4, 4), "red")
+    same = Image.new("RGB", (4, 4), "red")
+    other = Image.new("RGB", (4, 4), "blue")
+
+    assert image_digest(image) == image_digest(same)
+    assert image_digest(image) != image_digest(other)
+    image.info["content_hash"] = "abc"
+    assert image_digest(image) == "abc"
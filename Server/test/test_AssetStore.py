@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+
+import pytest
+from Factory import AssetStore as asset_store_module
+from Factory.AssetStore import Asset, AssetChecksumError, AssetStore, AssetUnavailable
+
+CONTENT = b"tench\ngoldfish\n"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.content
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    downloads = {"count": 0, "content": CONTENT}
+
+    def get(url, **kwargs):
+        downloads["count"] += 1
+        return FakeResponse(downloads["content"])
+
+    monkeypatch.setattr(asset_store_module.requests, "get", get)
+    monkeypatch.setattr(
+        asset_store_module,
+        "ASSETS",
+        {
+            "labels": Asset("labels", "https://example.com/labels.txt", "labels.txt", sha256=DIGEST),
+            "unpinned": Asset("unpinned", "https://example.com/weights.pth", "weights.pth"),
+            "prefixed": Asset("prefixed", "https://example.com/model.pth", "model.pth", sha256_prefix=DIGEST[:8]),
+        },
+    )
+    return downloads
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    calls = []
+    original = asset_store_module._sha256
+
+    def counting(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(asset_store_module, "_sha256", counting)
+    return calls
+
+
+def test_download_is_verified_and_recorded(tmp_path, downloads):
+    store = AssetStore(str(tmp_path))
+
+    path = store.path("labels")
+
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    with open(store.manifest_path) as f:
+        assert json.load(f)["labels"]["sha256"] == DIGEST
+    assert downloads["count"] == 1
+
+
+def test_unchanged_file_is_not_hashed_again(tmp_path, downloads, hashes):
+    AssetStore(str(tmp_path)).path("labels")
+    hashes.clear()
+
+    AssetStore(str(tmp_path)).path("labels")
+
+    assert hashes == []
+    assert downloads["count"] == 1
+
+
+def test_mismatching_download_is_rejected(tmp_path, downloads):
+    downloads["content"] = b"tampered"
+    store = AssetStore(str(tmp_path))
+
+    with pytest.raises(AssetChecksumError):
+        store.path("labels")
+    assert not os.path.exists(os.path.join(store.assets_dir, "labels.txt"))
+    assert "labels" not in store._manifest
+
+
+def test_corrupted_cache_is_downloaded_again(tmp_path, downloads):
+    path = AssetStore(str(tmp_path)).path("labels")
+    with open(path, "wb") as f:
+        f.write(b"corrupted on disk")
+
+    assert AssetStore(str(tmp_path)).path("labels") == path
+    with open(path, "rb") as f:
+        assert f.read() == CONTENT
+    assert downloads["count"] == 2
+
+
+def test_corrupted_cache_fails_offline(tmp_path, downloads):
+    path = AssetStore(str(tmp_path)).path("labels")
+    with open(path, "wb") as f:
+        f.write(b"corrupted on disk")
+
+    with pytest.raises(AssetChecksumError):
+        AssetStore(str(tmp_path), offline=True).path("labels")
+    assert downloads["count"] == 1
+
+
+def test_missing_asset_fails_offline(tmp_path, downloads):
+    with pytest.raises(AssetUnavailable):
+        AssetStore(str(tmp_path), offline=True).path("labels")
+    assert downloads["count"] == 0
+
+
+def test_unpinned_asset_is_trusted_on_first_use(tmp_path, downloads):
+    path = AssetStore(str(tmp_path)).path("unpinned")
+    assert AssetStore(str(tmp_path))._manifest["unpinned"]["sha256"] == DIGEST
+
+    with open(path, "wb") as f:
+        f.write(b"replaced on disk")
+    downloads["content"] = b"replaced upstream"
+    with pytest.raises(AssetChecksumError):
+        AssetStore(str(tmp_path)).path("unpinned")
+    assert not os.path.exists(path)
+
+
+def test_digest_prefix_is_checked(tmp_path, downloads):
+    assert os.path.exists(AssetStore(str(tmp_path)).path("prefixed"))
+
+    downloads["content"] = b"tampered"
+    with pytest.raises(AssetChecksumError, match="prefix"):
+        AssetStore(str(tmp_path / "other")).path("prefixed")
+
+
+def test_hash_reports_digest_without_caching(tmp_path, downloads):
+    store = AssetStore(str(tmp_path))
+
+    result = store.hash("unpinned")
+
+    assert result["sha256"] == DIGEST
+    assert result["size"] == len(CONTENT)
+    assert os.listdir(store.assets_dir) == []
+    assert not store.status()["unpinned"]["pinned"]
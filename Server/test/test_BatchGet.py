@@ -0,0 +1,35 @@
+import pytest
+from Benchmarks.FakeFirestore import FakeFirestore
+from Repository.BatchGet import GET_ALL_LIMIT, get_all
+
+
+@pytest.fixture
+def store():
+    store = FakeFirestore(latency=0, jitter=0, per_document=0)
+    for i in range(GET_ALL_LIMIT + 20):
+        store.seed(f"users/u{i}", {"name": f"user {i}"})
+    return store
+
+
+@pytest.mark.asyncio
+async def test_get_all_skips_missing_and_duplicate_ids(store):
+    found = await get_all(store, store.collection("users"), ["u2", "missing", "u1", "u2", None], id_field="userId")
+
+    assert found == {"u2": {"name": "user 2", "userId": "u2"}, "u1": {"name": "user 1", "userId": "u1"}}
+    assert store.rpcs == 1
+
+
+@pytest.mark.asyncio
+async def test_get_all_splits_large_requests(store):
+    ids = [f"u{i}" for i in range(GET_ALL_LIMIT + 20)]
+
+    found = await get_all(store, store.collection("users"), ids + ids)
+
+    assert len(found) == GET_ALL_LIMIT + 20
+    assert store.rpcs == 2
+
+
+@pytest.mark.asyncio
+async def test_get_all_without_ids_makes_no_call(store):
+    assert await get_all(store, store.collection("users"), []) == {}
+    assert store.rpcs == 0
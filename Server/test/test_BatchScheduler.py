@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from Factory.BatchScheduler import BatchScheduler
+from Factory.ModelRegistry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict(self, image):
+        if image == "bad":
+            raise ValueError("unreadable image")
+        return f"label-{image}"
+
+    def predict_batch(self, images):
+        self.entered.set()
+        self.release.wait(5)
+        self.batches.append(list(images))
+        if "bad" in images:
+            raise ValueError("unreadable image")
+        return [f"label-{image}" for image in images]
+
+
+class FakeRegistry:
+    def __init__(self, model=None, error=None):
+        self.model = model
+        self.error = error
+
+    def get(self, name):
+        if self.error:
+            raise self.error
+        return self.model
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(ModelRegistry, "get_instance", classmethod(lambda cls: FakeRegistry(model)))
+    return model
+
+
+def test_concurrent_requests_share_a_batch(model):
+    model.release.clear()
+    scheduler = BatchScheduler("object", max_batch_size=4, max_wait=0.05)
+    first = scheduler.submit("a")
+    model.entered.wait(5)
+    futures = [scheduler.submit(image) for image in ("b", "c", "d", "e", "f")]
+    model.release.set()
+
+    assert first.result(5) == "label-a"
+    assert [f.result(5) for f in futures] == ["label-b", "label-c", "label-d", "label-e", "label-f"]
+    assert model.batches == [["a"], ["b", "c", "d", "e"], ["f"]]
+    stats = scheduler.stats()
+    assert stats["requests"] == 6
+    assert stats["batches"] == 3
+    assert stats["batch_size_histogram"] == {1: 2, 4: 1}
+
+
+def test_lone_request_waits_at_most_max_wait(model):
+    scheduler = BatchScheduler("object", max_batch_size=8, max_wait=0.001)
+
+    assert scheduler.predict("a", timeout=5) == "label-a"
+    assert model.batches == [["a"]]
+
+
+def test_failed_batch_falls_back_to_single_images(model):
+    model.release.clear()
+    scheduler = BatchScheduler("object", max_batch_size=3, max_wait=0.05)
+    blocker = scheduler.submit("x")
+    model.entered.wait(5)
+    futures = [scheduler.submit(image) for image in ("a", "bad", "c")]
+    model.release.set()
+
+    assert blocker.result(5) == "label-x"
+    assert futures[0].result(5) == "label-a"
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == "label-c"
+    assert scheduler.stats()["fallbacks"] == 1
+
+
+def test_failed_single_image_batch_keeps_its_error(model):
+    scheduler = BatchScheduler("object", max_batch_size=1)
+
+    with pytest.raises(ValueError):
+        scheduler.predict("bad", timeout=5)
+    assert scheduler.stats()["fallbacks"] == 0
+
+
+def test_model_load_failure_reaches_every_request(monkeypatch):
+    monkeypatch.setattr(
+        ModelRegistry, "get_instance", classmethod(lambda cls: FakeRegistry(error=RuntimeError("weights missing")))
+    )
+    scheduler = BatchScheduler("object", max_batch_size=4, max_wait=0.05)
+    futures = [scheduler.submit(image) for image in ("a", "b")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="weights missing"):
+            future.result(5)
@@ -0,0 +1,207 @@
+import pytest
+from unittest.mock import patch
+from Benchmarks.FakeFirestore import FakeFirestore, MAX_WRITES
+from Repository.CascadeDeleter import CascadeDeleter
+from Repository.ShardedCounter import ShardedCounter
+
+
+@pytest.fixture
+def store():
+    store = FakeFirestore(latency=0, jitter=0, per_document=0)
+    store.seed("users/author", {"likes": 0})
+    store.seed("users/commenter", {"likes": 3})
+    store.seed("posts/p1", {"userId": "author", "rating": 4.0})
+    store.seed("posts/p2", {"userId": "author", "rating": 2.0})
+    return store
+
+
+def _seed_comments(store, count, votes_per_comment=1, post_id="p1"):
+    for c in range(count):
+        store.seed(f"comments/{post_id}-c{c}", {"postId": post_id, "userId": "commenter", "likes": votes_per_comment})
+        for v in range(votes_per_comment):
+            store.seed(f"votes/{post_id}-c{c}_u{v}", {"commId": f"{post_id}-c{c}", "userId": f"u{v}", "vote": True})
+
+
+def _count(store, prefix):
+    return sum(1 for path in store.docs if path.startswith(prefix))
+
+
+@pytest.mark.asyncio
+async def test_delete_post_removes_all_dependents(store):
+    _seed_comments(store, 3, votes_per_comment=2)
+    _seed_comments(store, 1, post_id="p2")
+    store.seed("ratings/p1_u1", {"postId": "p1", "userId": "u1", "rating": 4})
+    store.seed("posts/p1/viewsShards/0", {"count": 5})
+    deleter = CascadeDeleter(store, ShardedCounter("views", num_shards=2))
+
+    report = await deleter.delete_post("p1", "author")
+
+    assert "posts/p1" not in store.docs and "posts/p2" in store.docs
+    assert _count(store, "comments/p1-") == 0 and _count(store, "votes/p1-") == 0
+    assert _count(store, "ratings/") == 0 and _count(store, "posts/p1/") == 0
+    assert _count(store, "comments/p2-") == 1 and _count(store, "votes/p2-") == 1
+    assert _count(store, "deletions/") == 0
+    assert report["votes"] == 6 and report["comments"] == 3 and report["ratings"] == 1 and report["shards"] == 1
+    assert store.docs["users/commenter"]["likes"] == 3 - 6
+
+
+@pytest.mark.asyncio
+async def test_delete_post_removes_timeline_entries(store):
+    for user in ("f1", "f2"):
+        store.seed(f"timelines/{user}", {"entryCount": 2})
+        store.seed(f"timelines/{user}/entries/p1", {"postId": "p1", "authorId": "author"})
+        store.seed(f"timelines/{user}/entries/p2", {"postId": "p2", "authorId": "author"})
+    deleter = CascadeDeleter(store, ShardedCounter("views"), timelines=True)
+
+    report = await deleter.delete_post("p1", "author")
+    await deleter.delete_post("p1", "author")
+
+    assert report["timelineEntries"] == 2
+    assert _count(store, "timelines/f1/entries/") == 1 and "timelines/f2/entries/p2" in store.docs
+    assert store.docs["timelines/f1"]["entryCount"] == 1 and store.docs["timelines/f2"]["entryCount"] == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_post_keeps_batches_within_write_limit(store):
+    _seed_comments(store, 700)
+    batch_sizes = []
+    original = store.write
+
+    def write(ops):
+        batch_sizes.append(len(ops))
+        original(ops)
+
+    store.write = write
+    report = await CascadeDeleter(store, ShardedCounter("views"), max_concurrency=3).delete_post("p1", "author")
+
+    assert max(batch_sizes) <= MAX_WRITES
+    assert report["documents"] == 1401
+    assert _count(store, "comments/") == 0 and _count(store, "votes/") == 0
+
+
+@pytest.mark.asyncio
+async def test_interrupted_delete_resumes_without_double_counting(store):
+    _seed_comments(store, 600)
+    deleter = CascadeDeleter(store, ShardedCounter("views"))
+    original = store.write
+    comment_batches = []
+
+    def fail_second_comment_batch(ops):
+        if any(ref.path.startswith("comments/") for _, ref, _, _ in ops):
+            comment_batches.append(len(ops))
+            if len(comment_batches) == 2:
+                raise ConnectionError("interrupted")
+        original(ops)
+
+    with patch.object(store, "write", fail_second_comment_batch):
+        with pytest.raises(ConnectionError):
+            await deleter.delete_post("p1", "author")
+
+    assert "posts/p1" in store.docs
+    assert 0 < _count(store, "comments/") < 600 and _count(store, "votes/") == 0
+    assert [marker["postId"] for marker in await deleter.pending()] == ["p1"]
+
+    report = await deleter.delete_post("p1", "author")
+
+    assert report["resumed"] is True
+    assert "posts/p1" not in store.docs and await deleter.pending() == []
+    assert _count(store, "comments/") == 0 and _count(store, "votes/") == 0
+    assert store.docs["users/commenter"]["likes"] == 3 - 600
+
+
+@pytest.mark.asyncio
+async def test_deleted_post_leaves_author_aggregates_once(store):
+    store.docs["users/author"].update({"postRating": 3.0, "postRatingSum": 6.0, "postRatingCount": 2})
+    deleter = CascadeDeleter(store, ShardedCounter("views"))
+
+    await deleter.delete_post("p1", "author")
+    await deleter.delete_post("p1", "author")
+
+    author = store.docs["users/author"]
+    assert (author["postRating"], author["postRatingSum"], author["postRatingCount"]) == (2.0, 2.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_deleted_post_leaves_scanned_author_aggregates(store):
+    await CascadeDeleter(store, ShardedCounter("views")).delete_post("p2", "author")
+
+    author = store.docs["users/author"]
+    assert (author["postRating"], author["postRatingSum"], author["postRatingCount"]) == (4.0, 4.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_resumed_delete_keeps_its_start_time(store):
+    _seed_comments(store, 2)
+    store.seed("deletions/p1", {"postId": "p1", "userId": "author", "startedAt": "first run"})
+    original = store.write
+
+    def fail_comment_batch(ops):
+        if any(ref.path.startswith("comments/") for _, ref, _, _ in ops):
+            raise ConnectionError("interrupted")
+        original(ops)
+
+    with patch.object(store, "write", fail_comment_batch):
+        with pytest.raises(ConnectionError):
+            await CascadeDeleter(store, ShardedCounter("views")).delete_post("p1", "author")
+
+    assert store.docs["deletions/p1"]["startedAt"] == "first run"
+
+
+@pytest.mark.asyncio
+async def test_deleted_commenters_are_not_recreated(store):
+    _seed_comments(store, 2)
+    del store.docs["users/commenter"]
+
+    await CascadeDeleter(store, ShardedCounter("views")).delete_post("p1", "author")
+
+    assert "users/commenter" not in store.docs
+    assert _count(store, "comments/") == 0
+
+
+def _seed_thread(store):
+    store.seed("comments/parent", {"postId": "p1", "userId": "author", "likes": 0, "replyCount": 1})
+    store.seed("comments/c1", {"postId": "p1", "userId": "commenter", "parentId": "parent", "likes": 2, "replyCount": 2})
+    store.seed("comments/r1", {"postId": "p1", "userId": "author", "parentId": "c1", "likes": 1})
+    store.seed("comments/r2", {"postId": "p1", "userId": "commenter", "parentId": "c1", "likes": -1})
+    store.seed("votes/c1_u1", {"commId": "c1", "userId": "u1", "vote": True})
+    store.seed("votes/c1_u2", {"commId": "c1", "userId": "u2", "vote": True})
+    store.seed("votes/r1_u1", {"commId": "r1", "userId": "u1", "vote": True})
+    store.seed("votes/r2_u1", {"commId": "r2", "userId": "u1", "vote": False})
+    store.seed("votes/parent_u1", {"commId": "parent", "userId": "u1", "vote": True})
+
+
+@pytest.mark.asyncio
+async def test_delete_comment_thread_takes_scores_off_authors(store):
+    _seed_thread(store)
+
+    report = await CascadeDeleter(store).delete_comment_thread("c1")
+
+    assert report == {"commentId": "c1", "replies": 2, "votes": 4, "batches": 3}
+    assert _count(store, "comments/") == 1 and _count(store, "votes/") == 1 and "votes/parent_u1" in store.docs
+    assert store.docs["comments/parent"]["replyCount"] == 0
+    assert store.docs["users/commenter"]["likes"] == 3 - 2 + 1
+    assert store.docs["users/author"]["likes"] == -1
+
+
+@pytest.mark.asyncio
+async def test_interrupted_comment_delete_resumes_without_double_counting(store):
+    _seed_thread(store)
+    deleter = CascadeDeleter(store)
+    original = store.write
+
+    def fail_last_batch(ops):
+        if any(ref.path == "comments/c1" for _, ref, _, _ in ops):
+            raise ConnectionError("interrupted")
+        original(ops)
+
+    with patch.object(store, "write", fail_last_batch):
+        with pytest.raises(ConnectionError):
+            await deleter.delete_comment_thread("c1")
+
+    assert "comments/c1" in store.docs and store.docs["comments/parent"]["replyCount"] == 1
+    await deleter.delete_comment_thread("c1")
+    assert await deleter.delete_comment_thread("c1") == {"error": "Comment not found"}
+
+    assert store.docs["comments/parent"]["replyCount"] == 0
+    assert store.docs["users/commenter"]["likes"] == 3 - 2 + 1
+    assert store.docs["users/author"]["likes"] == -1
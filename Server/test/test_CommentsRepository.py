@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from Repository.CommentsRepository import CommentsRepository
 from Model.Comment import Comment
+from Benchmarks.FakeFirestore import FakeFirestore
 
 @pytest.fixture
 def fake_comment():
@@ -62,12 +63,45 @@ async def test_delete_comment(repo):
     assert result == {"message": "Comment deleted"}
     repo.comments_collection.document.return_value.delete.assert_called_once()
 
+@pytest.fixture
+def store_repo():
+    store = FakeFirestore(latency=0, jitter=0, per_document=0)
+    store.seed("comments/c1", {"postId": "post123", "text": "reply", "likes": 0, "parentId": "p1", "replyCount": 0})
+    store.seed("comments/p1", {"postId": "post123", "text": "first", "likes": 0, "parentId": None, "replyCount": 1})
+    store.seed("comments/p2", {"postId": "post123", "text": "second", "likes": 0, "parentId": None, "replyCount": 0})
+    with patch("Repository.CommentsRepository.FirebaseSingleton") as MockFirebase:
+        MockFirebase.return_value.get_firestore_client.return_value = store
+        yield CommentsRepository("fake_path"), store
+
 @pytest.mark.asyncio
-async def test_update_comment_with_data(repo):
-    updated_comment = Comment(id="comment123", postId="post123", userId="user456", text="updated", date="d", likes=10, parentId=None)
+async def test_update_comment_with_data(store_repo):
+    repo, store = store_repo
+    updated_comment = Comment(id="c1", postId="post123", userId="user456", text="updated", date="d", likes=10, parentId="p1")
     result = await repo.update_comment("c1", updated_comment)
     assert result == {"message": "Comment updated"}
-    repo.comments_collection.document.return_value.update.assert_called_once()
+    assert store.docs["comments/c1"]["text"] == "updated" and store.docs["comments/c1"]["likes"] == 10
+    assert store.docs["comments/p1"]["replyCount"] == 1
+
+@pytest.mark.asyncio
+async def test_update_comment_moves_reply_count_to_new_parent(store_repo):
+    repo, store = store_repo
+    moved = Comment(id="c1", postId="post123", userId="user456", text="reply", date="d", likes=0, parentId="p2")
+    assert await repo.update_comment("c1", moved) == {"message": "Comment updated"}
+    assert store.docs["comments/c1"]["parentId"] == "p2"
+    assert store.docs["comments/p1"]["replyCount"] == 0
+    assert store.docs["comments/p2"]["replyCount"] == 1
+
+    nested = Comment(id="p1", postId="post123", userId="user456", text="first", date="d", likes=0, parentId="p2")
+    assert await repo.update_comment("p1", nested) == {"message": "Comment updated"}
+    assert store.docs["comments/p2"]["replyCount"] == 2
+
+@pytest.mark.asyncio
+async def test_update_comment_rejects_missing_parent(store_repo):
+    repo, store = store_repo
+    moved = Comment(id="c1", postId="post123", userId="user456", text="reply", date="d", likes=0, parentId="gone")
+    assert await repo.update_comment("c1", moved) == {"error": "Parent comment not found"}
+    assert store.docs["comments/c1"]["parentId"] == "p1"
+    assert store.docs["comments/p1"]["replyCount"] == 1
 
 @pytest.mark.asyncio
 async def test_update_comment_no_fields_raises(repo):
@@ -82,3 +116,84 @@ async def test_update_comment_no_fields_raises(repo):
             parentId=None
         )
         await repo.update_comment("c1", updated_comment)
+
+def _snapshot(doc_id, data):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.to_dict.return_value = data
+    return doc
+
+@pytest.mark.asyncio
+async def test_upload_reply_increments_parent_reply_count(repo):
+    reply = Comment(id="r1", postId="post123", userId="user456", text="reply", date="2024-01-01", likes=0, parentId="c1")
+    batch = repo.db.batch.return_value
+
+    result = await repo.upload_comment_to_firestore(reply)
+
+    assert result["message"] == "Comment uploaded"
+    assert batch.set.call_args[0][1]["replyCount"] == 0
+    repo.comments_collection.document.assert_any_call("c1")
+    assert "replyCount" in batch.update.call_args[0][1]
+    batch.commit.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_get_post_comments_uses_reply_count(repo):
+    query = repo.comments_collection.where.return_value.where.return_value
+    query.stream.return_value = [
+        _snapshot("c1", {"text": "a", "replyCount": 2}),
+        _snapshot("c2", {"text": "b"}),
+    ]
+
+    result = await repo.get_post_comments_from_firestore("post123")
+
+    assert [c["hasReplies"] for c in result] == [True, False]
+    assert repo.comments_collection.where.call_count == 1
+
+@pytest.mark.asyncio
+async def test_get_post_comments_paginated(repo):
+    query = repo.comments_collection.where.return_value.where.return_value.order_by.return_value
+    query.start_after.return_value.limit.return_value.stream.return_value = [
+        _snapshot("c3", {"text": "c"}),
+        _snapshot("c4", {"text": "d"}),
+    ]
+
+    result = await repo.get_post_comments_from_firestore("post123", limit=2, start_after="c2")
+
+    assert [c["commentId"] for c in result["comments"]] == ["c3", "c4"]
+    assert result["nextCursor"] == "c4"
+    query.start_after.return_value.limit.assert_called_once_with(2)
+
+@pytest.mark.asyncio
+async def test_get_post_comments_invalid_cursor(repo):
+    repo.comments_collection.document.return_value.get.return_value.exists = False
+
+    result = await repo.get_post_comments_from_firestore("post123", limit=2, start_after="missing")
+    assert result == {"error": "Invalid cursor"}
+
+@pytest.mark.asyncio
+async def test_delete_reply_decrements_parent(repo):
+    batch = repo.db.batch.return_value
+
+    result = await repo.delete_comment("r1", parentId="c1")
+
+    assert result == {"message": "Comment deleted"}
+    batch.delete.assert_called_once()
+    assert "replyCount" in batch.update.call_args[0][1]
+    batch.commit.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_backfill_reply_counts(repo):
+    repo.comments_collection.select.return_value.stream.return_value = [
+        _snapshot("c1", {"parentId": None, "replyCount": 0}),
+        _snapshot("r1", {"parentId": "c1", "replyCount": 0}),
+        _snapshot("r2", {"parentId": "c1"}),
+    ]
+    batch = repo.db.batch.return_value
+
+    result = await repo.backfill_reply_counts()
+
+    assert result == {"scanned": 3, "updated": 2}
+    updates = {call[0][0]: call[0][1] for call in batch.update.call_args_list}
+    assert {"replyCount": 2} in updates.values()
+    assert {"replyCount": 0} in updates.values()
+
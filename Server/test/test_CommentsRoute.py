@@ -81,3 +81,10 @@ def test_get_user_comments_success(mock_comments_service):
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+
+def test_get_comments_by_post_id_paginated(mock_comments_service):
+    mock_comments_service.get_post_comments.return_value = {"comments": [{"id": "c1"}], "nextCursor": "c1"}
+    response = client.get("/post/post1?limit=1&start_after=c0")
+    assert response.status_code == 200
+    assert response.json()["nextCursor"] == "c1"
+    mock_comments_service.get_post_comments.assert_awaited_with("post1", 1, "c0")
@@ -29,7 +29,6 @@ def service():
         comments_repo.get_user_comments = AsyncMock(return_value=[{"likes": 1}, {"likes": 2}])
         comments_repo.get_comment_tree = AsyncMock(return_value=[MagicMock(id="c2"), MagicMock(id="c3")])
         votes_repo.delete_all_votes = AsyncMock(return_value={"message": "votes deleted"})
-        users_repo.update_user_votes = AsyncMock(return_value={"message": "user votes updated"})
 
         service = CommentsService("fake_path")
         service.comments_repo = comments_repo
@@ -149,13 +148,29 @@ async def test_get_comment_tree(service):
 
 @pytest.mark.asyncio
 async def test_delete_comment_replies_and_votes(service):
+    report = {"commentId": "comm1", "replies": 2, "votes": 3, "batches": 3}
+    service.cascade.delete_comment_thread = AsyncMock(return_value=report)
     res = await service.delete_comment_replies_and_votes("comm1")
-    assert "message" in res
+    assert res == {"message": "Comment, replies, and votes deleted", "cascade": report}
+    service.cascade.delete_comment_thread.assert_awaited_once_with("comm1")
+
+    service.cascade.delete_comment_thread = AsyncMock(return_value={"error": "Comment not found"})
+    res = await service.delete_comment_replies_and_votes("comm1")
+    assert res == {"error": "Invalid commentId"}
 
     res = await service.delete_comment_replies_and_votes(None)
     assert "error" in res
 
 @pytest.mark.asyncio
-async def test_update_user_total_likes(service):
-    res = await service.update_user_total_likes("user1")
+async def test_get_post_comments_paginated(service):
+    service.comments_repo.get_post_comments_from_firestore.return_value = {"comments": [], "nextCursor": None}
+    res = await service.get_post_comments("post1", limit=10, start_after="c9")
+    assert res == {"comments": [], "nextCursor": None}
+    service.comments_repo.get_post_comments_from_firestore.assert_awaited_with("post1", 10, "c9")
+
+@pytest.mark.asyncio
+async def test_delete_reply_passes_parent(service):
+    service.comments_repo.get_single_comment.return_value = {"commentId": "r1", "parentId": "comm1"}
+    res = await service.delete_comment("r1")
     assert "message" in res
+    service.comments_repo.delete_comment.assert_awaited_with("r1", "comm1")
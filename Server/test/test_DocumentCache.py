@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from Repository.DocumentCache import DocumentCache, request_scope
+from Repository.UsersRepository import UsersRepository
+
+
+@pytest.fixture
+def cache():
+    return DocumentCache("users", max_entries=2, ttl=60)
+
+
+@pytest.mark.asyncio
+async def test_get_caches_loaded_documents(cache):
+    load = AsyncMock(return_value={"name": "a"})
+
+    assert await cache.get("u1", load) == {"name": "a"}
+    assert await cache.get("u1", load) == {"name": "a"}
+
+    load.assert_awaited_once()
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["reads_saved"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_returns_copies(cache):
+    load = AsyncMock(return_value={"following": ["u2"]})
+
+    first = await cache.get("u1", load)
+    first["following"].append("u3")
+
+    assert await cache.get("u1", load) == {"following": ["u2"]}
+
+
+@pytest.mark.asyncio
+async def test_missing_documents_are_not_cached(cache):
+    load = AsyncMock(return_value=None)
+
+    assert await cache.get("u1", load) is None
+    assert await cache.get("u1", load) is None
+    assert load.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_reload(cache):
+    load = AsyncMock(side_effect=[{"likes": 1}, {"likes": 2}])
+
+    await cache.get("u1", load)
+    cache.invalidate("u1")
+
+    assert await cache.get("u1", load) == {"likes": 2}
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_read_overlapping_a_write_is_not_cached(cache):
+    async def load():
+        cache.invalidate("u1")
+        return {"likes": 1}
+
+    await cache.get("u1", load)
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted(cache):
+    for doc_id in ("u1", "u2"):
+        await cache.get(doc_id, AsyncMock(return_value={"id": doc_id}))
+    await cache.get("u1", AsyncMock())
+    await cache.get("u3", AsyncMock(return_value={"id": "u3"}))
+
+    load = AsyncMock(return_value={"id": "u2"})
+    await cache.get("u2", load)
+    load.assert_awaited_once()
+    assert cache.stats()["evictions"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_request_scope_reads_once_without_process_cache():
+    cache = DocumentCache("users", ttl=0)
+    load = AsyncMock(return_value={"name": "a"})
+
+    with request_scope():
+        await cache.get("u1", load)
+        await cache.get("u1", load)
+    await cache.get("u1", load)
+
+    assert load.await_count == 2
+    assert cache.stats()["request_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_request_scope_is_shared_with_gathered_tasks():
+    cache = DocumentCache("users", ttl=0)
+    load = AsyncMock(return_value={"name": "a"})
+
+    with request_scope():
+        await cache.get("u1", load)
+        await asyncio.gather(cache.get("u1", load), cache.get("u1", load))
+
+    load.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_users_repository_invalidates_on_write():
+    with patch("Repository.UsersRepository.FirebaseSingleton"):
+        repo = UsersRepository("fake_path")
+    user_doc = MagicMock()
+    user_doc.exists = True
+    user_doc.id = "user1"
+    user_doc.to_dict.side_effect = [{"likes": 1}, {"likes": 5}]
+    repo._get_user_doc = AsyncMock(return_value=user_doc)
+
+    assert (await repo.get_user_by_id("user1"))["likes"] == 1
+    assert (await repo.get_user_by_id("user1"))["likes"] == 1
+    await repo.update_user_likes("user1", 5)
+
+    assert (await repo.get_user_by_id("user1"))["likes"] == 5
+
+
+@pytest.mark.asyncio
+async def test_get_many_loads_only_uncached_documents(cache):
+    await cache.get("u1", AsyncMock(return_value={"name": "a"}))
+    load_many = AsyncMock(return_value={"u2": {"name": "b"}})
+
+    found = await cache.get_many(["u2", "u1", "u3", "u2"], load_many)
+
+    assert found == {"u1": {"name": "a"}, "u2": {"name": "b"}}
+    load_many.assert_awaited_once_with(["u2", "u3"])
+    assert await cache.get("u2", AsyncMock()) == {"name": "b"}
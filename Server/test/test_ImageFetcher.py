@@ -0,0 +1,55 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from Routes.Chatbot.ImageFetcher import ImageFetcher
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def fetcher():
+    release = asyncio.Event()
+
+    async def handler(request):
+        if request.url.host == "slow.example":
+            await release.wait()
+        if request.url.path == "/missing.png":
+            return httpx.Response(404)
+        return httpx.Response(200, content=_png())
+
+    fetcher = ImageFetcher(per_host_limit=1)
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    fetcher.release = release
+    return fetcher
+
+
+@pytest.mark.asyncio
+async def test_idle_hosts_are_forgotten(fetcher):
+    for i in range(20):
+        image = await fetcher.fetch(f"https://host{i}.example/image.png")
+        assert image.size == (4, 4)
+    with pytest.raises(HTTPException):
+        await fetcher.fetch("https://host0.example/missing.png")
+
+    assert fetcher._host_semaphores == {}
+
+
+@pytest.mark.asyncio
+async def test_busy_host_keeps_its_limit(fetcher):
+    fetches = [asyncio.create_task(fetcher.fetch("https://slow.example/image.png")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    semaphore, users = fetcher._host_semaphores["slow.example"]
+    assert users == 3 and semaphore.locked()
+
+    fetcher.release.set()
+    assert all(image.size == (4, 4) for image in await asyncio.gather(*fetches))
+    assert fetcher._host_semaphores == {}
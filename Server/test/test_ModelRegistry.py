@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+from Factory.ModelRegistry import ModelRegistry
+
+
+class CountingModel:
+    created = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        time.sleep(0.05)
+        with CountingModel.lock:
+            CountingModel.created += 1
+
+
+class BrokenModel:
+    def __init__(self):
+        raise RuntimeError("weights missing")
+
+
+@pytest.fixture
+def registry():
+    CountingModel.created = 0
+    registry = ModelRegistry(model_paths={"object": "x.Object", "scene": "x.Scene", "broken": "x.Broken"})
+    classes = {"object": CountingModel, "scene": CountingModel, "broken": BrokenModel}
+    registry._import = lambda name: classes[name]
+    return registry
+
+
+def test_models_load_on_first_use(registry):
+    assert not registry.is_loaded("object")
+    assert registry.status()["object"]["state"] == "not_loaded"
+
+    model = registry.get("object")
+
+    assert registry.get("object") is model
+    assert registry.is_loaded("object")
+    assert not registry.is_loaded("scene")
+    assert CountingModel.created == 1
+
+
+def test_concurrent_first_use_loads_once(registry):
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get("object"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert CountingModel.created == 1
+    assert all(model is models[0] for model in models)
+
+
+def test_unknown_model_is_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.get("missing")
+
+
+def test_failed_load_is_reported_and_retried(registry):
+    with pytest.raises(RuntimeError):
+        registry.get("broken")
+
+    status = registry.status()["broken"]
+    assert status["state"] == "failed"
+    assert status["error"] == "weights missing"
+    with pytest.raises(RuntimeError):
+        registry.get("broken")
+
+
+def test_idle_models_are_evicted_and_reloaded(registry):
+    registry.idle_timeout = 60
+    registry.get("object")
+    registry.get("scene")
+    registry._last_used["object"] = time.monotonic() - 120
+
+    assert registry.evict_idle() == ["object"]
+    assert not registry.is_loaded("object")
+    assert registry.is_loaded("scene")
+
+    registry.get("object")
+    assert registry.is_loaded("object")
+    assert CountingModel.created == 3
+
+
+def test_required_models_are_never_evicted(registry):
+    registry.idle_timeout = 60
+    registry.require(["object"])
+    registry.get("object")
+    registry._last_used["object"] = time.monotonic() - 120
+
+    assert registry.evict_idle() == []
+    assert registry.is_ready()
+
+
+def test_eviction_is_off_without_idle_timeout(registry):
+    registry.get("object")
+    registry._last_used["object"] = time.monotonic() - 3600
+
+    assert registry.evict_idle() == []
+    assert registry.is_loaded("object")
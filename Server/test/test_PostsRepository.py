@@ -1,7 +1,10 @@
 import pytest
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 from Model.Post import Post
-from Repository.PostsRepository import PostsRepository
+from google.api_core.exceptions import InvalidArgument, NotFound
+from Repository.PostsRepository import FEED_CARD_FIELDS, PostsRepository
+from Repository.ShardedCounter import ShardedCounter
 
 @pytest.fixture
 def fake_post():
@@ -64,6 +67,29 @@ async def test_get_single_post_not_found(repo):
     result = await repo.get_single_post("no_post")
     assert result == {"error": "Post not found"}
 
+@pytest.mark.asyncio
+async def test_get_many_keeps_input_order_and_marks_missing(repo):
+    def snapshot(doc_id, exists=True):
+        doc = MagicMock()
+        doc.id = doc_id
+        doc.exists = exists
+        doc.to_dict.return_value = {"caption": doc_id}
+        return doc
+
+    repo.db.get_all.return_value = [snapshot("p2"), snapshot("p3", exists=False), snapshot("p1")]
+
+    result = await repo.get_many(["p1", "p2", "p3", "p1"])
+
+    assert result == [
+        {"caption": "p1", "postId": "p1"},
+        {"caption": "p2", "postId": "p2"},
+        {"postId": "p3", "error": "Post not found"},
+        {"caption": "p1", "postId": "p1"},
+    ]
+    assert len(repo.db.get_all.call_args.args[0]) == 3
+    assert (await repo.get_many(["p2"]))[0]["caption"] == "p2"
+    repo.db.get_all.assert_called_once()
+
 @pytest.mark.asyncio
 async def test_update_post_authorized(repo, fake_post):
     mock_doc = MagicMock()
@@ -89,25 +115,33 @@ async def test_delete_post_authorized(repo, fake_post):
     mock_post_doc.exists = True
     mock_post_doc.to_dict.return_value = {"userId": fake_post.userId}
     repo.posts_collection.document.return_value.get = MagicMock(return_value=mock_post_doc)
+    report = {"postId": fake_post.id, "documents": 3}
+    repo.cascade.delete_post = AsyncMock(return_value=report)
 
-    mock_rating_doc = MagicMock()
-    mock_comment_doc = MagicMock()
-    mock_rating_doc.reference = MagicMock()
-    mock_comment_doc.reference = MagicMock()
-    repo.ratings_collection.where.return_value.stream = MagicMock(return_value=[mock_rating_doc])
-    repo.comments_collection.where.return_value.stream = MagicMock(return_value=[mock_comment_doc])
+    result = await repo.delete_post(fake_post.userId, fake_post.id)
 
-    batch_mock = MagicMock()
-    repo.db.batch.return_value = batch_mock
-    batch_mock.commit = AsyncMock()
+    assert result == {"message": "Post and related data deleted", "cascade": report}
+    repo.cascade.delete_post.assert_awaited_once_with(fake_post.id, fake_post.userId)
 
-    result = await repo.delete_post(fake_post.userId, fake_post.id)
 
-    assert result == {"message": "Post and related data deleted"}
-    batch_mock.delete.assert_any_call(mock_rating_doc.reference)
-    batch_mock.delete.assert_any_call(mock_comment_doc.reference)
-    batch_mock.delete.assert_any_call(repo.posts_collection.document.return_value)
-    batch_mock.commit.assert_awaited_once()
+@pytest.mark.asyncio
+async def test_delete_all_posts_of_user_cascades_each_post(repo):
+    repo.posts_collection.where.return_value.stream.return_value = [_post_doc("p1", None), _post_doc("p2", None)]
+    repo.cascade.delete_post = AsyncMock(return_value={})
+
+    result = await repo.delete_all_posts_of_user("user1")
+
+    assert result == {"message": "All posts deleted for user ID: user1"}
+    assert [c.args for c in repo.cascade.delete_post.await_args_list] == [("p1", "user1"), ("p2", "user1")]
+
+
+@pytest.mark.asyncio
+async def test_resume_deletions(repo):
+    repo.cascade.pending = AsyncMock(return_value=[{"postId": "p1", "userId": "user1"}])
+    repo.cascade.delete_post = AsyncMock(return_value={"postId": "p1", "documents": 4})
+
+    assert await repo.resume_deletions() == [{"postId": "p1", "documents": 4}]
+    repo.cascade.delete_post.assert_awaited_once_with("p1", "user1")
 
 
 @pytest.mark.asyncio
@@ -142,3 +176,190 @@ async def test_delete_post_not_found(repo):
 
     result = await repo.delete_post("user", "no_post")
     assert result == {"error": "Post not found"}
+
+def _post_doc(post_id, date):
+    doc = MagicMock()
+    doc.id = post_id
+    doc.to_dict.return_value = {"date": date}
+    return doc
+
+@pytest.mark.asyncio
+async def test_get_posts_by_authors_merges_chunks(repo):
+    authors = [f"user{i}" for i in range(35)]
+    streams = {
+        tuple(authors[:30]): [_post_doc("p3", "2024-03-01"), _post_doc("p1", "2024-01-01")],
+        tuple(authors[30:]): [_post_doc("p4", "2024-04-01"), _post_doc("p2", "2024-02-01")],
+    }
+
+    def where(field, op, chunk):
+        query = MagicMock()
+        ordered = query.order_by.return_value.order_by.return_value
+        ordered.limit.return_value.stream.return_value = streams[tuple(chunk)]
+        return query
+
+    repo.posts_collection.where.side_effect = where
+
+    result = await repo.get_posts_by_authors(authors, 3)
+    assert [p["postId"] for p in result] == ["p4", "p3", "p2"]
+    assert repo.posts_collection.where.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_posts_by_authors_merges_timestamps_with_string_dates(repo):
+    authors = [f"user{i}" for i in range(35)]
+    stamp = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    streams = {
+        tuple(authors[:30]): [_post_doc("p3", "2024-03-01"), _post_doc("p5", stamp)],
+        tuple(authors[30:]): [_post_doc("p4", "2024-04-01"), _post_doc("p1", None)],
+    }
+
+    def where(field, op, chunk):
+        query = MagicMock()
+        ordered = query.order_by.return_value.order_by.return_value
+        ordered.limit.return_value.stream.return_value = streams[tuple(chunk)]
+        return query
+
+    repo.posts_collection.where.side_effect = where
+
+    result = await repo.get_posts_by_authors(authors, 4)
+    assert [p["postId"] for p in result] == ["p4", "p3", "p5", "p1"]
+
+@pytest.mark.asyncio
+async def test_get_posts_by_authors_invalid_cursor(repo):
+    repo.posts_collection.document.return_value.get.return_value.exists = False
+    result = await repo.get_posts_by_authors(["user1"], 5, start_after="missing")
+    assert result == {"error": "Invalid cursor"}
+
+
+def _ranked(repo):
+    return repo.posts_collection.order_by.return_value.order_by.return_value.order_by.return_value
+
+@pytest.mark.asyncio
+async def test_get_posts_page_starts_after_cursor_tuple(repo):
+    query = _ranked(repo)
+    query.start_after.return_value.limit.return_value.stream.return_value = [_post_doc("p2", "2024-01-01")]
+
+    result = await repo.get_posts_page(1, {"rating": 4.0, "date": "2024-02-01", "postId": "p1"})
+
+    assert [p["postId"] for p in result] == ["p2"]
+    query.start_after.assert_called_once_with({"rating": 4.0, "date": "2024-02-01", "__name__": "p1"})
+    query.start_after.return_value.limit.assert_called_once_with(1)
+
+@pytest.mark.asyncio
+async def test_get_posts_page_card_projection(repo):
+    query = _ranked(repo)
+    query.select.return_value.limit.return_value.stream.return_value = []
+
+    await repo.get_posts_page(5, card=True)
+
+    query.select.assert_called_once_with(FEED_CARD_FIELDS)
+
+@pytest.mark.asyncio
+async def test_get_posts_page_caches_first_page_until_a_post_is_uploaded(repo, fake_post):
+    query = _ranked(repo)
+    query.limit.return_value.stream.return_value = [_post_doc("p1", "2024-01-01")]
+
+    await repo.get_posts_page(10)
+    await repo.get_posts_page(10)
+    assert query.limit.return_value.stream.call_count == 1
+
+    await repo.upload_to_firestore(fake_post)
+    await repo.get_posts_page(10)
+    assert query.limit.return_value.stream.call_count == 2
+
+@pytest.mark.asyncio
+async def test_get_posts_page_missing_index(repo):
+    _ranked(repo).limit.return_value.stream.side_effect = InvalidArgument("index")
+    result = await repo.get_posts_page(10)
+    assert "error" in result
+
+
+@pytest.mark.asyncio
+async def test_update_post_views_increments_atomically(repo):
+    post_ref = repo.posts_collection.document.return_value
+
+    result = await repo.update_post_views("post123")
+    assert result == {"message": "Views updated"}
+    assert post_ref.update.call_args.args[0]["views"].value == 1
+    post_ref.get.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_update_post_views_missing_post(repo):
+    repo.posts_collection.document.return_value.update.side_effect = NotFound("missing")
+    result = await repo.update_post_views("post123")
+    assert result == {"error": "Post not found"}
+
+@pytest.mark.asyncio
+async def test_update_post_views_sharded(repo):
+    repo.view_counter = ShardedCounter("views", num_shards=4)
+    post_ref = repo.posts_collection.document.return_value
+    repo.db.get_all.return_value = [MagicMock(id="post123", exists=True, to_dict=lambda: {})]
+    shard_ref = post_ref.collection.return_value.document.return_value
+
+    await repo.update_post_views("post123", 3)
+    post_ref.collection.assert_called_with("viewsShards")
+    assert shard_ref.set.call_args.args[0]["count"].value == 3
+    assert shard_ref.set.call_args.kwargs == {"merge": True}
+    post_ref.update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_post_views_sums_shards_and_caches(repo):
+    repo.view_counter = ShardedCounter("views", num_shards=2, cache_ttl=60)
+    post_ref = repo.posts_collection.document.return_value
+    post_ref.path = "posts/post123"
+    post_ref.get.return_value = MagicMock(exists=True, to_dict=lambda: {"views": 10})
+    shards = [MagicMock(to_dict=lambda: {"count": 4}), MagicMock(to_dict=lambda: {"count": 1})]
+    post_ref.collection.return_value.stream.return_value = shards
+
+    assert await repo.get_post_views("post123") == {"postId": "post123", "views": 15}
+    assert await repo.get_post_views("post123") == {"postId": "post123", "views": 15}
+    post_ref.collection.return_value.stream.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_add_post_views_batches_increments(repo):
+    batch = repo.db.batch.return_value
+
+    result = await repo.add_post_views({"post1": 3, "post2": 1})
+    assert result == {"written": ["post1", "post2"], "missing": [], "pending": {}}
+    assert batch.update.call_count == 2
+    assert batch.update.call_args_list[0].args[1]["views"].value == 3
+    batch.commit.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_add_post_views_skips_deleted_posts(repo):
+    repo.db.batch.return_value.commit.side_effect = NotFound("missing")
+    refs = {"post1": MagicMock(), "gone": MagicMock()}
+    refs["gone"].update.side_effect = NotFound("missing")
+    repo.posts_collection.document.side_effect = refs.get
+
+    result = await repo.add_post_views({"post1": 2, "gone": 1})
+    assert result == {"written": ["post1"], "missing": ["gone"], "pending": {}}
+    assert refs["post1"].update.call_args.args[0]["views"].value == 2
+
+@pytest.mark.asyncio
+async def test_update_post_views_sharded_missing_post(repo):
+    repo.view_counter = ShardedCounter("views", num_shards=4)
+    repo.db.get_all.return_value = [MagicMock(id="gone", exists=False)]
+
+    result = await repo.update_post_views("gone")
+    assert result == {"error": "Post not found"}
+    repo.posts_collection.document.return_value.collection.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_add_post_views_sharded_skips_missing_posts(repo):
+    repo.view_counter = ShardedCounter("views", num_shards=4)
+    repo.db.get_all.return_value = [MagicMock(id="post1", exists=True, to_dict=lambda: {})]
+    batch = repo.db.batch.return_value
+
+    result = await repo.add_post_views({"post1": 2, "gone": 1})
+    assert result == {"written": ["post1"], "missing": ["gone"], "pending": {}}
+    assert batch.set.call_count == 1
+
+@pytest.mark.asyncio
+async def test_add_post_views_returns_uncommitted_chunks(repo):
+    counts = {f"post{i}": 1 for i in range(600)}
+    repo.db.batch.return_value.commit.side_effect = [None, ConnectionError("unavailable")]
+
+    result = await repo.add_post_views(counts)
+    assert len(result["written"]) == 500
+    assert result["pending"] == {f"post{i}": 1 for i in range(500, 600)}
+    assert result["error"] == "unavailable"
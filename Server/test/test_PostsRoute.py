@@ -102,3 +102,18 @@ def test_delete_all_user_posts_success(mock_post_service):
     response = client.delete("/user/user1/delete")
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"message": "all posts deleted"}
+
+def test_get_all_posts_for_user_paginated(mock_post_service):
+    mock_post_service.get_feed_page = AsyncMock(return_value={"posts": [], "nextCursor": None})
+    response = client.get("/all_friends/user1?limit=20&cursor=abc")
+    assert response.status_code == 200
+    assert response.json() == {"posts": [], "nextCursor": None}
+    mock_post_service.get_feed_page.assert_awaited_once_with("user1", 20, "abc")
+
+def test_get_all_posts_paginated(mock_post_service):
+    mock_post_service.get_posts_page = AsyncMock(return_value={"posts": [], "nextCursor": None})
+    response = client.get("/?limit=20&cursor=abc&card=true")
+    assert response.status_code == 200
+    assert response.json() == {"posts": [], "nextCursor": None}
+    mock_post_service.get_posts_page.assert_awaited_once_with(20, "abc", True)
+    mock_post_service.get_all_posts.assert_not_awaited()
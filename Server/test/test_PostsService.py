@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 from Model.Post import Post
 from Service.PostsService import PostsService
@@ -36,6 +37,8 @@ def service():
         ratings_repo.upload_or_update_rating = AsyncMock(return_value=None)
         ratings_repo.get_post_average_rating = AsyncMock(return_value={"averageRating": 4.5})
         ratings_repo.delete_all_ratings = AsyncMock(return_value={"message": "ratings deleted"})
+        ratings_repo.apply_rating = AsyncMock(return_value={"message": "Rating updated", "rating": 4.5, "userRating": 4.0})
+        ratings_repo.adjust_author_aggregates = AsyncMock(return_value={"userRating": 4.0})
 
         comments_repo.delete_post_and_comments = AsyncMock(return_value={"message": "comments deleted"})
 
@@ -135,6 +138,18 @@ async def test_update_post_views_invalid(service):
     assert "error" in res
     service.repo.get_single_post.return_value = {"id": "post1"}
 
+@pytest.mark.asyncio
+async def test_update_post_views_buffered(service, monkeypatch):
+    view_buffer = MagicMock()
+    view_buffer.add.return_value = True
+    monkeypatch.setattr("Service.PostsService.ViewBuffer.get_instance", lambda cred_path: view_buffer)
+
+    res = await service.update_post_views("post1")
+    assert res == {"message": "View recorded"}
+    view_buffer.add.assert_called_once_with("post1")
+    service.repo.get_single_post.assert_not_called()
+    service.repo.update_post_views.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_add_post(service):
     post = Post(id="post1", userId="user1", caption="caption1", date="2025-05-16", rating=4, url="http://test.com", views=1)
@@ -154,8 +169,27 @@ async def test_update_post_rating(service):
 
 @pytest.mark.asyncio
 async def test_delete_post(service):
+    report = {"postId": "post1", "documents": 4, "batches": 2}
+    service.repo.delete_post.return_value = {"message": "Post and related data deleted", "cascade": report}
     res = await service.delete_post("user1", "post1")
-    assert "message" in res
+    assert res == {"message": "Post and related data deleted", "cascade": report}
+    service.repo.delete_post.assert_awaited_once_with("user1", "post1")
+    service.ratings_repo.delete_all_ratings.assert_not_awaited()
+    service.comments_repo.delete_post_and_comments.assert_not_awaited()
+    service.votes_repo.delete_all_votes.assert_not_awaited()
+    service.ratings_repo.adjust_author_aggregates.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_delete_post_cascade_error(service):
+    service.repo.delete_post = AsyncMock(return_value={"error": "Unauthorized to delete this post"})
+    res = await service.delete_post("user1", "post1")
+    assert res == {"error": "Unauthorized to delete this post"}
+
+@pytest.mark.asyncio
+async def test_add_post_counts_towards_author_rating(service):
+    post = Post(id="post1", userId="user1", caption="caption1", date="2025-05-16", rating=4, url="http://test.com", views=1)
+    await service.add_post(post)
+    service.ratings_repo.adjust_author_aggregates.assert_awaited_once_with("user1", 4, 1)
 
 @pytest.mark.asyncio
 async def test_delete_post_invalid(service):
@@ -174,3 +208,78 @@ async def test_delete_all_posts_of_user_invalid(service):
     service.user_repo.get_user_by_id.return_value = None
     res = await service.delete_all_posts_of_user("baduser")
     assert "error" in res
+
+@pytest.mark.asyncio
+async def test_get_feed_page_mutuals_first(service):
+    service.user_repo.get_user_by_id.return_value = {
+        "id": "user1", "following": ["user2", "user3"], "followers": ["user2"]
+    }
+    service.repo.get_posts_by_authors = AsyncMock(side_effect=[
+        [{"postId": "m1"}],
+        [{"postId": "o1"}, {"postId": "o2"}],
+    ])
+
+    res = await service.get_feed_page("user1", 3)
+
+    assert [p["postId"] for p in res["posts"]] == ["m1", "o1", "o2"]
+    calls = service.repo.get_posts_by_authors.await_args_list
+    assert calls[0].args == (["user2"], 3, None)
+    assert calls[1].args == (["user3"], 2, None)
+    assert res["nextCursor"] is not None
+
+@pytest.mark.asyncio
+async def test_get_feed_page_resumes_from_cursor(service):
+    service.repo.get_posts_by_authors = AsyncMock(return_value=[{"postId": "m2"}])
+    first = await service.get_feed_page("user1", 1)
+    second = await service.get_feed_page("user1", 1, first["nextCursor"])
+    assert service.repo.get_posts_by_authors.await_args_list[1].args == (["user2"], 1, "m2")
+    assert second["posts"] == [{"postId": "m2"}]
+
+@pytest.mark.asyncio
+async def test_get_feed_page_invalid_cursor(service):
+    res = await service.get_feed_page("user1", 5, "not-a-cursor")
+    assert res == {"error": "Invalid cursor"}
+
+@pytest.mark.asyncio
+async def test_add_post_publishes_to_timelines(service, monkeypatch):
+    monkeypatch.setenv("FEED_MODE", "timeline")
+    service._timeline_service = AsyncMock()
+    post = Post(id="post1", userId="user1", caption="c", date="2024-01-01", rating=0, url="http://example.com/p.jpg")
+
+    res = await service.add_post(post)
+
+    assert res == {"message": "post uploaded"}
+    service._timeline_service.publish.assert_awaited_once_with(post)
+
+
+@pytest.mark.asyncio
+async def test_get_posts_page_cursor_round_trip(service):
+    service.repo.get_posts_page = AsyncMock(side_effect=[
+        [{"postId": "p1", "rating": 5.0, "date": "2024-02-01"}, {"postId": "p2", "rating": 4.0, "date": "2024-01-01"}],
+        [{"postId": "p3", "rating": 3.0, "date": "2024-01-01"}],
+    ])
+
+    first = await service.get_posts_page(2)
+    second = await service.get_posts_page(2, first["nextCursor"], card=True)
+
+    assert [p["postId"] for p in first["posts"]] == ["p1", "p2"]
+    assert second == {"posts": [{"postId": "p3", "rating": 3.0, "date": "2024-01-01"}], "nextCursor": None}
+    assert service.repo.get_posts_page.await_args_list[1].args == (
+        2, {"rating": 4.0, "date": "2024-01-01", "postId": "p2"}, True
+    )
+
+@pytest.mark.asyncio
+async def test_get_posts_page_timestamp_dates(service):
+    date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    service.repo.get_posts_page = AsyncMock(return_value=[{"postId": "p1", "rating": 1.0, "date": date}])
+
+    page = await service.get_posts_page(1)
+    await service.get_posts_page(1, page["nextCursor"])
+
+    assert service.repo.get_posts_page.await_args.args[1]["date"] == date
+
+@pytest.mark.asyncio
+async def test_get_posts_page_invalid_cursor(service):
+    service.repo.get_posts_page = AsyncMock()
+    assert await service.get_posts_page(5, "not-a-cursor") == {"error": "Invalid cursor"}
+    service.repo.get_posts_page.assert_not_awaited()
@@ -22,6 +22,9 @@ def service():
         ratings_repo.get_rating = AsyncMock(return_value={"rating": 5})
         ratings_repo.delete_rating = AsyncMock(return_value={"message": "deleted"})
         ratings_repo.delete_all_ratings = AsyncMock(return_value={"message": "all deleted"})
+        ratings_repo.apply_rating = AsyncMock(return_value={"message": "Rating created", "isNew": True, "rating": 4.0, "userRating": 3.5})
+        ratings_repo.retract_rating = AsyncMock(return_value={"message": "Rating deleted", "rating": 0.0, "userRating": 3.0})
+        ratings_repo.reset_post_aggregates = AsyncMock(return_value={"rating": 0.0, "userRating": 3.0})
         posts_repo.get_user_average_rating = AsyncMock(return_value=4.2)
         posts_repo.update_post_rating = AsyncMock(return_value={"message": "post rating updated"})
         users_repo.update_user_rating = AsyncMock(return_value={"message": "user rating updated"})
@@ -70,6 +73,20 @@ async def test_rate_post_success(service):
     res = await service.rate_post("post1", "user1", 4.0)
     assert "message" in res and "successfully" in res["message"]
 
+@pytest.mark.asyncio
+async def test_rate_post_uses_running_aggregates(service):
+    res = await service.rate_post("post1", "user1", 4.0)
+    service.ratings_repo.apply_rating.assert_awaited_once_with("post1", "user1", 4.0)
+    service.ratings_repo.get_post_average_rating.assert_not_called()
+    service.posts_repo.get_user_average_rating.assert_not_called()
+    assert res["rating"] == 4.0 and res["userRating"] == 3.5
+
+@pytest.mark.asyncio
+async def test_rate_post_repository_error(service):
+    service.ratings_repo.apply_rating.return_value = {"error": "Rating must be between 1 and 5"}
+    res = await service.rate_post("post1", "user1", 9)
+    assert res == {"error": "Rating must be between 1 and 5"}
+
 @pytest.mark.asyncio
 async def test_rate_post_missing_fields(service):
     res = await service.rate_post(None, "user1", 4.0)
@@ -127,6 +144,7 @@ async def test_remove_rating_no_existing(service):
 async def test_remove_all_ratings_for_post_success(service):
     res = await service.remove_all_ratings_for_post("post1")
     assert "message" in res
+    service.ratings_repo.reset_post_aggregates.assert_awaited_once_with("post1")
 
 @pytest.mark.asyncio
 async def test_remove_all_ratings_for_post_invalid(service):
@@ -159,3 +159,160 @@ async def test_get_rating_not_found(repo):
     repo._get_rating_document = AsyncMock(return_value=mock_doc)
     result = await repo.get_rating("post1", "user1")
     assert result == {"message": "Rating not found"}
+
+
+def _snapshot(doc_id, data, exists=True):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.exists = exists
+    doc.to_dict.return_value = data
+    return doc
+
+
+@pytest.fixture
+def tx_repo(repo):
+    repo.posts_collection = MagicMock()
+    repo.users_collection = MagicMock()
+    repo.ratings = MagicMock()
+    repo.db.collection.return_value = repo.ratings
+    with patch("Repository.RatingsRepository.transactional", lambda func: func):
+        yield repo
+
+
+def _updates(transaction):
+    return [c.args[1] for c in transaction.update.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_apply_rating_new_rating_updates_aggregates(tx_repo):
+    transaction = tx_repo.db.transaction.return_value
+    tx_repo.ratings.document.return_value.get.return_value = _snapshot("post1_user2", None, exists=False)
+    tx_repo.posts_collection.document.return_value.get.return_value = _snapshot(
+        "post1", {"userId": "user1", "rating": 4.0, "ratingSum": 8.0, "ratingCount": 2}
+    )
+    tx_repo.users_collection.document.return_value.get.return_value = _snapshot(
+        "user1", {"postRating": 3.0, "postRatingSum": 6.0, "postRatingCount": 2}
+    )
+
+    res = await tx_repo.apply_rating("post1", "user2", 1)
+
+    assert res == {"message": "Rating created", "isNew": True, "rating": 3.0, "userRating": 2.5}
+    post_update, user_update = _updates(transaction)
+    assert post_update == {"rating": 3.0, "ratingSum": 9.0, "ratingCount": 3}
+    assert user_update == {"postRating": 2.5, "postRatingSum": 5.0, "postRatingCount": 2}
+    transaction.set.assert_called_once_with(
+        tx_repo.ratings.document.return_value, {"userId": "user2", "postId": "post1", "rating": 1}
+    )
+    transaction.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_apply_rating_existing_rating_applies_delta(tx_repo):
+    transaction = tx_repo.db.transaction.return_value
+    tx_repo.ratings.document.return_value.get.return_value = _snapshot("post1_user2", {"rating": 5})
+    tx_repo.posts_collection.document.return_value.get.return_value = _snapshot(
+        "post1", {"userId": "user1", "rating": 4.0, "ratingSum": 8.0, "ratingCount": 2}
+    )
+    tx_repo.users_collection.document.return_value.get.return_value = _snapshot(
+        "user1", {"postRatingSum": 4.0, "postRatingCount": 1}
+    )
+
+    res = await tx_repo.apply_rating("post1", "user2", 2)
+
+    assert res["isNew"] is False and res["oldRating"] == 5
+    assert _updates(transaction)[0] == {"rating": 2.5, "ratingSum": 5.0, "ratingCount": 2}
+    assert res["userRating"] == 2.5
+
+
+@pytest.mark.asyncio
+async def test_apply_rating_initializes_legacy_documents(tx_repo):
+    transaction = tx_repo.db.transaction.return_value
+    tx_repo.ratings.document.return_value.get.return_value = _snapshot("post1_user2", None, exists=False)
+    tx_repo.posts_collection.document.return_value.get.return_value = _snapshot("post1", {"userId": "user1", "rating": 4.0})
+    tx_repo.users_collection.document.return_value.get.return_value = _snapshot("user1", {"postRating": 2.0})
+    transaction.get.side_effect = [
+        [_snapshot("r1", {"rating": 3}), _snapshot("r2", {"rating": 5})],
+        [_snapshot("post1", {"rating": 4.0}), _snapshot("post2", {"rating": 0})],
+    ]
+
+    res = await tx_repo.apply_rating("post1", "user2", 1)
+
+    assert res["rating"] == 3.0
+    post_update, user_update = _updates(transaction)
+    assert post_update == {"rating": 3.0, "ratingSum": 9.0, "ratingCount": 3}
+    assert user_update == {"postRating": 1.5, "postRatingSum": 3.0, "postRatingCount": 2}
+
+
+@pytest.mark.asyncio
+async def test_apply_rating_invalid_value(tx_repo):
+    res = await tx_repo.apply_rating("post1", "user2", 6)
+    assert res == {"error": "Rating must be between 1 and 5"}
+
+
+@pytest.mark.asyncio
+async def test_apply_rating_missing_post(tx_repo):
+    tx_repo.ratings.document.return_value.get.return_value = _snapshot("post1_user2", None, exists=False)
+    tx_repo.posts_collection.document.return_value.get.return_value = _snapshot("post1", None, exists=False)
+
+    res = await tx_repo.apply_rating("post1", "user2", 3)
+    assert "error" in res
+    tx_repo.db.transaction.return_value.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retract_last_rating_resets_post(tx_repo):
+    transaction = tx_repo.db.transaction.return_value
+    tx_repo.ratings.document.return_value.get.return_value = _snapshot("post1_user2", {"rating": 4})
+    tx_repo.posts_collection.document.return_value.get.return_value = _snapshot(
+        "post1", {"userId": "user1", "rating": 4.0, "ratingSum": 4.0, "ratingCount": 1}
+    )
+    tx_repo.users_collection.document.return_value.get.return_value = _snapshot(
+        "user1", {"postRatingSum": 4.0, "postRatingCount": 1}
+    )
+
+    res = await tx_repo.retract_rating("post1", "user2")
+
+    assert res["rating"] == 0.0 and res["userRating"] == 0.0
+    assert _updates(transaction)[0] == {"rating": 0.0, "ratingSum": 0.0, "ratingCount": 0}
+    transaction.delete.assert_called_once_with(tx_repo.ratings.document.return_value)
+
+
+@pytest.mark.asyncio
+async def test_adjust_author_aggregates_for_new_post(tx_repo):
+    transaction = tx_repo.db.transaction.return_value
+    tx_repo.users_collection.document.return_value.get.return_value = _snapshot(
+        "user1", {"postRatingSum": 6.0, "postRatingCount": 2}
+    )
+
+    res = await tx_repo.adjust_author_aggregates("user1", 0, 1)
+
+    assert res == {"userRating": 2.0}
+    assert _updates(transaction)[0] == {"postRating": 2.0, "postRatingSum": 6.0, "postRatingCount": 3}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_aggregates_reports_and_repairs_drift(tx_repo):
+    tx_repo.ratings.stream.return_value = [
+        _snapshot("post1_a", {"postId": "post1", "rating": 4}),
+        _snapshot("post1_b", {"postId": "post1", "rating": 2}),
+    ]
+    tx_repo.posts_collection.stream.return_value = [
+        _snapshot("post1", {"userId": "user1", "rating": 3.0, "ratingSum": 7.0, "ratingCount": 2}),
+        _snapshot("post2", {"userId": "user1", "rating": 1.0, "ratingSum": 0.0, "ratingCount": 0}),
+    ]
+    tx_repo.users_collection.stream.return_value = [
+        _snapshot("user1", {"postRating": 2.0, "postRatingSum": 4.0, "postRatingCount": 2}),
+    ]
+    batch = tx_repo.db.batch.return_value
+
+    report = await tx_repo.reconcile_aggregates()
+
+    assert report == {"postsChecked": 2, "postsRepaired": 1, "usersChecked": 1, "usersRepaired": 0}
+    batch.update.assert_called_once_with(
+        tx_repo.posts_collection.stream.return_value[0].reference,
+        {"ratingSum": 6.0, "ratingCount": 2, "rating": 3.0},
+    )
+
+    batch.reset_mock()
+    await tx_repo.reconcile_aggregates(repair=False)
+    batch.update.assert_not_called()
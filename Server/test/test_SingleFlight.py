@@ -0,0 +1,152 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from Model.Comment import Comment
+from Repository.CommentsRepository import CommentsRepository
+from Repository.SingleFlight import SingleFlight
+
+
+@pytest.fixture
+def flights():
+    return SingleFlight()
+
+
+def _slow(result, calls, delay=0.01):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+    return load
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_load(flights):
+    calls = []
+
+    results = await asyncio.gather(*(flights.do(("posts", "p1"), _slow({"views": 1}, calls)) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert results == [{"views": 1}] * 5
+    results[1]["views"] = 2
+    assert results[2] == {"views": 1}
+    stats = flights.stats()
+    assert stats["leaders"] == 1 and stats["coalesced"] == 4
+    assert stats["coalesced_by_collection"] == {"posts": 4} and stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_later_calls_load_again(flights):
+    calls = []
+
+    await asyncio.gather(flights.do(("posts", "p1"), _slow(1, calls)), flights.do(("posts", "p2"), _slow(2, calls)))
+    await flights.do(("posts", "p1"), _slow(1, calls))
+
+    assert len(calls) == 3 and flights.stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller(flights):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("unavailable")
+
+    results = await asyncio.gather(*(flights.do(("comments", "c1"), fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_after_a_write_do_not_join_an_earlier_call(flights):
+    calls = []
+    before = asyncio.ensure_future(flights.do(("comments", "c1"), _slow("old", calls)))
+    await asyncio.sleep(0)
+
+    flights.forget("comments")
+    after = await flights.do(("comments", "c1"), _slow("new", calls))
+
+    assert after == "new" and await before == "old"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_forgetting_one_key_keeps_sharing_the_others(flights):
+    calls = []
+    c1 = [asyncio.ensure_future(flights.do(("comments", "c1"), _slow("c1", calls))) for _ in range(2)]
+    c2 = asyncio.ensure_future(flights.do(("comments", "c2"), _slow("c2", calls)))
+    await asyncio.sleep(0)
+
+    flights.forget("comments", "c2")
+    late_c1 = await flights.do(("comments", "c1"), _slow("c1", calls))
+    late_c2 = await flights.do(("comments", "c2"), _slow("c2-new", calls))
+
+    assert late_c1 == "c1" and late_c2 == "c2-new"
+    assert await asyncio.gather(*c1, c2) == ["c1", "c1", "c2"]
+    assert len(calls) == 3 and flights.stats()["forgotten"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers(flights):
+    calls = []
+    leader = asyncio.ensure_future(flights.do(("posts", "p1"), _slow({"id": "p1"}, calls)))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flights.do(("posts", "p1"), _slow({"id": "p1"}, calls)))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+
+    assert await follower == {"id": "p1"}
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_calls_are_not_shared():
+    flights = SingleFlight(enabled=False)
+    calls = []
+
+    await asyncio.gather(*(flights.do(("posts", "p1"), _slow(1, calls)) for _ in range(3)))
+
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_comments_repository_coalesces_single_comment_reads():
+    with patch("Repository.CommentsRepository.FirebaseSingleton"):
+        repo = CommentsRepository("fake_path")
+    repo.flights = SingleFlight()
+    doc = MagicMock(exists=True, id="c1")
+    doc.to_dict.return_value = {"text": "hello"}
+    get = repo.comments_collection.document.return_value.get
+
+    def slow_get():
+        time.sleep(0.02)
+        return doc
+
+    get.side_effect = slow_get
+
+    results = await asyncio.gather(*(repo.get_single_comment("c1") for _ in range(10)))
+
+    assert all(r == {"text": "hello", "commentId": "c1"} for r in results)
+    assert get.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("parent_id", [None, "parent1"])
+async def test_comment_writes_forget_reads_after_committing(parent_id):
+    with patch("Repository.CommentsRepository.FirebaseSingleton"):
+        repo = CommentsRepository("fake_path")
+    events = []
+    new_ref = repo.comments_collection.document.return_value
+    new_ref.id = "c1"
+    new_ref.set.side_effect = lambda *args: events.append("write")
+    new_ref.delete.side_effect = lambda: events.append("write")
+    repo.db.batch.return_value.commit.side_effect = lambda: events.append("write")
+    comment = Comment(id="", postId="p1", userId="u1", text="hi", date="d", likes=0, parentId=parent_id)
+
+    with patch("Repository.CommentsRepository.forget_comment_reads", side_effect=lambda *a: events.append(("forget", a))):
+        await repo.upload_comment_to_firestore(comment)
+        await repo.delete_comment("c1", parent_id)
+
+    expected_ids = ["c1", parent_id] if parent_id else ["c1"]
+    assert events == ["write", ("forget", (expected_ids, "p1")), "write", ("forget", (expected_ids,))]
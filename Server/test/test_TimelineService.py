@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from Model.Post import Post
+from Service.TimelineService import TimelineService
+from Service.Cursor import decode_cursor
+
+@pytest.fixture
+def service():
+    with patch("Service.TimelineService.TimelinesRepository") as MockTimelinesRepo, \
+         patch("Service.TimelineService.UsersRepository") as MockUsersRepo, \
+         patch("Service.TimelineService.PostsRepository") as MockPostsRepo:
+
+        timelines_repo = MockTimelinesRepo.return_value
+        users_repo = MockUsersRepo.return_value
+        posts_repo = MockPostsRepo.return_value
+
+        users_repo.get_user_by_id = AsyncMock(return_value={
+            "id": "author", "followers": ["user1", "user2"], "following": ["user1"]
+        })
+        timelines_repo.add_entries = AsyncMock(return_value=2)
+        timelines_repo.get_entries = AsyncMock(return_value=[
+            {"postId": "p1", "authorId": "user1"},
+            {"postId": "p2", "authorId": "stranger"},
+        ])
+        posts_repo.get_many = AsyncMock(return_value=[{"postId": "p1"}])
+        timelines_repo.get_entry_count = AsyncMock(return_value=10)
+        timelines_repo.trim = AsyncMock(return_value=0)
+
+        service = TimelineService("fake_path")
+        service.repo = timelines_repo
+        service.users_repo = users_repo
+        service.posts_repo = posts_repo
+        yield service
+
+def _post():
+    return Post(id="post1", userId="author", caption="c", date="2024-01-01", rating=0, url="http://example.com/p.jpg")
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_inline_with_mutual_priority(service):
+    res = await service.publish(_post())
+
+    assert res["recipients"] == 2
+    args = service.repo.add_entries.await_args.args
+    assert args[:3] == ("post1", "author", "2024-01-01")
+    assert args[3] == {"user1": 1, "user2": 2}
+
+@pytest.mark.asyncio
+async def test_publish_queues_large_fanouts(service):
+    service.inline_fanout_limit = 1
+
+    res = await service.publish(_post())
+    assert res["message"] == "Timeline fan-out queued"
+    await service.close(timeout=1)
+    service.repo.add_entries.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_get_page_filters_unfollowed_authors(service):
+    service.users_repo.get_user_by_id.return_value = {"id": "reader", "following": ["user1"]}
+
+    res = await service.get_page("reader", 2)
+
+    service.posts_repo.get_many.assert_awaited_with(["p1"])
+    assert res["posts"] == [{"postId": "p1"}]
+    assert decode_cursor(res["nextCursor"]) == {"after": "p2"}
+
+@pytest.mark.asyncio
+async def test_get_page_skips_deleted_posts(service):
+    service.users_repo.get_user_by_id.return_value = {"id": "reader", "following": ["user1"]}
+    service.posts_repo.get_many.return_value = [{"postId": "p1", "error": "Post not found"}]
+
+    res = await service.get_page("reader", 2)
+
+    assert res["posts"] == []
+
+@pytest.mark.asyncio
+async def test_get_page_trims_oversized_timeline(service):
+    service.repo.get_entry_count.return_value = service.max_entries + 1
+    await service.get_page("reader", 2)
+    service.repo.trim.assert_awaited_with("reader", service.max_entries)
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from Benchmarks.FakeFirestore import FakeFirestore
+from Repository.TimelinesRepository import TimelinesRepository
+
+@pytest.fixture
+def repo():
+    with patch("Repository.TimelinesRepository.FirebaseSingleton") as MockFirebase:
+        mock_db = MagicMock()
+        mock_db.collection.return_value = MagicMock()
+        MockFirebase.return_value.get_firestore_client.return_value = mock_db
+        repository = TimelinesRepository("fake_path")
+        return repository
+
+@pytest.mark.asyncio
+async def test_add_entries_batches_writes(repo):
+    recipients = {f"user{i}": 1 for i in range(300)}
+    batch = repo.db.batch.return_value
+
+    written = await repo.add_entries("post1", "author", "2024-01-01", recipients)
+
+    assert written == 300
+    assert batch.commit.call_count == 2
+    assert batch.set.call_count == 600
+
+@pytest.mark.asyncio
+async def test_get_entries_invalid_cursor(repo):
+    entries = repo.timelines_collection.document.return_value.collection.return_value
+    entries.document.return_value.get.return_value.exists = False
+
+    result = await repo.get_entries("user1", 10, start_after="missing")
+    assert result == {"error": "Invalid cursor"}
+
+@pytest.mark.asyncio
+async def test_put_entries_counts_only_new_entries():
+    store = FakeFirestore(latency=0, jitter=0, per_document=0)
+    store.seed("timelines/user1", {"entryCount": 1})
+    store.seed("timelines/user1/entries/p1", {"postId": "p1", "priority": 2})
+    with patch("Repository.TimelinesRepository.FirebaseSingleton") as MockFirebase:
+        MockFirebase.return_value.get_firestore_client.return_value = store
+        repo = TimelinesRepository("fake_path")
+
+    entries = [{"postId": f"p{i}", "authorId": "author", "date": "2024-01-01", "priority": 1} for i in range(1, 4)]
+    assert await repo.put_entries("user1", entries) == 3
+    assert await repo.put_entries("user1", entries) == 3
+
+    assert await repo.get_entry_count("user1") == 3
+    assert store.docs["timelines/user1/entries/p1"]["priority"] == 1
@@ -7,19 +7,13 @@ from Service.UsersService import UsersService
 @pytest.fixture
 def users_service():
     with patch("Service.UsersService.UsersRepository") as MockUsersRepo, \
-         patch("Service.UsersService.PostsRepository") as MockPostsRepo, \
-         patch("Service.UsersService.CommentsRepository") as MockCommentsRepo, \
-         patch("Service.UsersService.RatingsRepository") as MockRatingsRepo, \
-         patch("Service.UsersService.VotesRepository") as MockVotesRepo:
+         patch("Service.UsersService.AccountDeletionQueue") as MockDeletionQueue:
 
         users_repo = MockUsersRepo.return_value
-        posts_repo = MockPostsRepo.return_value
-        comments_repo = MockCommentsRepo.return_value
-        ratings_repo = MockRatingsRepo.return_value
-        votes_repo = MockVotesRepo.return_value
 
         users_repo.get_user_by_id = AsyncMock()
         users_repo.get_user_by_id.__name__ = "get_user_by_id"
+        users_repo.get_many = AsyncMock(side_effect=lambda ids: [{"userId": i} for i in ids])
         users_repo.update_user = AsyncMock()
         users_repo.update_user.__name__ = "update_user"
         users_repo.follow_update = AsyncMock()
@@ -30,28 +24,12 @@ def users_service():
         users_repo.get_all_users.__name__ = "get_all_users"
         users_repo.delete_user = AsyncMock()
         users_repo.delete_user.__name__ = "delete_user"
-
-        posts_repo.get_user_posts_from_firestore = AsyncMock()
-        posts_repo.get_user_posts_from_firestore.__name__ = "get_user_posts_from_firestore"
-        posts_repo.delete_post = AsyncMock()
-        posts_repo.delete_post.__name__ = "delete_post"
-
-        comments_repo.get_post_comments_from_firestore = AsyncMock()
-        comments_repo.get_post_comments_from_firestore.__name__ = "get_post_comments_from_firestore"
-        comments_repo.delete_comments_and_replies = AsyncMock()
-        comments_repo.delete_comments_and_replies.__name__ = "delete_comments_and_replies"
-
-        ratings_repo.delete_all_ratings = AsyncMock()
-        ratings_repo.delete_all_ratings.__name__ = "delete_all_ratings"
-        votes_repo.delete_all_votes = AsyncMock()
-        votes_repo.delete_all_votes.__name__ = "delete_all_votes"
+        users_repo.remove_all_follows = AsyncMock()
+        users_repo.remove_all_follows.__name__ = "remove_all_follows"
 
         service = UsersService("fake_path")
         service.users_repo = users_repo
-        service.posts_repo = posts_repo
-        service.comments_repo = comments_repo
-        service.ratings_repo = ratings_repo
-        service.votes_repo = votes_repo
+        MockDeletionQueue.get_instance.return_value.enqueue.return_value = {"jobId": "job1", "userId": "user1", "status": "pending"}
 
         yield service
 
@@ -102,21 +80,37 @@ async def test_follow_unfollow_user(users_service):
     res = await users_service.unfollow_user("user1", "user2")
     assert "message" in res or res is not None
 
-    users_service.users_repo.get_user_by_id.side_effect = lambda x: None if x == "bad" else {"id": x}
+    users_service.users_repo.get_many.assert_awaited_with(["user1", "user2"])
+    users_service.users_repo.get_user_by_id.assert_not_awaited()
+
+    users_service.users_repo.get_many.side_effect = lambda ids: [
+        {"userId": i, "error": "User not found"} if i == "bad" else {"userId": i} for i in ids
+    ]
     res = await users_service.follow_user("bad", "user2")
     assert "error" in res
-    users_service.users_repo.get_user_by_id.side_effect = None
-    users_service.users_repo.get_user_by_id.return_value = {"id": "user1"}
+    res = await users_service.add_follower("user1", "bad")
+    assert "error" in res
+    users_service.users_repo.follow_update.assert_awaited_with("user1", "user2", False)
+    users_service.users_repo.follower_update.assert_not_awaited()
 
 
 @pytest.mark.asyncio
 async def test_delete_user(users_service):
-    users_service.posts_repo.get_user_posts_from_firestore.return_value = {"posts": [{"postId": "p1"}]}
-    users_service.comments_repo.get_post_comments_from_firestore.return_value = [{"commentId": "c1"}]
-
     res = await users_service.delete_user("user1")
-    assert "status" in res
+    assert res == {"message": "User deletion queued", "jobId": "job1", "userId": "user1", "status": "pending"}
+    users_service.deletion_queue.enqueue.assert_called_once_with("user1")
+    users_service.users_repo.delete_user.assert_not_awaited()
+    users_service.users_repo.get_all_users.assert_not_called()
 
     users_service.users_repo.get_user_by_id.return_value = None
     res = await users_service.delete_user("bad_user")
     assert "error" in res
+
+
+@pytest.mark.asyncio
+async def test_get_deletion_status(users_service):
+    users_service.deletion_queue.get.return_value = {"jobId": "job1", "status": "running", "step": "posts"}
+    assert (await users_service.get_deletion_status("job1"))["step"] == "posts"
+
+    users_service.deletion_queue.get.return_value = None
+    assert await users_service.get_deletion_status("missing") == {"error": "Deletion job not found"}
@@ -1,5 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import ArrayRemove, ArrayUnion, Increment
 from Repository.UsersRepository import UsersRepository
 from Model.User import User
 
@@ -59,59 +61,135 @@ async def test_update_user_not_found(repo, fake_user):
     result = await repo.update_user("user1", fake_user)
     assert result == {"error": "User not found"}
 
+def _ref(path):
+    ref = MagicMock()
+    ref.path = path
+    ref.id = path.split("/")[-1]
+    return ref
+
+
+def _snapshot(ref, data, exists=True):
+    doc = MagicMock()
+    doc.id = ref.id
+    doc.reference = ref
+    doc.exists = exists
+    doc.to_dict.return_value = data
+    return doc
+
+
+@pytest.fixture
+def tx_repo(repo):
+    repo.users_collection = MagicMock()
+    repo.users_collection.document.side_effect = lambda doc_id: _ref(f"users/{doc_id}")
+    repo.follows_collection = MagicMock()
+    repo.follows_collection.document.side_effect = lambda doc_id: _ref(f"follows/{doc_id}")
+    with patch("Repository.UsersRepository.transactional", lambda func: func):
+        yield repo
+
+
+def _reads(tx_repo, user=None, other=None, edge=None, uId="user1", userId="user2", edge_id="user1_user2"):
+    transaction = tx_repo.db.transaction.return_value
+    transaction.get_all.return_value = [
+        _snapshot(_ref(f"users/{uId}"), user, exists=user is not None),
+        _snapshot(_ref(f"users/{userId}"), other, exists=other is not None),
+        _snapshot(_ref(f"follows/{edge_id}"), edge, exists=edge is not None),
+    ]
+    return transaction
+
+
 @pytest.mark.asyncio
-async def test__update_followers_or_following_add_follow(repo):
-    uId = "user1"
-    userId = "user2"
-    user_field = "following"
+async def test__update_followers_or_following_add_follow(tx_repo):
+    transaction = _reads(tx_repo, user={"following": []}, other={})
 
-    mock_doc = MagicMock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = {user_field: []}  
-    mock_doc.reference.update = AsyncMock()
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
+    result = await tx_repo._update_followers_or_following("user1", "following", "user2", True)
+
+    assert result == {"message": "Now followin user2"}
+    assert transaction.get_all.call_count == 1
+    edge_ref, edge = transaction.set.call_args[0]
+    assert edge_ref.path == "follows/user1_user2"
+    assert edge["followerId"] == "user1" and edge["followeeId"] == "user2"
+    updates = {call.args[0].path: call.args[1] for call in transaction.update.call_args_list}
+    assert isinstance(updates["users/user1"]["following"], ArrayUnion)
+    assert isinstance(updates["users/user2"]["followers"], ArrayUnion)
+
+@pytest.mark.asyncio
+async def test__update_followers_or_following_remove_follower(tx_repo):
+    transaction = _reads(tx_repo, user={"followers": ["user2"]}, other={}, edge_id="user2_user1")
 
-    repo.get_all_users = AsyncMock(return_value=[{"userId": "user2"}, {"userId": "user3"}])
+    result = await tx_repo._update_followers_or_following("user1", "followers", "user2", False)
 
-    result = await repo._update_followers_or_following(uId, user_field, userId, True)
-    assert result == {"message": f"Now {user_field[:-1]} {userId}"}
+    assert result == {"message": "Unfollower user2"}
+    assert transaction.delete.call_args[0][0].path == "follows/user2_user1"
+    updates = {call.args[0].path: call.args[1] for call in transaction.update.call_args_list}
+    assert isinstance(updates["users/user2"]["following"], ArrayRemove)
+    assert isinstance(updates["users/user1"]["followers"], ArrayRemove)
 
 @pytest.mark.asyncio
-async def test__update_followers_or_following_remove_follower(repo):
-    uId = "user1"
-    userId = "user2"
-    user_field = "followers"
+async def test__update_followers_or_following_already_linked_by_edge(tx_repo):
+    transaction = _reads(tx_repo, user={}, other={}, edge={"followerId": "user1", "followeeId": "user2"})
 
-    mock_doc = MagicMock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = {user_field: [userId]}
-    mock_doc.reference.update = AsyncMock()
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
-    repo.get_all_users = AsyncMock(return_value=[{"userId": userId}])
+    result = await tx_repo._update_followers_or_following("user1", "following", "user2", True)
 
-    result = await repo._update_followers_or_following(uId, user_field, userId, False)
-    assert result == {"message": f"Un{user_field[:-1]} {userId}"}
+    assert result == {"message": "Already followin user2"}
+    transaction.set.assert_not_called()
+    transaction.update.assert_not_called()
 
 @pytest.mark.asyncio
-async def test__update_followers_or_following_user_not_exist(repo):
-    repo.get_all_users = AsyncMock(return_value=[{"userId": "userX"}])
-    mock_doc = MagicMock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = {"followers": []}
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
+async def test__update_followers_or_following_not_linked(tx_repo):
+    transaction = _reads(tx_repo, user={"following": []}, other={})
+
+    result = await tx_repo._update_followers_or_following("user1", "following", "user2", False)
 
-    result = await repo._update_followers_or_following("user1", "followers", "nonexistent", True)
+    assert result == {"message": "Not followin user2"}
+    transaction.delete.assert_not_called()
+
+@pytest.mark.asyncio
+async def test__update_followers_or_following_user_not_exist(tx_repo):
+    _reads(tx_repo, user={"followers": []}, userId="nonexistent", edge_id="nonexistent_user1")
+
+    result = await tx_repo._update_followers_or_following("user1", "followers", "nonexistent", True)
     assert result == {"error": "User 'nonexistent' does not exist"}
 
 @pytest.mark.asyncio
-async def test__update_followers_or_following_user_not_found(repo):
-    mock_doc = MagicMock()
-    mock_doc.exists = False
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
+async def test__update_followers_or_following_user_not_found(tx_repo):
+    _reads(tx_repo, other={}, edge_id="user2_user1")
 
-    result = await repo._update_followers_or_following("user1", "followers", "user2", True)
+    result = await tx_repo._update_followers_or_following("user1", "followers", "user2", True)
     assert result == {"error": "User not found"}
 
+@pytest.mark.asyncio
+async def test_get_following_and_follower_ids(tx_repo):
+    query = tx_repo.follows_collection.where.return_value
+    query.stream.return_value = [_snapshot(_ref("follows/user1_user2"), {"followerId": "user1", "followeeId": "user2"})]
+
+    assert await tx_repo.get_following_ids("user1") == ["user2"]
+    assert await tx_repo.get_follower_ids("user2") == ["user1"]
+    tx_repo.follows_collection.where.assert_any_call("followerId", "==", "user1")
+    tx_repo.follows_collection.where.assert_any_call("followeeId", "==", "user2")
+
+@pytest.mark.asyncio
+async def test_remove_all_follows(tx_repo):
+    user_ref = _ref("users/user1")
+    tx_repo.users_collection.document.side_effect = lambda doc_id: user_ref if doc_id == "user1" else _ref(f"users/{doc_id}")
+    user_ref.get.return_value = _snapshot(user_ref, {"following": ["user2", "legacy"], "followers": ["user3"]})
+    outgoing = [_snapshot(_ref("follows/user1_user2"), {"followerId": "user1", "followeeId": "user2"})]
+    incoming = [_snapshot(_ref("follows/user3_user1"), {"followerId": "user3", "followeeId": "user1"})]
+    queries = {"followerId": outgoing, "followeeId": incoming}
+    tx_repo.follows_collection.where.side_effect = lambda field, op, value: MagicMock(stream=MagicMock(return_value=queries[field]))
+    tx_repo.db.get_all.return_value = [_snapshot(_ref(f"users/{u}"), {}) for u in ("user2", "user3")] + \
+        [_snapshot(_ref("users/legacy"), None, exists=False)]
+    batch = tx_repo.db.batch.return_value
+
+    result = await tx_repo.remove_all_follows("user1")
+
+    assert result == {"edges": 2, "users": 2}
+    assert {call.args[0].path for call in batch.delete.call_args_list} == {"follows/user1_user2", "follows/user3_user1"}
+    updates = {call.args[0].path: call.args[1] for call in batch.update.call_args_list}
+    assert set(updates) == {"users/user2", "users/user3"}
+    assert isinstance(updates["users/user2"]["followers"], ArrayRemove)
+    assert isinstance(updates["users/user3"]["following"], ArrayRemove)
+    batch.commit.assert_called_once()
+
 @pytest.mark.asyncio
 async def test_follow_update_calls_update_following(repo):
     repo._update_followers_or_following = AsyncMock(return_value={"message": "ok"})
@@ -145,30 +223,24 @@ async def test_update_user_rating_not_found(repo):
 
 @pytest.mark.asyncio
 async def test_update_user_votes_success(repo):
-    mock_doc = MagicMock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = {"commentsRating": 3}
-    mock_doc.reference.update = AsyncMock()
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
+    user_ref = repo.db.collection.return_value.document.return_value
 
     result = await repo.update_user_votes("user1", True)
     assert result == {"message": "User votes updated"}
-    
+    increment = user_ref.update.call_args.args[0]["commentsRating"]
+    assert isinstance(increment, Increment) and increment.value == 1
+    user_ref.get.assert_not_called()
+
 @pytest.mark.asyncio
-async def test_update_user_votes_invalid_type(repo):
-    mock_doc = MagicMock()
-    mock_doc.exists = True
-    mock_doc.to_dict.return_value = {"commentsRating": "bad_data"}
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
+async def test_update_user_votes_downvote(repo):
+    user_ref = repo.db.collection.return_value.document.return_value
 
-    result = await repo.update_user_votes("user1", True)
-    assert result == {"error": "Invalid data type for commentsRating"}
+    await repo.update_user_votes("user1", False)
+    assert user_ref.update.call_args.args[0]["commentsRating"].value == -1
 
 @pytest.mark.asyncio
 async def test_update_user_votes_user_not_found(repo):
-    mock_doc = MagicMock()
-    mock_doc.exists = False
-    repo._get_user_doc = AsyncMock(return_value=mock_doc)
+    repo.db.collection.return_value.document.return_value.update.side_effect = NotFound("missing")
 
     result = await repo.update_user_votes("user1", True)
     assert result == {"error": "User not found"}
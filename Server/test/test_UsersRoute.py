@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from Model.UserPydantic import UserPydantic
 
@@ -50,9 +51,22 @@ def test_update_user_success(mock_users_service, user_pydantic):
     assert response.json()["id"] == "user1"
 
 def test_delete_user_success(mock_users_service):
+    mock_users_service.delete_user = AsyncMock(return_value={"message": "User deletion queued", "jobId": "job1", "status": "pending"})
     response = client.delete("/user1")
+    assert response.status_code == 202
+    assert response.json()["jobId"] == "job1"
+
+def test_get_deletion_status(mock_users_service):
+    mock_users_service.get_deletion_status = AsyncMock(return_value={"jobId": "job1", "status": "done"})
+    response = client.get("/deletions/job1")
     assert response.status_code == 200
-    assert response.json()["message"] == "User and related data deleted successfully"
+    assert response.json()["status"] == "done"
+
+def test_get_deletion_status_not_found(mock_users_service):
+    mock_users_service.get_deletion_status = AsyncMock(return_value={"error": "Deletion job not found"})
+    with pytest.raises(HTTPException) as exc:
+        client.get("/deletions/missing")
+    assert exc.value.status_code == 404
 
 def test_follow_user_success(mock_users_service):
     response = client.post("/user1/follow/user2")
@@ -0,0 +1,123 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from Service.ViewBuffer import ViewBuffer
+
+
+@pytest.fixture
+def repo():
+    repo = MagicMock()
+    repo.add_post_views = AsyncMock(side_effect=lambda counts: {"written": list(counts), "missing": [], "pending": {}})
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_add_aggregates_views_per_post(repo):
+    buffer = ViewBuffer(repo, flush_interval=60)
+    for post_id in ["post1", "post2", "post1", "post1"]:
+        assert buffer.add(post_id)
+
+    assert await buffer.flush() == 4
+    repo.add_post_views.assert_awaited_once_with({"post1": 3, "post2": 1})
+    stats = buffer.stats()
+    assert stats["buffered"] == 4 and stats["flushed"] == 4 and stats["pending_views"] == 0
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_timer(repo):
+    buffer = ViewBuffer(repo, flush_interval=0.01)
+    buffer.add("post1")
+    await asyncio.sleep(0.05)
+    repo.add_post_views.assert_awaited_once_with({"post1": 1})
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_threshold_reached(repo):
+    buffer = ViewBuffer(repo, flush_interval=60, flush_threshold=2)
+    buffer.add("post1")
+    buffer.add("post2")
+    await asyncio.sleep(0.01)
+    repo.add_post_views.assert_awaited_once_with({"post1": 1, "post2": 1})
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_views(repo):
+    buffer = ViewBuffer(repo, flush_interval=60)
+    repo.add_post_views.side_effect = Exception("unavailable")
+    buffer.add("post1")
+
+    assert await buffer.flush() == 0
+    buffer.add("post1")
+    assert buffer.stats()["pending_views"] == 2
+    assert buffer.stats()["failed_flushes"] == 1
+
+    repo.add_post_views.side_effect = lambda counts: {"written": list(counts), "missing": [], "pending": {}}
+    await buffer.flush()
+    repo.add_post_views.assert_awaited_with({"post1": 2})
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_partial_flush_requeues_only_uncommitted_views(repo):
+    buffer = ViewBuffer(repo, flush_interval=60)
+    repo.add_post_views.side_effect = lambda counts: {
+        "written": ["post1"], "missing": [], "pending": {"post2": 2}, "error": "unavailable"
+    }
+    buffer.add("post1")
+    buffer.add("post2")
+    buffer.add("post2")
+
+    assert await buffer.flush() == 1
+    assert buffer.stats()["pending_views"] == 2 and buffer.stats()["failed_flushes"] == 1
+
+    repo.add_post_views.side_effect = lambda counts: {"written": list(counts), "missing": [], "pending": {}}
+    assert await buffer.flush() == 2
+    repo.add_post_views.assert_awaited_with({"post2": 2})
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_drops_new_posts(repo):
+    buffer = ViewBuffer(repo, flush_interval=60, max_posts=1)
+    assert buffer.add("post1")
+    assert buffer.add("post1")
+    assert not buffer.add("post2")
+    assert buffer.stats()["dropped"] == 1
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_missing_posts_are_reported(repo):
+    repo.add_post_views.side_effect = lambda counts: {"written": ["post1"], "missing": ["gone"], "pending": {}}
+    buffer = ViewBuffer(repo, flush_interval=60)
+    buffer.add("post1")
+    buffer.add("gone")
+    buffer.add("gone")
+
+    assert await buffer.flush() == 1
+    assert buffer.stats()["missing"] == 2
+    await buffer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_views(repo):
+    buffer = ViewBuffer(repo, flush_interval=60)
+    buffer.add("post1")
+    await buffer.close()
+
+    repo.add_post_views.assert_awaited_once_with({"post1": 1})
+    assert not buffer.add("post1")
+
+
+@pytest.mark.asyncio
+async def test_close_reports_views_it_could_not_write(repo):
+    repo.add_post_views.side_effect = Exception("unavailable")
+    buffer = ViewBuffer(repo, flush_interval=60)
+    buffer.add("post1")
+    await buffer.close()
+
+    assert buffer.stats()["dropped"] == 1
+    assert buffer.stats()["pending_views"] == 0
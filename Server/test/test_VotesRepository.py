@@ -23,30 +23,6 @@ async def test_calculate_total_votes(repo):
     total = await repo.calculate_total_votes("comm1")
     assert total == 0 
 
-@pytest.mark.asyncio
-async def test_upload_new_vote(repo):
-    mock_doc = MagicMock()
-    mock_doc.exists = False
-    repo.db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_doc)
-    repo.db.collection.return_value.document.return_value.set = AsyncMock()
-    repo.db.collection.return_value.document.return_value.update = AsyncMock()
-
-    res = await repo.upload_or_update_vote("comm1", "user1", True)
-    assert res == {"message": "Vote uploaded"}
-
-
-@pytest.mark.asyncio
-async def test_update_vote(repo):
-    mock_doc = MagicMock()
-    mock_doc.exists = True
-    repo.db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_doc)
-    repo.db.collection.return_value.document.return_value.update = AsyncMock()
-    repo.db.collection.return_value.document.return_value.set = AsyncMock()
-
-    res = await repo.upload_or_update_vote("comm1", "user1", False)
-    assert res == {"message": "Vote updated"}
-
-
 @pytest.mark.asyncio
 async def test_get_comment_votes(repo):
     mock_vote1 = MagicMock()
@@ -117,4 +93,134 @@ async def test_get_user_vote_not_exists(repo):
     repo.db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_doc)
 
     res = await repo.get_user_vote("comm1", "user1")
-    assert res == {"userId": "user1", "vote": None}
\ No newline at end of file
+    assert res == {"userId": "user1", "vote": None}
+
+def _ref(path):
+    ref = MagicMock()
+    ref.path = path
+    return ref
+
+
+def _snapshot(ref, data, exists=True):
+    doc = MagicMock()
+    doc.id = ref.path.split("/")[-1]
+    doc.reference = ref
+    doc.exists = exists
+    doc.to_dict.return_value = data
+    return doc
+
+
+@pytest.fixture
+def tx_repo(repo):
+    repo.votes = MagicMock()
+    repo.db.collection.return_value = repo.votes
+    repo.votes.document.return_value = _ref("votes/comm1_user2")
+    repo.comments_collection = MagicMock()
+    repo.comments_collection.document.return_value = _ref("comments/comm1")
+    repo.users_collection = MagicMock()
+    users = {}
+    repo.users_collection.document.side_effect = lambda uid: users.setdefault(uid, _ref(f"users/{uid}"))
+    with patch("Repository.VotesRepository.transactional", lambda func: func):
+        yield repo
+
+
+def _reads(tx_repo, vote=None, comment=None, voter=True):
+    transaction = tx_repo.db.transaction.return_value
+    transaction.get_all.return_value = [
+        _snapshot(tx_repo.votes.document.return_value, vote, exists=vote is not None),
+        _snapshot(tx_repo.comments_collection.document.return_value, comment, exists=comment is not None),
+        _snapshot(tx_repo.users_collection.document("user2"), {"name": "voter"}, exists=voter),
+    ]
+    return transaction
+
+
+@pytest.mark.asyncio
+async def test_apply_new_upvote(tx_repo):
+    transaction = _reads(tx_repo, comment={"userId": "user1", "upvotes": 2, "downvotes": 1, "likes": 1})
+
+    res = await tx_repo.apply_vote("comm1", "user2", True)
+
+    assert res["message"] == "Vote uploaded" and res["previousVote"] is None
+    assert (res["upvotes"], res["downvotes"], res["totalVotes"]) == (3, 1, 2)
+    assert not {"authorId", "postId", "parentId"} & set(res)
+    transaction.get_all.assert_called_once()
+    comment_update, author_update = transaction.update.call_args_list
+    assert comment_update.args[1] == {"upvotes": 3, "downvotes": 1, "likes": 2}
+    assert author_update.args[0] == tx_repo.users_collection.document("user1")
+    assert author_update.args[1]["likes"].value == 1
+    transaction.set.assert_called_once_with(
+        tx_repo.votes.document.return_value, {"userId": "user2", "commId": "comm1", "vote": True}
+    )
+
+
+@pytest.mark.asyncio
+async def test_apply_vote_flip(tx_repo):
+    transaction = _reads(tx_repo, vote={"vote": True}, comment={"userId": "user1", "upvotes": 2, "downvotes": 0, "likes": 2})
+
+    res = await tx_repo.apply_vote("comm1", "user2", False)
+
+    assert res["previousVote"] is True
+    assert (res["upvotes"], res["downvotes"], res["totalVotes"]) == (1, 1, 0)
+    assert transaction.update.call_args_list[1].args[1]["likes"].value == -2
+
+
+@pytest.mark.asyncio
+async def test_apply_same_vote_leaves_author_likes(tx_repo):
+    transaction = _reads(tx_repo, vote={"vote": True}, comment={"userId": "user1", "upvotes": 1, "downvotes": 0, "likes": 1})
+
+    res = await tx_repo.apply_vote("comm1", "user2", True)
+
+    assert res["totalVotes"] == 1
+    assert transaction.update.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_apply_vote_counts_legacy_comment(tx_repo):
+    transaction = _reads(tx_repo, comment={"userId": "user1", "likes": 5})
+    transaction.get.return_value = [MagicMock(to_dict=lambda: {"vote": True}), MagicMock(to_dict=lambda: {"vote": False})]
+
+    res = await tx_repo.apply_vote("comm1", "user2", True)
+
+    assert (res["upvotes"], res["downvotes"], res["totalVotes"]) == (2, 1, 1)
+    assert transaction.update.call_args_list[1].args[1]["likes"].value == -4
+
+
+@pytest.mark.asyncio
+async def test_apply_vote_missing_comment(tx_repo):
+    transaction = _reads(tx_repo)
+
+    res = await tx_repo.apply_vote("comm1", "user2", True)
+    assert res == {"error": "Invalid comment ID"}
+    transaction.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_apply_vote_unknown_voter(tx_repo):
+    transaction = _reads(tx_repo, comment={"userId": "user1", "upvotes": 0, "downvotes": 0}, voter=False)
+
+    res = await tx_repo.apply_vote("comm1", "user2", True)
+    assert res == {"error": "Invalid user ID"}
+    transaction.update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retract_downvote(tx_repo):
+    transaction = _reads(tx_repo, vote={"vote": False}, comment={"userId": "user1", "upvotes": 1, "downvotes": 1, "likes": 0})
+
+    res = await tx_repo.retract_vote("comm1", "user2")
+
+    assert res["message"] == "Vote deleted"
+    assert (res["upvotes"], res["downvotes"], res["totalVotes"]) == (1, 0, 1)
+    transaction.delete.assert_called_once_with(tx_repo.votes.document.return_value)
+
+
+@pytest.mark.asyncio
+async def test_get_comment_total_votes_reads_tally(repo):
+    repo.comments_collection.document.return_value.get.return_value = _snapshot(
+        _ref("comments/comm1"), {"upvotes": 4, "downvotes": 1}
+    )
+    repo.calculate_total_votes = AsyncMock()
+
+    result = await repo.get_comment_total_votes("comm1")
+    assert result == {"commId": "comm1", "totalVotes": 3, "upvotes": 4, "downvotes": 1}
+    repo.calculate_total_votes.assert_not_called()
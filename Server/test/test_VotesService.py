@@ -7,13 +7,11 @@ from Service.VotesService import VotesService
 def service():
     with patch("Service.VotesService.VotesRepository") as MockVotesRepo, \
          patch("Service.VotesService.CommentsRepository") as MockCommentsRepo, \
-         patch("Service.VotesService.UsersRepository") as MockUsersRepo, \
-         patch("Service.VotesService.PostsRepository") as MockPostsRepo:
+         patch("Service.VotesService.UsersRepository") as MockUsersRepo:
 
         votes_repo = MockVotesRepo.return_value
         comments_repo = MockCommentsRepo.return_value
         users_repo = MockUsersRepo.return_value
-        posts_repo = MockPostsRepo.return_value
 
         comments_repo.get_single_comment = AsyncMock(return_value={"id": "comm1", "userId": "user1"})
         users_repo.get_user_by_id = AsyncMock(return_value={"id": "user1"})
@@ -21,18 +19,16 @@ def service():
         votes_repo.get_comment_total_votes = AsyncMock(return_value=5)
         votes_repo.delete_all_votes = AsyncMock(return_value={"message": "all votes deleted"})
         votes_repo.get_user_vote = AsyncMock(return_value=True)
-        votes_repo.upload_or_update_vote = AsyncMock(return_value=None)
         votes_repo.delete_vote = AsyncMock(return_value=None)
-        comments_repo.update_comment_votes = AsyncMock(return_value=None)
-        comments_repo.get_user_comments = AsyncMock(return_value=[{"likes": 1}, {"likes": 2}])
-        posts_repo.get_user_posts_from_firestore = AsyncMock(return_value={"posts": [{"likes": 3}]})
-        users_repo.update_user_likes = AsyncMock(return_value=None)
+        totals = {"commId": "comm1", "totalVotes": 2, "upvotes": 3, "downvotes": 1}
+        votes_repo.apply_vote = AsyncMock(return_value={"message": "Vote uploaded", "previousVote": None, **totals})
+        votes_repo.retract_vote = AsyncMock(return_value={"message": "Vote deleted", "previousVote": True, **totals})
+        votes_repo.reset_comment_tally = AsyncMock(return_value={"commId": "comm1", "totalVotes": 0})
 
         service = VotesService("fake_path")
         service.votes_repo = votes_repo
         service.comments_repo = comments_repo
         service.users_repo = users_repo
-        service.posts_repo = posts_repo
 
         yield service
 
@@ -109,27 +105,53 @@ async def test_get_user_vote_for_comment(service):
 async def test_vote_on_comment(service):
     res = await service.vote_on_comment("comm1", "user1", True)
     assert res["message"] == "Vote processed"
-    service.comments_repo.get_single_comment.return_value = None
-    with pytest.raises(ValueError):
+    service.votes_repo.apply_vote.return_value = {"error": "Invalid comment ID"}
+    with pytest.raises(ValueError, match="Invalid comment ID"):
         await service.vote_on_comment("comm1", "user1", True)
-    service.comments_repo.get_single_comment.return_value = {"id": "comm1"}
-    service.users_repo.get_user_by_id.return_value = None
-    with pytest.raises(ValueError):
+    service.votes_repo.apply_vote.return_value = {"error": "Invalid user ID"}
+    with pytest.raises(ValueError, match="Invalid user ID"):
         await service.vote_on_comment("comm1", "user1", True)
+    with pytest.raises(ValueError):
+        await service.vote_on_comment("", "user1", True)
+
+@pytest.mark.asyncio
+async def test_vote_on_comment_skips_separate_validation_reads(service):
+    await service.vote_on_comment("comm1", "user1", True)
+    service.comments_repo.get_single_comment.assert_not_called()
+    service.users_repo.get_user_by_id.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_remove_vote(service):
     res = await service.remove_vote("comm1", "user1")
     assert res["message"] == "Vote removed"
-    service.comments_repo.get_single_comment.return_value = None
-    with pytest.raises(ValueError):
+    service.votes_repo.retract_vote.return_value = {"error": "Invalid comment ID"}
+    with pytest.raises(ValueError, match="Invalid comment ID"):
         await service.remove_vote("comm1", "user1")
-    service.comments_repo.get_single_comment.return_value = {"id": "comm1"}
-    service.users_repo.get_user_by_id.return_value = None
-    with pytest.raises(ValueError):
+    service.votes_repo.retract_vote.return_value = {"error": "Invalid user ID"}
+    with pytest.raises(ValueError, match="Invalid user ID"):
         await service.remove_vote("comm1", "user1")
 
 @pytest.mark.asyncio
-async def test_update_user_total_likes(service):
-    res = await service.update_user_total_likes("user1")
-    assert isinstance(res, int)
+async def test_vote_on_comment_returns_transaction_totals(service):
+    res = await service.vote_on_comment("comm1", "user2", False)
+    service.votes_repo.apply_vote.assert_awaited_once_with("comm1", "user2", False)
+    assert res["totalLikes"] == {"commId": "comm1", "totalVotes": 2, "upvotes": 3, "downvotes": 1}
+    service.votes_repo.get_comment_total_votes.assert_not_called()
+    service.comments_repo.get_user_comments.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_vote_on_deleted_comment(service):
+    service.votes_repo.apply_vote.return_value = {"error": "Comment not found"}
+    with pytest.raises(ValueError):
+        await service.vote_on_comment("comm1", "user2", True)
+
+@pytest.mark.asyncio
+async def test_remove_vote_uses_retract(service):
+    res = await service.remove_vote("comm1", "user2")
+    service.votes_repo.retract_vote.assert_awaited_once_with("comm1", "user2")
+    assert res["totalLikes"]["totalVotes"] == 2
+
+@pytest.mark.asyncio
+async def test_remove_all_votes_resets_tally(service):
+    await service.remove_all_votes("comm1")
+    service.votes_repo.reset_comment_tally.assert_awaited_once_with("comm1")
@@ -0,0 +1,189 @@
+import os
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+from PIL import Image
+from Factory.WorkerPool import InferencePoolBusy, InferenceTimeout, InferenceWorkerPool, WorkerCrashed, _Worker
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+        self.exitcode = None
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        pass
+
+    def terminate(self):
+        self.alive = False
+
+
+class ThreadWorkerPool(InferenceWorkerPool):
+    # Workers are threads using the same queues and shared memory as the real processes.
+    def __init__(self, *args, **kwargs):
+        self.answer = threading.Event()
+        self.answer.set()
+        self.received = queue.Queue()
+        self.spawned = 0
+        super().__init__(*args, **kwargs)
+
+    def _spawn(self, index):
+        self.spawned += 1
+        request_queue, result_queue = queue.Queue(), queue.Queue()
+        process = FakeProcess(pid=self.spawned)
+        threading.Thread(target=self._serve, args=(request_queue, result_queue, process), daemon=True).start()
+        return _Worker(process, request_queue, result_queue)
+
+    def _serve(self, request_queue, result_queue, process):
+        result_queue.put(("ready", process.pid, {}))
+        while True:
+            item = request_queue.get()
+            if item is None:
+                return
+            request_id, model_name, shm_name, size, mode = item
+            self.received.put(shm_name)
+            shm = SharedMemory(name=shm_name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+            image = Image.frombytes(mode, size, bytes(shm.buf[:shm.size]))
+            self.answer.wait(10)
+            shm.close()
+            if process.alive:
+                result_queue.put((request_id, True, {"model": model_name, "size": image.size}))
+
+
+def _exists(shm_name):
+    return os.path.exists(os.path.join("/dev/shm", shm_name.lstrip("/")))
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def image():
+    return Image.new("RGB", (8, 4), "red")
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def make(**kwargs):
+        pool = ThreadWorkerPool(kwargs.pop("num_workers", 1), ["object"], **kwargs)
+        pools.append(pool)
+        assert _wait_for(pool.is_ready)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.answer.set()
+        pool.shutdown()
+
+
+def test_predict_returns_the_worker_result_and_frees_shared_memory(make_pool, image):
+    pool = make_pool()
+
+    assert pool.predict("object", image) == {"model": "object", "size": (8, 4)}
+    assert not _exists(pool.received.get(timeout=1))
+    assert pool.stats()["completed"] == 1
+
+
+def test_full_queue_rejects_new_requests(make_pool, image):
+    pool = make_pool(max_pending=1, queue_timeout=0.05)
+    pool.answer.clear()
+    first = threading.Thread(target=pool.predict, args=("object", image))
+    first.start()
+    pool.received.get(timeout=1)
+
+    with pytest.raises(InferencePoolBusy):
+        pool.predict("object", image)
+    assert pool.stats()["rejected"] == 1
+
+    pool.answer.set()
+    first.join(5)
+    assert pool.predict("object", image)["size"] == (8, 4)
+
+
+def test_timed_out_request_keeps_shared_memory_until_the_worker_answers(make_pool, image):
+    pool = make_pool()
+    pool.answer.clear()
+
+    with pytest.raises(InferenceTimeout):
+        pool.predict("object", image, timeout=0.05)
+    shm_name = pool.received.get(timeout=1)
+    assert _exists(shm_name)
+    assert pool.stats()["workers"][0]["in_flight"] == 1
+
+    pool.answer.set()
+    assert _wait_for(lambda: not _exists(shm_name))
+    assert pool.stats()["workers"][0]["in_flight"] == 0
+
+
+def test_timed_out_request_holds_its_queue_slot_until_the_worker_answers(make_pool, image):
+    pool = make_pool(max_pending=1, queue_timeout=0.05)
+    pool.answer.clear()
+
+    with pytest.raises(InferenceTimeout):
+        pool.predict("object", image, timeout=0.05)
+    with pytest.raises(InferencePoolBusy):
+        pool.predict("object", image)
+
+    pool.answer.set()
+    assert _wait_for(lambda: pool.stats()["pending"] == 0)
+    assert pool.predict("object", image)["size"] == (8, 4)
+
+
+def test_dead_worker_fails_its_requests_and_is_restarted(make_pool, image):
+    pool = make_pool()
+    pool.answer.clear()
+    errors = []
+
+    def call():
+        try:
+            pool.predict("object", image, timeout=10)
+        except Exception as e:
+            errors.append(e)
+
+    caller = threading.Thread(target=call)
+    caller.start()
+    shm_name = pool.received.get(timeout=1)
+    crashed = pool._workers[0].process
+    crashed.alive = False
+    caller.join(5)
+
+    assert len(errors) == 1 and isinstance(errors[0], WorkerCrashed)
+    assert not _exists(shm_name)
+    assert pool.stats()["restarts"] == 1
+    assert pool._workers[0].process is not crashed
+    pool.answer.set()
+    assert _wait_for(pool.is_ready)
+    assert pool.predict("object", image)["size"] == (8, 4)
+
+
+class BrokenQueue:
+    def get(self, timeout=None):
+        raise EOFError("truncated message")
+
+
+def test_unreadable_result_queue_restarts_only_its_worker(make_pool, image):
+    pool = make_pool(num_workers=2)
+    broken = pool._workers[0]
+    broken.result_queue = BrokenQueue()
+
+    assert _wait_for(lambda: pool.stats()["restarts"] == 1)
+    assert pool._workers[0] is not broken
+    assert _wait_for(pool.is_ready)
+    assert [pool.predict("object", image)["size"] for _ in range(4)] == [(8, 4)] * 4